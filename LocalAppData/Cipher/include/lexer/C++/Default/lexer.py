@@ -1,66 +1,67 @@
 from PyQt6.Qsci import QsciLexerCPP
-from PyQt6.QtGui import QColor, QFont
 
 
 class CPPLexer(QsciLexerCPP):
     def __init__(self, editor) -> None:
         super().__init__(editor)
 
-        self.setPaper(QColor("#1E1E1E"))
-        self.setDefaultPaper(QColor("#1E1E1E"))
-        self.setColor(QColor("#D4D4D4"))
-        self.setDefaultColor(QColor("#D4D4D4"))
+        color, font = editor.window.theme.color, editor.window.theme.font
 
-        self.setColor(QColor("#C586C0"), self.PreProcessor)
-        self.setColor(QColor("#C586C0"), self.InactivePreProcessor)
+        self.setPaper(color("#1E1E1E"))
+        self.setDefaultPaper(color("#1E1E1E"))
+        self.setColor(color("#D4D4D4"))
+        self.setDefaultColor(color("#D4D4D4"))
 
-        self.setColor(QColor("#569CD6"), self.Keyword)
-        self.setColor(QColor("#569CD6"), self.InactiveKeyword)
-        self.setColor(QColor("#569CD6"), self.KeywordSet2)
-        self.setColor(QColor("#569CD6"), self.InactiveKeywordSet2)
+        self.setColor(color("#C586C0"), self.PreProcessor)
+        self.setColor(color("#C586C0"), self.InactivePreProcessor)
 
-        self.setColor(QColor("#4EC9B0"), self.GlobalClass)
-        self.setColor(QColor("#4EC9B0"), self.InactiveGlobalClass)
+        self.setColor(color("#569CD6"), self.Keyword)
+        self.setColor(color("#569CD6"), self.InactiveKeyword)
+        self.setColor(color("#569CD6"), self.KeywordSet2)
+        self.setColor(color("#569CD6"), self.InactiveKeywordSet2)
 
-        self.setColor(QColor("#CE9178"), self.DoubleQuotedString)
-        self.setColor(QColor("#CE9178"), self.InactiveDoubleQuotedString)
-        self.setColor(QColor("#CE9178"), self.SingleQuotedString)
-        self.setColor(QColor("#CE9178"), self.InactiveSingleQuotedString)
-        self.setColor(QColor("#CE9178"), self.UnclosedString)
-        self.setColor(QColor("#CE9178"), self.InactiveUnclosedString)
-        self.setColor(QColor("#CE9178"), self.VerbatimString)
-        self.setColor(QColor("#CE9178"), self.InactiveVerbatimString)
-        self.setColor(QColor("#CE9178"), self.RawString)
-        self.setColor(QColor("#CE9178"), self.InactiveRawString)
-        self.setColor(QColor("#CE9178"), self.TripleQuotedVerbatimString)
-        self.setColor(QColor("#CE9178"), self.InactiveTripleQuotedVerbatimString)
-        self.setColor(QColor("#CE9178"), self.HashQuotedString)
-        self.setColor(QColor("#CE9178"), self.InactiveHashQuotedString)
+        self.setColor(color("#4EC9B0"), self.GlobalClass)
+        self.setColor(color("#4EC9B0"), self.InactiveGlobalClass)
 
-        self.setColor(QColor("#B5CEA8"), self.Number)
-        self.setColor(QColor("#B5CEA8"), self.InactiveNumber)
+        self.setColor(color("#CE9178"), self.DoubleQuotedString)
+        self.setColor(color("#CE9178"), self.InactiveDoubleQuotedString)
+        self.setColor(color("#CE9178"), self.SingleQuotedString)
+        self.setColor(color("#CE9178"), self.InactiveSingleQuotedString)
+        self.setColor(color("#CE9178"), self.UnclosedString)
+        self.setColor(color("#CE9178"), self.InactiveUnclosedString)
+        self.setColor(color("#CE9178"), self.VerbatimString)
+        self.setColor(color("#CE9178"), self.InactiveVerbatimString)
+        self.setColor(color("#CE9178"), self.RawString)
+        self.setColor(color("#CE9178"), self.InactiveRawString)
+        self.setColor(color("#CE9178"), self.TripleQuotedVerbatimString)
+        self.setColor(color("#CE9178"), self.InactiveTripleQuotedVerbatimString)
+        self.setColor(color("#CE9178"), self.HashQuotedString)
+        self.setColor(color("#CE9178"), self.InactiveHashQuotedString)
 
-        self.setColor(QColor("#6A9955"), self.Comment)
-        self.setColor(QColor("#6A9955"), self.InactiveComment)
-        self.setColor(QColor("#6A9955"), self.CommentLine)
-        self.setColor(QColor("#6A9955"), self.InactiveCommentLine)
-        self.setColor(QColor("#6A9955"), self.CommentDoc)
-        self.setColor(QColor("#6A9955"), self.InactiveCommentDoc)
-        self.setColor(QColor("#6A9955"), self.CommentLineDoc)
-        self.setColor(QColor("#6A9955"), self.InactiveCommentLineDoc)
-        self.setColor(QColor("#6A9955"), self.CommentDocKeyword)
-        self.setColor(QColor("#6A9955"), self.InactiveCommentDocKeyword)
-        self.setColor(QColor("#6A9955"), self.CommentDocKeywordError)
-        self.setColor(QColor("#6A9955"), self.InactiveCommentDocKeywordError)
-        self.setColor(QColor("#6A9955"), self.PreProcessorComment)
-        self.setColor(QColor("#6A9955"), self.InactivePreProcessorComment)
-        self.setColor(QColor("#6A9955"), self.PreProcessorCommentLineDoc)
-        self.setColor(QColor("#6A9955"), self.InactivePreProcessorCommentLineDoc)
+        self.setColor(color("#B5CEA8"), self.Number)
+        self.setColor(color("#B5CEA8"), self.InactiveNumber)
 
-        self.setDefaultFont(QFont("Consolas"))
-        self.setFont(QFont("Consolas"))
+        self.setColor(color("#6A9955"), self.Comment)
+        self.setColor(color("#6A9955"), self.InactiveComment)
+        self.setColor(color("#6A9955"), self.CommentLine)
+        self.setColor(color("#6A9955"), self.InactiveCommentLine)
+        self.setColor(color("#6A9955"), self.CommentDoc)
+        self.setColor(color("#6A9955"), self.InactiveCommentDoc)
+        self.setColor(color("#6A9955"), self.CommentLineDoc)
+        self.setColor(color("#6A9955"), self.InactiveCommentLineDoc)
+        self.setColor(color("#6A9955"), self.CommentDocKeyword)
+        self.setColor(color("#6A9955"), self.InactiveCommentDocKeyword)
+        self.setColor(color("#6A9955"), self.CommentDocKeywordError)
+        self.setColor(color("#6A9955"), self.InactiveCommentDocKeywordError)
+        self.setColor(color("#6A9955"), self.PreProcessorComment)
+        self.setColor(color("#6A9955"), self.InactivePreProcessorComment)
+        self.setColor(color("#6A9955"), self.PreProcessorCommentLineDoc)
+        self.setColor(color("#6A9955"), self.InactivePreProcessorCommentLineDoc)
 
-        editor.setMarginsBackgroundColor(QColor("#1E1E1E"))
-        editor.setMarginsForegroundColor(QColor("#FFFFFF"))
-        editor.setCaretLineBackgroundColor(QColor("#2C2C2C"))
-        editor.setCaretForegroundColor(QColor("#AAAAAA"))
+        self.setDefaultFont(font("Consolas"))
+        self.setFont(font("Consolas"))
+
+        editor.setMarginsBackgroundColor(color("#1E1E1E"))
+        editor.setMarginsForegroundColor(color("#FFFFFF"))
+        editor.setCaretLineBackgroundColor(color("#2C2C2C"))
+        editor.setCaretForegroundColor(color("#AAAAAA"))
@@ -1,24 +1,25 @@
 from PyQt6.Qsci import QsciLexerCustom
-from PyQt6.QtGui import QColor, QFont
 
 
 class DefaultLexer(QsciLexerCustom):
     def __init__(self, editor) -> None:
         super().__init__(editor)
 
-        self.setDefaultFont(QFont("Consolas"))
-        self.setDefaultColor(QColor("#FFFFFF"))
-        self.setDefaultPaper(QColor("#1E1E1E"))
+        color, font = editor.window.theme.color, editor.window.theme.font
+
+        self.setDefaultFont(font("Consolas"))
+        self.setDefaultColor(color("#FFFFFF"))
+        self.setDefaultPaper(color("#1E1E1E"))
 
         self.DEFAULT = 0
 
-        self.setColor(QColor("#D4D4D4"), self.DEFAULT)
-        self.setPaper(QColor("#1E1E1E"), self.DEFAULT)
+        self.setColor(color("#D4D4D4"), self.DEFAULT)
+        self.setPaper(color("#1E1E1E"), self.DEFAULT)
 
-        editor.setMarginsBackgroundColor(QColor("#1E1E1E"))
-        editor.setMarginsForegroundColor(QColor("#FFFFFF"))
-        editor.setCaretLineBackgroundColor(QColor("#2C2C2C"))
-        editor.setCaretForegroundColor(QColor("#AAAAAA"))
+        editor.setMarginsBackgroundColor(color("#1E1E1E"))
+        editor.setMarginsForegroundColor(color("#FFFFFF"))
+        editor.setCaretLineBackgroundColor(color("#2C2C2C"))
+        editor.setCaretForegroundColor(color("#AAAAAA"))
 
     def language(self) -> str:
         return "DefaultLexer"
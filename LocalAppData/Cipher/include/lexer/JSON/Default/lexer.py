@@ -1,33 +1,60 @@
-from PyQt6.Qsci import QsciLexerCustom
-from PyQt6.QtGui import QColor, QFont
+from array import array
 import re
 
+from cipher import ThreadedLexer
 
-class JSONLexer(QsciLexerCustom):
+# The states of the end of a line, kept with `SCI_SETLINESTATE`
+NORMAL, IN_COMMENT = 0, 1
+DEFAULT, NUM, STRING, BOOL, BRACKETS, COMMENT = range(6)
+BRACKET = re.compile(rb"[][{}]")
+NUMBER = re.compile(rb"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+KEYWORD = re.compile(rb"\b(?:true|false|null)\b")
+# Strings end at the end of their line, block comments at their `*/`
+REGION = re.compile(
+    rb'"(?:[^"\\\n]|\\.)*"?|//[^\n]*|/\*.*?(?:\*/|\Z)', re.DOTALL
+)
+COMMENT_END = re.compile(rb".*?(?:\*/|\Z)", re.DOTALL)
+
+
+def _setCommentStates(
+    data: bytes, states: list[int], start: int, end: int, closed: bool
+) -> None:
+    """Marks the lines ending inside the block comment from `start` to `end`"""
+    first = data.count(b"\n", 0, start)
+    last = first + data.count(b"\n", start, end)
+    for line in range(first, last if closed else len(states)):
+        states[line] = IN_COMMENT
+
+
+class JSONLexer(ThreadedLexer):
     def __init__(self, editor) -> None:
         super().__init__(editor)
 
-        self.setDefaultFont(QFont("Consolas"))
-        self.setDefaultColor(QColor("#FFFFFF"))
-        self.setDefaultPaper(QColor("#1E1E1E"))
+        color, font = editor.window.theme.color, editor.window.theme.font
 
-        self.DEFAULT = 0
-        self.NUM = 1
-        self.STRING = 2
-        self.BOOL = 3
-        self.BRACKETS = 4
+        self.setDefaultFont(font("Consolas"))
+        self.setDefaultColor(color("#FFFFFF"))
+        self.setDefaultPaper(color("#1E1E1E"))
 
-        self.setColor(QColor("#D4D4D4"), self.DEFAULT)
-        self.setColor(QColor("#B5CEA8"), self.NUM)
-        self.setColor(QColor("#CE9178"), self.STRING)
-        self.setColor(QColor("#C586C0"), self.BRACKETS)
-        self.setColor(QColor("#6796E6"), self.BOOL)
+        self.DEFAULT = DEFAULT
+        self.NUM = NUM
+        self.STRING = STRING
+        self.BOOL = BOOL
+        self.BRACKETS = BRACKETS
+        self.COMMENT = COMMENT
+
+        self.setColor(color("#D4D4D4"), self.DEFAULT)
+        self.setColor(color("#B5CEA8"), self.NUM)
+        self.setColor(color("#CE9178"), self.STRING)
+        self.setColor(color("#C586C0"), self.BRACKETS)
+        self.setColor(color("#6796E6"), self.BOOL)
+        self.setColor(color("#6A9955"), self.COMMENT)
 
         editor = self.parent()
-        editor.setMarginsBackgroundColor(QColor("#1E1E1E"))
-        editor.setMarginsForegroundColor(QColor("#FFFFFF"))
-        editor.setCaretLineBackgroundColor(QColor("#2C2C2C"))
-        editor.setCaretForegroundColor(QColor("#AAAAAA"))
+        editor.setMarginsBackgroundColor(color("#1E1E1E"))
+        editor.setMarginsForegroundColor(color("#FFFFFF"))
+        editor.setCaretLineBackgroundColor(color("#2C2C2C"))
+        editor.setCaretForegroundColor(color("#AAAAAA"))
 
     def language(self) -> str:
         return "JSONLexer"
@@ -41,33 +68,37 @@ class JSONLexer(QsciLexerCustom):
             return "BOOL"
         if style == self.BRACKETS:
             return "BRACKETS"
+        if style == self.COMMENT:
+            return "COMMENT"
         return "DEFAULT"
 
-    def styleText(self, _: int, __: int) -> None:
-        editor = self.editor()
-        self.startStyling(0)
-
-        text = editor.text()
-
-        p = re.compile(r"[*]\/|\/[*]|\s+|\w+|\W")
-        tokenList = [
-            (token, len(bytearray(token, "utf-8"))) for token in p.findall(text)
-        ]
-
-        string = False
-        for token, tokenLength in tokenList:
-            if string:
-                self.setStyling(tokenLength, self.STRING)
-                if token in '"':
-                    string = False
-            elif token.isnumeric():
-                self.setStyling(tokenLength, self.NUM)
-            elif token in ("true", "false", "null"):
-                self.setStyling(tokenLength, self.BOOL)
-            elif token in '"':
-                self.setStyling(tokenLength, self.STRING)
-                string = True
-            elif token in "{}[]":
-                self.setStyling(tokenLength, self.BRACKETS)
-            else:
-                self.setStyling(tokenLength, self.DEFAULT)
+    def tokenize(self, data: bytes, state: int) -> tuple[array, list[int]]:
+        """Styles whole lines of raw text in a :class:`Thread`
+
+        Whether a line ends in a block comment is kept as its line state, so
+        the styling starts from the first line changed instead of the whole
+        document. Strings and comments come last, so they override the
+        brackets, numbers and keywords inside them.
+        """
+        runs = array("I")
+        for style, regex in ((BRACKETS, BRACKET), (NUM, NUMBER), (BOOL, KEYWORD)):
+            for match in regex.finditer(data):
+                runs.extend((match.start(), match.end() - match.start(), style))
+
+        states = [NORMAL] * (data.count(b"\n") + (not data.endswith(b"\n")))
+        pos = 0
+        if state == IN_COMMENT:
+            pos = COMMENT_END.match(data).end()
+            runs.extend((0, pos, COMMENT))
+            closed = data.endswith(b"*/", 0, pos)
+            _setCommentStates(data, states, 0, pos, closed)
+        for match in REGION.finditer(data, pos):
+            start, end = match.span()
+            if data[start] == ord('"'):
+                runs.extend((start, end - start, STRING))
+                continue
+            runs.extend((start, end - start, COMMENT))
+            if data[start + 1] == ord("*"):
+                closed = data.endswith(b"*/", start + 2, end)
+                _setCommentStates(data, states, start, end, closed)
+        return runs, states
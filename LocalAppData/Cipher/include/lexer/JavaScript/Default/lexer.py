@@ -1,80 +1,68 @@
 from PyQt6.Qsci import QsciLexerJavaScript
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtGui import QColor
 from typing import Dict
 from pathlib import Path
 import json
 
+SYNTAX = Path(__file__).absolute().parent / "syntax.json"
+# The styles colored by every color of `syntax.json`, with their inactive variants
+STYLES = {
+    name: [prefix + style for style in styles for prefix in ("", "Inactive")]
+    for name, styles in {
+        "num": ["Number"],
+        "class": ["GlobalClass"],
+        "keyword": ["Keyword", "KeywordSet2"],
+        "preprocessor": ["PreProcessor"],
+        "comment": [
+            "Comment",
+            "CommentLine",
+            "CommentDoc",
+            "CommentLineDoc",
+            "CommentDocKeyword",
+            "CommentDocKeywordError",
+            "PreProcessorComment",
+            "PreProcessorCommentLineDoc",
+        ],
+        "string": [
+            "DoubleQuotedString",
+            "SingleQuotedString",
+            "UnclosedString",
+            "VerbatimString",
+            "RawString",
+            "TripleQuotedVerbatimString",
+            "HashQuotedString",
+        ],
+    }.items()
+}
+
 
 class JSLexer(QsciLexerJavaScript):
     def __init__(self, editor) -> None:
         super().__init__(editor)
 
-        styles = getStyling()
-
-        self.setFont(QFont(styles.get("font")))
-        self.setPaper(QColor(styles.get("paper")))
-        self.setDefaultPaper(QColor(styles.get("paper")))
-        self.setColor(QColor(styles.get("default")))
-        self.setDefaultColor(QColor(styles.get("default")))
-
-        self.setColor(QColor(styles.get("num")), self.Number)
-        self.setColor(QColor(styles.get("num")), self.InactiveNumber)
-
-        self.setColor(QColor(styles.get("class")), self.GlobalClass)
-        self.setColor(QColor(styles.get("class")), self.InactiveGlobalClass)
-
-        self.setColor(QColor(styles.get("keyword")), self.Keyword)
-        self.setColor(QColor(styles.get("keyword")), self.InactiveKeyword)
-        self.setColor(QColor(styles.get("keyword")), self.KeywordSet2)
-        self.setColor(QColor(styles.get("keyword")), self.InactiveKeywordSet2)
-
-        self.setColor(QColor(styles.get("preprocessor")), self.PreProcessor)
-        self.setColor(QColor(styles.get("preprocessor")), self.InactivePreProcessor)
-
-        self.setColor(QColor(styles.get("comment")), self.Comment)
-        self.setColor(QColor(styles.get("comment")), self.InactiveComment)
-        self.setColor(QColor(styles.get("comment")), self.CommentLine)
-        self.setColor(QColor(styles.get("comment")), self.InactiveCommentLine)
-        self.setColor(QColor(styles.get("comment")), self.CommentDoc)
-        self.setColor(QColor(styles.get("comment")), self.InactiveCommentDoc)
-        self.setColor(QColor(styles.get("comment")), self.CommentLineDoc)
-        self.setColor(QColor(styles.get("comment")), self.InactiveCommentLineDoc)
-        self.setColor(QColor(styles.get("comment")), self.CommentDocKeyword)
-        self.setColor(QColor(styles.get("comment")), self.InactiveCommentDocKeyword)
-        self.setColor(QColor(styles.get("comment")), self.CommentDocKeywordError)
-        self.setColor(
-            QColor(styles.get("comment")), self.InactiveCommentDocKeywordError
-        )
-        self.setColor(QColor(styles.get("comment")), self.PreProcessorComment)
-        self.setColor(QColor(styles.get("comment")), self.InactivePreProcessorComment)
-        self.setColor(QColor(styles.get("comment")), self.PreProcessorCommentLineDoc)
-        self.setColor(
-            QColor(styles.get("comment")), self.InactivePreProcessorCommentLineDoc
-        )
+        theme = editor.window.theme
+        colors = theme.colors(SYNTAX)
+        color = lambda name: colors.get(name, QColor())
+        paper, default = color("paper"), color("default")
 
-        self.setColor(QColor(styles.get("string")), self.DoubleQuotedString)
-        self.setColor(QColor(styles.get("string")), self.InactiveDoubleQuotedString)
-        self.setColor(QColor(styles.get("string")), self.SingleQuotedString)
-        self.setColor(QColor(styles.get("string")), self.InactiveSingleQuotedString)
-        self.setColor(QColor(styles.get("string")), self.UnclosedString)
-        self.setColor(QColor(styles.get("string")), self.InactiveUnclosedString)
-        self.setColor(QColor(styles.get("string")), self.VerbatimString)
-        self.setColor(QColor(styles.get("string")), self.InactiveVerbatimString)
-        self.setColor(QColor(styles.get("string")), self.RawString)
-        self.setColor(QColor(styles.get("string")), self.InactiveRawString)
-        self.setColor(QColor(styles.get("string")), self.TripleQuotedVerbatimString)
-        self.setColor(
-            QColor(styles.get("string")), self.InactiveTripleQuotedVerbatimString
-        )
-        self.setColor(QColor(styles.get("string")), self.HashQuotedString)
-        self.setColor(QColor(styles.get("string")), self.InactiveHashQuotedString)
+        self.setFont(theme.font(theme.syntax(SYNTAX).get("font", "")))
+        self.setPaper(paper)
+        self.setDefaultPaper(paper)
+        self.setColor(default)
+        self.setDefaultColor(default)
+        for name, styles in STYLES.items():
+            for style in styles:
+                self.setColor(color(name), getattr(self, style))
 
-        editor.setMarginsBackgroundColor(QColor(styles.get("paper")))
-        editor.setMarginsForegroundColor(QColor(styles.get("margin")))
-        editor.setCaretLineBackgroundColor(QColor(styles.get("caretBackground")))
-        editor.setCaretForegroundColor(QColor(styles.get("caretForeground")))
+        editor.setMarginsBackgroundColor(paper)
+        editor.setMarginsForegroundColor(color("margin"))
+        editor.setCaretLineBackgroundColor(color("caretBackground"))
+        editor.setCaretForegroundColor(color("caretForeground"))
 
 
-def getStyling() -> Dict[str, str]:
-    with open(f"{Path(__file__).absolute().parent}/syntax.json") as f:
-        return json.load(f)
+def getStyling(editor=None) -> Dict[str, str]:
+    # Without an editor the file is read again, like before the theme was shared
+    if editor is None:
+        with open(SYNTAX) as f:
+            return json.load(f)
+    return editor.window.theme.syntax(SYNTAX)
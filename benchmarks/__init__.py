@@ -0,0 +1 @@
+"""Benchmarks of the editor. Run with `python -m benchmarks.<name>`"""
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import NamedTuple
+from pathlib import Path
+import hashlib
+import random
+import math
+import os
+
+__all__ = ("WorkspaceSpec", "generate")
+
+WORDS = (
+    "self return import class def lambda value index result buffer window "
+    "editor search folder cache thread worker signal model view string bytes "
+    "offset length count match pattern engine file path line column token"
+).split()
+SUFFIXES = (".py", ".js", ".cpp", ".h", ".json", ".txt", ".md")
+
+
+class WorkspaceSpec(NamedTuple):
+    """The shape of a synthetic workspace
+
+    Attributes
+    ----------
+    files: `int`
+        The number of files
+    depth: `int`
+        The number of folder levels under the workspace
+    fanout: `int`
+        The number of sub folders of every folder
+    meanSize: `int`
+        The mean size of a file in bytes
+    sizeSpread: `float`
+        The sigma of the log-normal distribution of the sizes. `0` for equal sizes
+    binaryRatio: `float`
+        The fraction of files that are binary
+    density: `float`
+        The number of lines holding `needle` per KB of text
+    needle: `str`
+        The word the benchmarks search for
+    seed: `int`
+        The seed of the generator. The same spec always writes the same files
+    """
+
+    files: int = 2000
+    depth: int = 3
+    fanout: int = 8
+    meanSize: int = 4096
+    sizeSpread: float = 1.0
+    binaryRatio: float = 0.05
+    density: float = 0.05
+    needle: str = "needle"
+    seed: int = 0
+
+    @property
+    def key(self) -> str:
+        """A short hash of the spec"""
+        return hashlib.sha1(repr(tuple(self)).encode()).hexdigest()[:12]
+
+
+def _lines(rng: random.Random, count: int, width: int = 72) -> list[str]:
+    lines = []
+    for _ in range(count):
+        words, length = [], 0
+        while length < width:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        lines.append(" ".join(words))
+    return lines
+
+
+def generate(folder: Path, spec: WorkspaceSpec) -> dict[str, int]:
+    """Writes a synthetic workspace into an empty folder
+
+    The text files are made of lines drawn from a fixed pool of random
+    lines. Lines holding the needle are drawn from their own pool, at the
+    rate given by the density, so the number of matches is known in advance.
+
+    Returns
+    -------
+    dict[str, int]
+        The number of files, text files and bytes, and the expected matches
+    """
+    rng = random.Random(spec.seed)
+    pool = _lines(rng, 4096)
+    needles = []
+    for line in _lines(rng, 256):
+        words = line.split()
+        words.insert(rng.randrange(len(words) + 1), spec.needle)
+        needles.append(" ".join(words))
+    mu = math.log(spec.meanSize) - spec.sizeSpread**2 / 2
+    stats = {"files": 0, "textFiles": 0, "bytes": 0, "textBytes": 0, "matches": 0}
+
+    os.makedirs(os.path.join(folder, ".cipher"), exist_ok=True)
+    for i in range(spec.files):
+        parts, n = [], i
+        for _ in range(spec.depth):
+            parts.append(f"dir{n % spec.fanout}")
+            n //= spec.fanout
+        parent = os.path.join(folder, *parts)
+        os.makedirs(parent, exist_ok=True)
+        size = int(rng.lognormvariate(mu, spec.sizeSpread))
+        size = max(16, min(size, spec.meanSize * 64))
+        if rng.random() < spec.binaryRatio:
+            data = b"\0" + rng.randbytes(size - 1)
+            path = os.path.join(parent, f"blob{i}.bin")
+        else:
+            count = max(1, size // 73)
+            lines = rng.choices(pool, k=count)
+            rate = spec.density * 73 / 1024
+            hits = 0
+            for line in range(count):
+                if rng.random() < rate:
+                    lines[line] = rng.choice(needles)
+                    hits += 1
+            data = ("\n".join(lines) + "\n").encode()
+            path = os.path.join(parent, f"file{i}{rng.choice(SUFFIXES)}")
+            stats["textFiles"] += 1
+            stats["textBytes"] += len(data)
+            stats["matches"] += hits
+        with open(path, "wb") as f:
+            f.write(data)
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+    return stats
@@ -0,0 +1,305 @@
+"""Benchmarks the workspace search on synthetic workspaces
+
+Every scenario generates a workspace from a :class:`WorkspaceSpec`, then
+searches it for the needle with the :class:`SearchModel` and
+:class:`SearchJobs` of the search view, on the offscreen Qt platform:
+
+- `cold`: a new engine and file cache, without the trigram index
+- `warm`: the same search again, reusing the per-file result cache
+- `indexed`: a new engine narrowed down by a built :class:`SearchIndex`
+
+The wall time ends once the last result is inserted in the model. The
+files and bytes per second are those of the whole workspace. The peak RSS
+sums the process and its search worker processes. It depends on the
+scenarios run before, so compare runs of the same scenarios. Every mode
+runs a few times and the fastest run is kept. The workspaces are kept in
+the work folder, so the files are in the page cache after the first run.
+
+Usage::
+
+    python -m benchmarks.search                  # every scenario, checked against the baseline
+    python -m benchmarks.search small dense      # some scenarios
+    python -m benchmarks.search --save           # stores the results as the baseline
+
+Exits with `1` if a metric got worse than the baseline by more than the
+tolerance, or if a search didn't find the expected number of matches. The
+baselines are stored per machine, keyed by :func:`machineKey`, since the
+times of a machine with other cores say nothing about this one. Without a
+baseline for the current machine, only the match counts are checked.
+"""
+
+from __future__ import annotations
+from typing import Any
+from pathlib import Path
+import argparse
+import platform
+import tempfile
+import json
+import time
+import sys
+import os
+import re
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import psutil
+from PyQt6.QtCore import QEventLoop, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from cipher.src.filecache import FileCache
+from cipher.src.search.index import SearchIndex
+from cipher.src.search.job import SearchJobs
+from cipher.src.search.model import SearchModel
+from .generate import WorkspaceSpec, generate
+
+SCENARIOS = {
+    "small": WorkspaceSpec(files=2000, depth=3, meanSize=4096),
+    "deep": WorkspaceSpec(files=5000, depth=8, fanout=3, meanSize=2048),
+    "dense": WorkspaceSpec(files=1000, meanSize=16384, density=4.0),
+    "sparse": WorkspaceSpec(files=20000, meanSize=4096, density=0.0005),
+    "large": WorkspaceSpec(files=50, meanSize=2 * 1024 * 1024, sizeSpread=0.3),
+    "binary": WorkspaceSpec(files=5000, binaryRatio=0.5),
+}
+MODES = ("cold", "warm", "indexed")
+# The metrics compared with the baseline. Lower is better
+CHECKED = ("wallTime", "timeToFirstResult", "peakRss")
+# The difference always allowed, so tiny values don't fail on noise
+SLACK = {"wallTime": 0.05, "timeToFirstResult": 0.05, "peakRss": 16.0}
+BASELINE = Path(__file__).parent / "baselines" / "search.json"
+# The seconds between two RSS samples
+SAMPLE_INTERVAL = 0.01
+
+
+def _rss(process: psutil.Process) -> int:
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+def measure(
+    model: SearchModel,
+    jobs: SearchJobs,
+    folder: Path,
+    needle: str,
+    workers: int,
+    index: SearchIndex | None = None,
+    cache: FileCache | None = None,
+) -> dict[str, Any]:
+    """Runs a search like :meth:`SearchView.search` and waits for every result"""
+    process = psutil.Process()
+    loop = QEventLoop()
+    state = {"finished": False, "first": None, "peak": _rss(process), "sampled": 0.0}
+
+    def rowsInserted(*_) -> None:
+        if state["first"] is None:
+            state["first"] = time.perf_counter()
+
+    def finished(*_) -> None:
+        state["finished"] = True
+
+    def poll() -> None:
+        now = time.perf_counter()
+        if now - state["sampled"] >= SAMPLE_INTERVAL:
+            state["peak"] = max(state["peak"], _rss(process))
+            state["sampled"] = now
+        if state["finished"] and not model.isAppending:
+            loop.quit()
+
+    timer = QTimer()
+    timer.setInterval(1)
+    timer.timeout.connect(poll)
+    model.rowsInserted.connect(rowsInserted)
+    jobs.finished.connect(finished)
+    model.reset(folder, {}, needle, re.IGNORECASE, {})
+    model.engine.setWorkers(workers)
+    start = time.perf_counter()
+    jobs.start(folder, needle, False, [], [], index, {}, {}, cache)
+    timer.start()
+    loop.exec()
+    end = time.perf_counter()
+    timer.stop()
+    model.rowsInserted.disconnect(rowsInserted)
+    jobs.finished.disconnect(finished)
+    state["peak"] = max(state["peak"], _rss(process))
+    return {
+        "wallTime": end - start,
+        "timeToFirstResult": state["first"] - start if state["first"] else None,
+        "peakRss": state["peak"] / 1024**2,
+        "files": model.fileCount,
+        "matches": model.matchCount,
+    }
+
+
+def _searchers(parent: QObject) -> tuple[SearchModel, SearchJobs, FileCache]:
+    model = SearchModel(parent, None)
+    jobs = SearchJobs(parent, model.engine)
+    jobs.found.connect(model.addResults)
+    return model, jobs, FileCache()
+
+
+def runScenario(
+    name: str, spec: WorkspaceSpec, workdir: Path, workers: int, repeat: int = 3
+) -> dict[str, dict[str, Any]]:
+    """Generates the workspace of a scenario if needed and runs every mode
+
+    Every mode runs `repeat` times with new searchers and the fastest run is kept
+    """
+    folder = workdir / spec.key
+    statsPath = workdir / f"{spec.key}.json"
+    if statsPath.exists():
+        stats = json.loads(statsPath.read_text())
+    else:
+        print(f"Generating {name} in {folder}", file=sys.stderr)
+        stats = generate(folder, spec)
+        statsPath.write_text(json.dumps(stats))
+
+    parent = QObject()
+    index = SearchIndex(folder)
+    index.clear()
+    index.refresh()
+    runs: dict[str, list[dict[str, Any]]] = {mode: [] for mode in MODES}
+    needle = spec.needle
+    for _ in range(max(1, repeat)):
+        model, jobs, cache = _searchers(parent)
+        runs["cold"].append(measure(model, jobs, folder, needle, workers, None, cache))
+        runs["warm"].append(measure(model, jobs, folder, needle, workers, None, cache))
+        model.engine.shutdown()
+        model, jobs, cache = _searchers(parent)
+        runs["indexed"].append(
+            measure(model, jobs, folder, needle, workers, index, cache)
+        )
+        model.engine.shutdown()
+    parent.deleteLater()
+
+    results = {}
+    for mode in MODES:
+        results[mode] = result = min(runs[mode], key=lambda run: run["wallTime"])
+        wallTime = result["wallTime"]
+        result["filesPerSecond"] = stats["files"] / wallTime
+        result["mbPerSecond"] = stats["bytes"] / 1024**2 / wallTime
+        result["expectedMatches"] = stats["matches"]
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """The metrics of `results` worse than `baseline` by more than the tolerance"""
+    regressions = []
+    for key, result in results.items():
+        if (previous := baseline.get(key)) is None:
+            continue
+        for metric in CHECKED:
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) + SLACK[metric]:
+                regressions.append(f"{key} {metric}: {old:.3f} -> {new:.3f}")
+    return regressions
+
+
+def _machine() -> dict[str, Any]:
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def machineKey(machine: dict[str, Any]) -> str:
+    """The key of the baseline measured on a machine like `machine`
+
+    The times depend on the cores and the interpreter much more than on the
+    exact kernel or patch release, so only those are part of the key.
+    """
+    system = machine["platform"].split("-", 1)[0]
+    python = ".".join(machine["python"].split(".")[:2])
+    return f"{system}-{machine['machine']}-{machine['cpus']}cpu-py{python}"
+
+
+def _format(key: str, result: dict[str, Any]) -> str:
+    first = result["timeToFirstResult"]
+    return (
+        f"{key:<18} {result['wallTime'] * 1000:>9.1f} "
+        f"{first * 1000 if first is not None else float('nan'):>9.1f} "
+        f"{result['filesPerSecond']:>10.0f} {result['mbPerSecond']:>8.1f} "
+        f"{result['peakRss']:>8.1f} {result['matches']:>8}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.search", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("scenarios", nargs="*", help=", ".join(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=0, help="0 uses every core")
+    parser.add_argument("--workdir", type=Path, help="where the workspaces are kept")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode")
+    parser.add_argument("--tolerance", type=float, default=0.4)
+    parser.add_argument("--output", type=Path, help="also write the results there")
+    args = parser.parse_args(argv)
+    if unknown := set(args.scenarios).difference(SCENARIOS):
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or Path(tempfile.gettempdir(), "cipher-benchmarks")
+    workdir.mkdir(parents=True, exist_ok=True)
+    app = QApplication.instance() or QApplication([])
+
+    print(
+        f"{'scenario/mode':<18} {'wall ms':>9} {'first ms':>9} "
+        f"{'files/s':>10} {'MB/s':>8} {'RSS MB':>8} {'matches':>8}"
+    )
+    results, failures = {}, []
+    for name in args.scenarios or SCENARIOS:
+        scenario = runScenario(
+            name, SCENARIOS[name], workdir, args.workers, args.repeat
+        )
+        for mode, result in scenario.items():
+            key = f"{name}/{mode}"
+            results[key] = result
+            print(_format(key, result))
+            if result["matches"] != result["expectedMatches"]:
+                failures.append(
+                    f"{key} found {result['matches']} matches instead of "
+                    f"{result['expectedMatches']}"
+                )
+    data = {"machine": _machine(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=4))
+
+    machines = {}
+    if args.baseline.exists():
+        machines = json.loads(args.baseline.read_text())["machines"]
+    key = machineKey(data["machine"])
+    if args.save:
+        previous = machines.get(key, {}).get("results", {})
+        machines[key] = {**data, "results": {**previous, **results}}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"machines": machines}, indent=4) + "\n")
+        print(f"Saved the baseline of {key} to {args.baseline}")
+    elif (baseline := machines.get(key)) is not None:
+        failures.extend(compare(results, baseline["results"], args.tolerance))
+    else:
+        print(
+            f"No baseline for {key}, only the match counts were checked. "
+            "Store one with --save",
+            file=sys.stderr,
+        )
+    app.quit()
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
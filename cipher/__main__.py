@@ -1,5 +1,7 @@
+from multiprocessing import freeze_support
 from cipher.core import BaseApplication
 
 
 if __name__ == "__main__":
+    freeze_support()
     BaseApplication.getApplication().exec()
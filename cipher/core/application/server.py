@@ -15,7 +15,7 @@ from PyQt6.QtNetwork import QHostAddress
 from PyQt6.QtWebSockets import QWebSocketServer
 from PyQt6.QtWidgets import QMessageBox
 
-from cipher.src import Window
+from cipher.src import Keymap, Theme, Window
 from .base import BaseApplication
 
 
@@ -109,9 +109,9 @@ class ServerApplication(BaseApplication):
             lambda: self.setStyleSheet(open(styles).read())
         )
         self.setStyleSheet(open(styles).read())
-        self._shortcut = QFileSystemWatcher(
-            [os.path.join(self.localAppData, "shortcuts.json")], self
-        )
+        self._keymap = Keymap(os.path.join(self.localAppData, "shortcuts.json"), self)
+        self._shortcut = self._keymap.watcher
+        self._theme = Theme(self.localAppData, self)
 
         self._windows: list[Window] = []
         sys.stdout = sys.stderr = Stdout(self)
@@ -5,6 +5,13 @@ from .sidebar import *
 from .filemanager import *
 from .extensionlist import *
 from .search import *
+from .quickopen import *
+from .symbols import *
+from .completion import *
 from .tabview import *
 from .thread import *
+from .ignore import *
+from .filecache import *
+from .theme import *
+from .keymap import *
 from .logs import *
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.Qsci import QsciAbstractAPIs, QsciLexer
+
+from .index import *
+from ..tabview import Editor
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+    from cipher import Tab
+
+__all__ = ("Completions", "WordAPIs", "WordIndex", "WorkspaceWords", "scanWords")
+
+
+def scanBuffers(index: WordIndex, texts: dict[int, bytes]) -> None:
+    """Replaces the words of the editors. Meant to be run in a :class:`Thread`"""
+    index.setSources({key: scanWords(text) for key, text in texts.items()})
+
+
+class WordAPIs(QsciAbstractAPIs):
+    """Completes the word before the caret with the words of a :class:`Completions`
+
+    Parameters
+    ----------
+    lexer: :class:`QsciLexer`
+        The lexer completed
+    completions: :class:`Completions`
+        The words of the window
+    """
+
+    def __init__(self, lexer: QsciLexer, completions: Completions) -> None:
+        super().__init__(lexer)
+        self._completions = completions
+
+    def updateAutoCompletionList(
+        self, context: list[str], found: list[str]
+    ) -> list[str]:
+        if not context or not (prefix := context[-1]):
+            return found
+        words = self._completions.complete(prefix)
+        return found + [word for word in words if word != prefix]
+
+    def callTips(self, *_) -> list[str]:
+        return []
+
+
+class Completions(QObject):
+    """The words completed by the editors of a window
+
+    The identifiers of the open editors and of the files of the workspace are
+    kept in two :class:`WordIndex`, filled in the background: the workspace
+    when it changes and a file when it's saved, the editors at most once per
+    `BUFFER_DELAY` while they're edited. A completion is a bisection in each
+    index, so it takes the same time however many words they hold.
+
+    At most `LIMIT` words are offered. When more words start with the typed
+    word, the list is asked again at every typed character.
+
+    Parameters
+    ----------
+    window: :class:`Window`
+        The window
+    """
+
+    LIMIT = 200
+    BUFFER_DELAY = 1000
+
+    def __init__(self, window: Window) -> None:
+        super().__init__(window)
+        self._window = window
+        self._workspace: WorkspaceWords | None = None
+        self._buffers = WordIndex()
+        self._dirty: set[Editor] = set()
+        self._scanning = False
+        self._truncated = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.BUFFER_DELAY)
+        self._timer.timeout.connect(self._scanBuffers)
+
+        window.fileManager.workspaceChanged.connect(self.setWorkspace)
+        window.fileManager.fileSaved.connect(self.updateWorkspace)
+        window.tabView.tabOpened.connect(self._tabOpened)
+        window.tabView.tabClosed.connect(self._tabClosed)
+
+    def createAPIs(self, lexer: QsciLexer) -> WordAPIs:
+        """Makes the lexer complete the words of the window"""
+        return WordAPIs(lexer, self)
+
+    def track(self, editor: Editor) -> None:
+        """Keeps the words of an editor up to date while it's open"""
+        editor.textChanged.connect(lambda: self._changed(editor))
+        editor.loaded.connect(lambda ok: ok and self._changed(editor))
+        editor.SCN_CHARADDED.connect(lambda char: self._charAdded(editor, char))
+
+    def complete(self, prefix: str) -> list[str]:
+        """The words starting with a prefix, whatever their case
+
+        Returns
+        -------
+        list[str]
+            At most `LIMIT` words of the editors and the workspace
+        """
+        words, self._truncated = self._buffers.complete(prefix, self.LIMIT)
+        if self._workspace is not None:
+            more, truncated = self._workspace.complete(prefix, self.LIMIT)
+            words = sorted(set(words).union(more), key=str.lower)
+            self._truncated |= truncated or len(words) > self.LIMIT
+        return words[: self.LIMIT]
+
+    def setWorkspace(self, folder: Path | None) -> None:
+        """Scans the words of the new workspace in the background"""
+        self._workspace = None
+        if folder is None:
+            return
+        suffixes = self._window.theme.languages
+        self._workspace = WorkspaceWords(folder, suffixes, self._window.fileCache)
+        Thread(self, self._workspace.build).start()
+
+    def updateWorkspace(self, tab: Tab) -> None:
+        if self._workspace is not None:
+            Thread(self, self._workspace.update, tab.path).start()
+
+    def _tabOpened(self, tab: Tab) -> None:
+        if isinstance(tab, Editor):
+            self._changed(tab)
+
+    def _tabClosed(self, tab: Tab) -> None:
+        self._dirty.discard(tab)
+        self._buffers.remove(id(tab))
+
+    def _changed(self, editor: Editor) -> None:
+        self._dirty.add(editor)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _scanBuffers(self) -> None:
+        """Copies the text of the changed editors and scans it in the background"""
+        if self._scanning:
+            return self._timer.start()
+        tabs = self._window.tabView.tabList
+        texts, editors = {}, {}
+        for editor in self._dirty:
+            if editor.isLoading or editor not in tabs:
+                continue
+            length = editor.length()
+            # Copying and scanning a large text would hold the GIL too long
+            if length > WorkspaceWords.MAX_SIZE:
+                texts[id(editor)] = b""
+            else:
+                texts[id(editor)] = editor.bytes(0, length).data()[:length]
+            editors[id(editor)] = editor
+        self._dirty.clear()
+        if not texts:
+            return
+        self._scanning = True
+        thread = Thread(self, scanBuffers, self._buffers, texts)
+        thread.finished.connect(lambda _: self._scanned(editors))
+        thread.start()
+
+    def _scanned(self, editors: dict[int, Editor]) -> None:
+        self._scanning = False
+        tabs = self._window.tabView.tabList
+        # Closed while scanning
+        closed = {key: () for key, editor in editors.items() if editor not in tabs}
+        if closed:
+            self._buffers.setSources(closed)
+
+    def _charAdded(self, editor: Editor, char: int) -> None:
+        # The list only holds the first words, so the next ones are looked up again
+        if self._truncated and editor.isListActive() and (
+            chr(char).isalnum() or chr(char) == "_"
+        ):
+            editor.cancelList()
+            editor.autoCompleteFromAPIs()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Hashable, Iterable
+from bisect import bisect_left, insort
+from pathlib import Path
+import threading
+import re
+import os
+
+from ..filecache import HEAD_SIZE, detect
+from ..ignore import IgnoreRules
+
+if TYPE_CHECKING:
+    from ..filecache import FileCache
+
+__all__ = ("WordIndex", "WorkspaceWords", "scanWords")
+
+# Identifiers of at least 3 ascii characters. Shorter words are quicker to type
+WORD = re.compile(rb"(?<!\w)[A-Za-z_]\w{2,63}(?!\w)")
+
+
+def scanWords(data: bytes) -> frozenset[str]:
+    """The identifiers of a text. Meant to be run in a :class:`Thread`"""
+    return frozenset(word.decode("ascii") for word in set(WORD.findall(data)))
+
+
+class WordIndex:
+    """The words of several sources, sorted for prefix lookups
+
+    Every source, like a file or an editor, holds a set of words. A word is
+    counted once per source holding it, and is part of the index while its
+    count isn't 0. The words are kept in a list sorted by their lowercased
+    form, so the words starting with a prefix are a slice found by bisection.
+
+    Changing the words of a source only inserts and removes the words whose
+    count went from or to 0. The list is sorted again, outside of the lock,
+    when too many of them changed at once.
+    """
+
+    # The number of added and removed words past which the list is sorted again
+    REBUILD_SIZE = 256
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._sources: dict[Hashable, frozenset[str]] = {}
+        self._counts: dict[str, int] = {}
+        # The lowercased word, a NUL, then the word
+        self._entries: list[str] = []
+        # Incremented every time the words change
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def setWords(self, source: Hashable, words: Iterable[str]) -> None:
+        """Replaces the words of a source"""
+        self.setSources({source: words})
+
+    def setSources(self, changes: dict[Hashable, Iterable[str]]) -> None:
+        """Replaces the words of several sources at once"""
+        with self._lock:
+            counts = self._counts
+            # Whether every word whose count changed was in the index before
+            touched: dict[str, bool] = {}
+            for source, words in changes.items():
+                words = frozenset(words)
+                old = self._sources.pop(source, frozenset())
+                if words:
+                    self._sources[source] = words
+                for word in words - old:
+                    touched.setdefault(word, word in counts)
+                    counts[word] = counts.get(word, 0) + 1
+                for word in old - words:
+                    touched.setdefault(word, True)
+                    if counts[word] == 1:
+                        del counts[word]
+                    else:
+                        counts[word] -= 1
+            added, removed = [], []
+            for word, was in touched.items():
+                if was != (word in counts):
+                    (removed if was else added).append(word)
+            if not added and not removed:
+                return
+            self._version += 1
+            if len(added) + len(removed) <= self.REBUILD_SIZE:
+                entries = self._entries
+                for word in removed:
+                    del entries[bisect_left(entries, _entry(word))]
+                for word in added:
+                    insort(entries, _entry(word))
+                return
+            version, words = self._version, list(counts)
+        self._rebuild(version, words)
+
+    def remove(self, source: Hashable) -> None:
+        """Drops the words of a source"""
+        self.setWords(source, ())
+
+    def complete(self, prefix: str, limit: int) -> tuple[list[str], bool]:
+        """The words starting with a prefix, whatever their case
+
+        Returns
+        -------
+        tuple[list[str], bool]
+            At most `limit` words sorted by their lowercased form, and whether
+            more words start with the prefix
+        """
+        key = prefix.lower()
+        with self._lock:
+            entries = self._entries
+            start = bisect_left(entries, key)
+            end = bisect_left(entries, f"{key}\U0010ffff", start)
+            found = entries[start : min(end, start + limit)]
+        return [entry.partition("\0")[2] for entry in found], end - start > limit
+
+    def _rebuild(self, version: int, words: list[str]) -> None:
+        """Sorts the words without blocking the lookups"""
+        while True:
+            entries = sorted(map(_entry, words))
+            with self._lock:
+                # Changed while sorting
+                if version != self._version:
+                    version, words = self._version, list(self._counts)
+                    continue
+                self._entries = entries
+                return
+
+
+def _entry(word: str) -> str:
+    return f"{word.lower()}\0{word}"
+
+
+class WorkspaceWords(WordIndex):
+    """The words of the files of a workspace
+
+    The files whose suffix has a language are scanned, if they aren't binary
+    or larger than `MAX_SIZE`. A file is only scanned again once its mtime or
+    size changes. The files ignored by the `.gitignore` and `.ignore` files
+    are left out.
+
+    Parameters
+    ----------
+    folder: `Path`
+        The workspace folder
+    suffixes: `Iterable[str]`
+        The suffixes of the files to scan
+    cache: `Optional[FileCache]`
+        Filled with the info of every file read while indexing
+    """
+
+    MAX_SIZE = 1024 * 1024
+    BATCH_SIZE = 256
+
+    def __init__(
+        self, folder: Path, suffixes: Iterable[str], cache: FileCache | None = None
+    ) -> None:
+        super().__init__()
+        self.folder = folder
+        self.cache = cache
+        self._suffixes = frozenset(suffixes)
+        self._files: dict[str, tuple[int, int]] = {}
+        self._refreshing = threading.Lock()
+
+    def build(self) -> None:
+        """Scans new and changed files and drops removed ones. Meant to be run in a :class:`Thread`
+
+        The words are added every `BATCH_SIZE` files, so they can be completed
+        before the whole workspace is scanned.
+        """
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            seen, changes = set(), {}
+            for entry in IgnoreRules(self.folder).walk():
+                if os.path.splitext(entry.name)[1] not in self._suffixes:
+                    continue
+                seen.add(entry.path)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self._files.get(entry.path) != (stat.st_mtime_ns, stat.st_size):
+                    changes[entry.path] = self._read(entry.path, stat)
+                if len(changes) >= self.BATCH_SIZE:
+                    self.setSources(changes)
+                    changes = {}
+            for path in set(self._files).difference(seen):
+                self._files.pop(path)
+                changes[path] = ()
+            self.setSources(changes)
+        finally:
+            self._refreshing.release()
+
+    def update(self, path: Path) -> None:
+        """Scans a single file again. Used when a file is saved"""
+        if not Path(path).is_relative_to(self.folder):
+            return
+        path = str(path)
+        if os.path.splitext(path)[1] not in self._suffixes:
+            return
+        if IgnoreRules(self.folder).isIgnored(path, False):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return self.remove(path)
+        self.setWords(path, self._read(path, stat))
+
+    def _read(self, path: str, stat: os.stat_result) -> frozenset[str]:
+        """The words of a file. Removed files have none"""
+        if stat.st_size > self.MAX_SIZE:
+            self._files[path] = (stat.st_mtime_ns, stat.st_size)
+            return frozenset()
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self._files.pop(path, None)
+            return frozenset()
+        self._files[path] = (stat.st_mtime_ns, stat.st_size)
+        if self.cache is not None:
+            self.cache.record(path, stat, data)
+        if detect(data[:HEAD_SIZE])[0]:
+            return frozenset()
+        return scanWords(data)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+from typing import NamedTuple
+from codecs import BOM_UTF8
+from pathlib import Path
+import threading
+import stat as st
+import os
+
+__all__ = ("FileCache", "FileInfo", "detect")
+
+HEAD_SIZE = 1024
+
+
+def detect(head: bytes) -> tuple[bool, str]:
+    """Guesses the kind of a file from its first bytes
+
+    Returns
+    -------
+    tuple[bool, str]
+        Whether the file is binary and the guessed encoding
+    """
+    if b"\0" in head:
+        return True, ""
+    if head.startswith(BOM_UTF8):
+        return False, "utf-8-sig"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The head can end in the middle of a character
+        if e.start < len(head) - 3 or e.reason != "unexpected end of data":
+            return False, "latin-1"
+    return False, "utf-8"
+
+
+class FileInfo(NamedTuple):
+    """What is known about a file without reading all of it
+
+    Attributes
+    ----------
+    mtime: `int`
+        The modification time in nanoseconds
+    size: `int`
+        The size in bytes
+    isBinary: `bool`
+        Whether the file holds a NUL byte in its first kilobyte
+    encoding: `str`
+        The guessed encoding. Empty for binary files
+    lineCount: `Optional[int]`
+        The number of lines. `None` until the whole file was read once
+    """
+
+    mtime: int
+    size: int
+    isBinary: bool
+    encoding: str
+    lineCount: int | None
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.mtime == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class FileCache:
+    """The metadata of the workspace files, shared by the search and symbol indexes
+
+    The head of a file is read once, then the :class:`FileInfo` is kept and
+    checked against the mtime and size of a fresh stat on every lookup. So a
+    lookup costs a stat instead of an open and a read, and a file changed by
+    any program is never seen as it was. Nothing is watched, since a watch per
+    folder would use up the inotify watches of a large workspace, and nothing
+    needs to be dropped when a file changes. Can be used from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._files: dict[str, FileInfo] = {}
+        # The cached files of every folder, to drop a folder at once
+        self._folders: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: str | Path) -> bool:
+        return os.fspath(path) in self._files
+
+    def peek(self, path: str | Path, stat: os.stat_result) -> FileInfo | None:
+        """The cached info of a file, checked against a stat the caller already has
+
+        Returns `None` if the file isn't cached or `stat` shows it changed.
+        """
+        info = self._files.get(os.fspath(path))
+        if info is not None and not info.matches(stat):
+            return None
+        return info
+
+    def info(
+        self, path: str | Path, stat: os.stat_result | None = None
+    ) -> FileInfo | None:
+        """The info of a file. Reads the head of the file if it isn't cached
+
+        Parameters
+        ----------
+        path: `str | Path`
+            The path of the file
+        stat: `Optional[os.stat_result]`
+            The stat of the file if the caller has it. Stat'ed otherwise, to
+            check the cached info
+
+        Returns
+        -------
+        Optional[FileInfo]
+            `None` if the path isn't a readable file
+        """
+        path = os.fspath(path)
+        try:
+            if stat is None:
+                stat = os.stat(path)
+            if (info := self.peek(path, stat)) is not None:
+                return info
+            if not st.S_ISREG(stat.st_mode):
+                return None
+            with open(path, "rb") as f:
+                head = f.read(HEAD_SIZE)
+        except OSError:
+            self.invalidate(path)
+            return None
+        isBinary, encoding = detect(head)
+        lineCount = None
+        if not isBinary and stat.st_size <= HEAD_SIZE:
+            lineCount = head.count(b"\n")
+        return self._store(
+            path,
+            FileInfo(stat.st_mtime_ns, stat.st_size, isBinary, encoding, lineCount),
+        )
+
+    def isBinary(self, path: str | Path) -> bool:
+        """Whether a file is binary. Unreadable files count as binary"""
+        info = self.info(path)
+        return info is None or info.isBinary
+
+    def record(self, path: str | Path, stat: os.stat_result, data: bytes) -> FileInfo:
+        """Stores the info of a file the caller read in full. Counts its lines"""
+        isBinary, encoding = detect(data[:HEAD_SIZE])
+        lineCount = None if isBinary else data.count(b"\n")
+        return self._store(
+            os.fspath(path),
+            FileInfo(stat.st_mtime_ns, stat.st_size, isBinary, encoding, lineCount),
+        )
+
+    def invalidate(self, path: str | Path) -> None:
+        """Drops a file, or every file under a folder"""
+        path = os.fspath(path)
+        with self._lock:
+            if self._files.pop(path, None) is not None:
+                self._folders.get(os.path.dirname(path), set()).discard(path)
+                return
+            prefix = os.path.join(path, "")
+            folders = [
+                folder
+                for folder in self._folders
+                if folder == path or folder.startswith(prefix)
+            ]
+            for folder in folders:
+                for file in self._folders.pop(folder):
+                    self._files.pop(file, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._folders.clear()
+
+    def _store(self, path: str, info: FileInfo) -> FileInfo:
+        folder = os.path.dirname(path)
+        with self._lock:
+            self._files[path] = info
+            self._folders.setdefault(folder, set()).add(path)
+        return info
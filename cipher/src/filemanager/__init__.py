@@ -21,6 +21,8 @@ class FileManager(QFrame):
     folderCreated = pyqtSignal(Path)
     fileCreated = pyqtSignal(Path)
     fileSaved = pyqtSignal(Tab)
+    fileRenamed = pyqtSignal(Path, Path)
+    fileRemoved = pyqtSignal(Path)
 
     def __init__(self, window: Window) -> None:
         super().__init__(window)
@@ -143,10 +145,7 @@ class FileManager(QFrame):
             if not filePath:
                 return
 
-        path = Path(filePath).absolute()
-        if not path.is_file():
-            return
-        self.window.tabView.createTab(path)
+        self.window.tabView.createTab(Path(filePath).absolute())
 
     def openFilePath(self) -> None:
         """Opens a file with a given file path"""
@@ -177,6 +176,7 @@ class FileManager(QFrame):
             self._workspaceSettings.addPath(
                 os.path.join(path, ".cipher", "settings.cipher")
             )
+        self.workspaceChanged.emit(path)
 
     def closeFolder(self) -> None:
         if not self.currentFolder:
@@ -185,6 +185,7 @@ class FileManager(QFrame):
         self.window.tabView.closeTabs()
         self.treeView.setFolder(None)
         self.clearTreeViews()
+        self.workspaceChanged.emit(None)
 
     def updateSettings(self) -> None:
         window = self.window
@@ -205,6 +206,12 @@ class FileManager(QFrame):
         window.settings["search-exclude"] = workspaceSettings.get(
             "search-exclude", globalSettings.get("search-exclude", [])
         )
+        window.settings["search-workers"] = workspaceSettings.get(
+            "search-workers", globalSettings.get("search-workers", 0)
+        )
+        window.settings["large-file-size"] = workspaceSettings.get(
+            "large-file-size", globalSettings.get("large-file-size", 64)
+        )
         for treeview in self._treeViews:
             treeview.updateSettings()
 
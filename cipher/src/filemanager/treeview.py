@@ -4,7 +4,7 @@ from pathlib import Path
 import subprocess
 import os
 
-from PyQt6.QtCore import QDir, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtCore import QDir, QModelIndex, QPersistentModelIndex, Qt, pyqtSignal
 from PyQt6.QtGui import QKeyEvent, QMouseEvent
 from PyQt6.QtWidgets import (
     QInputDialog,
@@ -16,6 +16,7 @@ from PyQt6.QtWidgets import (
 )
 
 from .model import FileSystemModel
+from ..ignore import IgnoreRules
 from ..tabview import Tab
 
 if TYPE_CHECKING:
@@ -24,6 +25,22 @@ if TYPE_CHECKING:
 __all__ = ("TreeView",)
 
 
+def _hiddenPatterns(paths: list[str]) -> list[str]:
+    """The `hiddenPaths` as ignore patterns
+
+    A plain path is relative to the workspace, like it always was, so it's
+    anchored with a leading `/` instead of matching the name at any depth.
+    Entries holding a `*`, a `?` or a `[` are globs and stay as they are.
+    """
+    patterns = []
+    for path in paths:
+        path = path.replace(os.sep, "/")
+        if not any(char in path for char in "*?[") and not path.startswith("/"):
+            path = f"/{path}"
+        patterns.append(path)
+    return patterns
+
+
 class TreeView(QTreeView):
     """The tree view of files and folders
 
@@ -40,17 +57,25 @@ class TreeView(QTreeView):
         A signal emitted when the file is created
     fileSaved: :class:`pyqtSignal`
         A signal emitted when a file is saved
+    fileRenamed: :class:`pyqtSignal`
+        A signal emitted with the old and new path when a file or folder is renamed
+    fileRemoved: :class:`pyqtSignal`
+        A signal emitted when a file or folder is deleted
     """
 
     folderCreated = pyqtSignal(Path)
     fileCreated = pyqtSignal(Path)
     fileSaved = pyqtSignal(Tab)
+    fileRenamed = pyqtSignal(Path, Path)
+    fileRemoved = pyqtSignal(Path)
 
     def __init__(self, parent) -> None:
         super().__init__(parent)
         self.setObjectName("FileManager")
         systemModel = FileSystemModel(self)
-        self._hiddenPaths = []
+        self._hiddenRules: IgnoreRules | None = None
+        self._hiddenRows: list[QPersistentModelIndex] = []
+        systemModel.rowsInserted.connect(self._hideRows)
         self._createContextMenu()
 
         self.setModel(systemModel)
@@ -73,8 +98,9 @@ class TreeView(QTreeView):
         self.setColumnHidden(3, True)
 
         self.fileCreated.connect(parent.fileCreated.emit)
-        self.folderCreated.connect(parent.fileCreated.emit)
-        self.fileCreated.connect(parent.fileCreated.emit)
+        self.folderCreated.connect(parent.folderCreated.emit)
+        self.fileRenamed.connect(parent.fileRenamed.emit)
+        self.fileRemoved.connect(parent.fileRemoved.emit)
 
     @property
     def window(self) -> Window:
@@ -130,7 +156,7 @@ class TreeView(QTreeView):
 
         """
         path = Path(self.filePath(index))
-        if path.is_dir():
+        if self.systemModel.isDir(index):
             if not self.isExpanded(index):
                 return self.expand(index)
             return self.collapse(index)
@@ -232,7 +258,7 @@ class TreeView(QTreeView):
         model = self.systemModel
         if not model.isDir(index):
             index = index.parent()
-        model.createFolder(index, name)
+        self.folderCreated.emit(model.createFolder(index, name))
 
     def rename(self) -> None:
         """Renames a folder or file"""
@@ -253,6 +279,7 @@ class TreeView(QTreeView):
                 counter += 1
                 name = f"{names[0]} ({counter}).{'.'.join(names[1:])}"
         window = self.window
+        self.fileRenamed.emit(path, newPath)
         if newPath.is_file():
             for editor in window.tabView:
                 if editor.path == path:
@@ -280,6 +307,7 @@ class TreeView(QTreeView):
         path = self.filePath(index)
         if model.isDir(index):
             if QDir(path).removeRecursively():
+                self.fileRemoved.emit(Path(path))
                 for editor in self.window.tabView:
                     if editor.path.is_relative_to(path):
                         self.window.tabView.removeTab(editor)
@@ -290,6 +318,7 @@ class TreeView(QTreeView):
                 dialog.exec()
         else:
             if model.remove(index):
+                self.fileRemoved.emit(Path(path))
                 for editor in self.window.tabView:
                     if editor.path.is_relative_to(path):
                         self.window.tabView.removeTab(editor)
@@ -301,38 +330,51 @@ class TreeView(QTreeView):
             dialog.exec()
 
     def setFolder(self, path: Path | None) -> None:
-        for hiddenPath in self._hiddenPaths:
-            index = self.systemModel.index(hiddenPath)
-            if self.isRowHidden(index.row(), index.parent()):
-                self.setRowHidden(index.row(), index.parent(), False)
-        self._hiddenPaths.clear()
+        self._hiddenRules = None
+        self._showRows()
         self.setRootIndex(self.systemModel.setRootPath(path))
 
     def updateSettings(self) -> None:
         window = self.window
         model = self.systemModel
         showHidden = window.settings["showHidden"]
-        toHide = set(window.settings["hiddenPaths"]).difference(self._hiddenPaths)
-        toUnhide = set(self._hiddenPaths).difference(window.settings["hiddenPaths"])
-        self._hiddenPaths.extend(toHide)
-        rootPath = model.rootPath()
-        for path in toUnhide:
-            index = model.index(os.path.join(rootPath, path))
-            self.setRowHidden(index.row(), index.parent(), False)
-            self._hiddenPaths.remove(path)
-        for path in self._hiddenPaths:
-            index = model.index(os.path.join(rootPath, path))
-            if not self.isRowHidden(index.row(), index.parent()):
-                self.setRowHidden(index.row(), index.parent(), True)
-        if showHidden:
-            for path in self._hiddenPaths:
-                index = model.index(os.path.join(rootPath, path))
-                self.setRowHidden(index.row(), index.parent(), False)
+        self._hiddenRules = None
+        self._showRows()
+        if self.currentFolder and window.settings["hiddenPaths"] and not showHidden:
+            self._hiddenRules = IgnoreRules(
+                self.currentFolder,
+                _hiddenPatterns(window.settings["hiddenPaths"]),
+                gitignore=False,
+            )
+            self._hideRows(model.modelIndex, 0, model.rowCount(model.modelIndex) - 1)
         filters = QDir.Filter.NoDotAndDotDot | QDir.Filter.AllDirs | QDir.Filter.Files
         if showHidden:
             filters = filters | QDir.Filter.Hidden
         self.setFilter(filters)
 
+    def _showRows(self) -> None:
+        for index in self._hiddenRows:
+            if index.isValid():
+                self.setRowHidden(index.row(), index.parent(), False)
+        self._hiddenRows.clear()
+
+    def _hideRows(self, parent: QModelIndex, first: int, last: int) -> None:
+        """Hides the loaded rows matching `hiddenPaths`. Also called for new rows."""
+        if (rules := self._hiddenRules) is None:
+            return
+        model = self.systemModel
+        for row in range(first, last + 1):
+            index = model.index(row, 0, parent)
+            relative = rules.relativePath(model.filePath(index))
+            if relative.startswith(".."):
+                continue
+            isDir = model.isDir(index)
+            if rules.matches(relative, isDir):
+                self.setRowHidden(row, parent, True)
+                self._hiddenRows.append(QPersistentModelIndex(index))
+            elif isDir and (rows := model.rowCount(index)):
+                self._hideRows(index, 0, rows - 1)
+
     def copyPath(self) -> None:
         """Copies the path of an index"""
         cb = self.window.clipboard
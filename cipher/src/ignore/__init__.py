@@ -0,0 +1,257 @@
+from __future__ import annotations
+from typing import Iterable, Iterator
+from pathlib import Path
+import threading
+import os
+import re
+
+__all__ = ("IgnoreRules", "translate")
+
+
+def translate(pattern: str, base: str = "") -> tuple[str, bool] | None:
+    """Translates a gitignore pattern into a regex matching relative paths
+
+    Directories are matched with a trailing `/` so patterns ending with `/`
+    only match directories.
+
+    Parameters
+    ----------
+    pattern: `str`
+        The gitignore pattern
+    base: `str`
+        The folder of the ignore file, relative to the workspace
+
+    Returns
+    -------
+    Optional[tuple[str, bool]]
+        The regex and whether the pattern is negated.
+        `None` if the line is blank or a comment.
+    """
+    pattern = pattern.rstrip("\n\r")
+    while pattern.endswith(" ") and not pattern.endswith("\\ "):
+        pattern = pattern[:-1]
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate or pattern.startswith("\\!") or pattern.startswith("\\#"):
+        pattern = pattern[1:]
+    directory = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts, i, n = [], 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+            if i + 2 == n:
+                parts.append(".*")
+                i += 2
+                continue
+            if pattern[i + 2] == "/":
+                parts.append("(?:.*/)?")
+                i += 3
+                continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and (end := pattern.find("]", i + 2)) > 0:
+            content = pattern[i + 1 : end].replace("\\", "\\\\")
+            if content[0] == "!":
+                content = "^" + content[1:]
+            parts.append(f"[{content}]")
+            i = end
+        elif char == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+
+    prefix = re.escape(f"{base}/") if base else ""
+    if not anchored:
+        prefix += "(?:.*/)?"
+    return f"{prefix}{''.join(parts)}{'/' if directory else '/?'}", negate
+
+
+class IgnoreRules:
+    """Decides which paths of a workspace are skipped
+
+    Reads the `.gitignore` and `.ignore` files of the workspace and adds
+    the excluded patterns of the settings. Every pattern is compiled into
+    a regex once and whole directories are pruned while walking, so the
+    files under an ignored directory are never listed.
+
+    The rules of a nested ignore file are loaded when its folder is first
+    walked or checked. Excluded patterns always win over a negated pattern
+    of an ignore file.
+
+    Parameters
+    ----------
+    folder: `Path`
+        The workspace folder
+    excludes: `Iterable[str]`
+        Patterns of the paths to skip. Uses the gitignore syntax.
+    includes: `Iterable[str]`
+        Patterns of the files to keep. Every file is kept if empty.
+        A plain suffix like `.py` matches the suffix of the file.
+    gitignore: `bool`
+        Whether the ignore files and the `.git` folder are used
+    """
+
+    IGNORE_FILES = (".gitignore", ".ignore")
+
+    def __init__(
+        self,
+        folder: Path,
+        excludes: Iterable[str] = (),
+        includes: Iterable[str] = (),
+        gitignore: bool = True,
+    ) -> None:
+        self.folder = Path(folder)
+        self._root = os.fspath(folder)
+        self._gitignore = gitignore
+        self._lock = threading.Lock()
+        self._loaded: set[str] = set()
+        self._rules: list[tuple[str, bool]] = []
+        self._compiled: list[tuple[re.Pattern, bool]] | None = []
+        self._excludes = self._compile(excludes)
+        self._includes = self._compile(
+            f"*{pattern}"
+            if pattern.startswith(".") and not any(char in pattern for char in "*?[/")
+            else pattern
+            for pattern in includes
+        )
+        if gitignore:
+            self._rules.append(("(?:.*/)?\\.git/", False))
+            self._load("")
+
+    @staticmethod
+    def _compile(patterns: Iterable[str]) -> re.Pattern | None:
+        rules = [rule[0] for rule in filter(None, map(translate, patterns))]
+        if not rules:
+            return None
+        return re.compile("|".join(f"(?:{rule})" for rule in rules), re.DOTALL)
+
+    def _load(self, relative: str) -> None:
+        """Loads the ignore files of a folder. `relative` uses `/` separators"""
+        if relative in self._loaded:
+            return
+        rules = []
+        folder = os.path.join(self._root, relative)
+        for name in self.IGNORE_FILES:
+            try:
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    lines = f.readlines()
+            except (OSError, UnicodeDecodeError):
+                continue
+            rules.extend(filter(None, (translate(line, relative) for line in lines)))
+        with self._lock:
+            if relative in self._loaded:
+                return
+            self._loaded.add(relative)
+            if rules:
+                self._rules.extend(rules)
+                self._compiled = None
+
+    def _runs(self) -> list[tuple[re.Pattern, bool]]:
+        """Joins consecutive rules of the same kind into one regex, last rule first"""
+        with self._lock:
+            if (compiled := self._compiled) is None:
+                compiled, runs = [], []
+                for rule, negate in self._rules:
+                    if runs and runs[-1][1] == negate:
+                        runs[-1][0].append(rule)
+                    else:
+                        runs.append(([rule], negate))
+                for rules, negate in reversed(runs):
+                    regex = "|".join(f"(?:{rule})" for rule in rules)
+                    compiled.append((re.compile(f"(?:{regex})$", re.DOTALL), negate))
+                self._compiled = compiled
+            return compiled
+
+    def relativePath(self, path: str | Path) -> str:
+        """The path relative to the workspace with `/` separators"""
+        relative = os.path.relpath(path, self._root)
+        return relative.replace(os.sep, "/") if os.sep != "/" else relative
+
+    def matches(self, relative: str, isDir: bool) -> bool:
+        """Whether a relative path is ignored. Its parents aren't checked.
+
+        Parameters
+        ----------
+        relative: `str`
+            The path relative to the workspace with `/` separators
+        isDir: `bool`
+            Whether the path is a folder
+        """
+        if isDir:
+            relative += "/"
+        if self._excludes is not None and self._excludes.fullmatch(relative):
+            return True
+        for regex, negate in self._runs():
+            if regex.fullmatch(relative):
+                if not negate:
+                    return True
+                break
+        if not isDir and self._includes is not None:
+            return not self._includes.fullmatch(relative)
+        return False
+
+    def isIgnored(self, path: str | Path, isDir: bool | None = None) -> bool:
+        """Whether a path, or one of its parents, is ignored
+
+        Parameters
+        ----------
+        path: `str | Path`
+            The path to check
+        isDir: `Optional[bool]`
+            Whether the path is a folder. Checked on disk if `None`.
+        """
+        relative = self.relativePath(path)
+        if relative == "." or relative.startswith("../"):
+            return False
+        if isDir is None:
+            isDir = os.path.isdir(path)
+        parts = relative.split("/")
+        parent = ""
+        for part in parts[:-1]:
+            if self._gitignore:
+                self._load(parent)
+            parent = f"{parent}/{part}" if parent else part
+            if self.matches(parent, True):
+                return True
+        if self._gitignore:
+            self._load(parent)
+        return self.matches(relative, isDir)
+
+    def walk(self, folder: str | Path | None = None) -> Iterator[os.DirEntry]:
+        """Yields the files that aren't ignored, sorted by name
+
+        Ignored folders are never opened. `folder` must not be ignored itself.
+        """
+        folder = os.fspath(folder) if folder is not None else self._root
+        relative = self.relativePath(folder)
+        relative = "" if relative == "." else relative
+        if self._gitignore:
+            self._load(relative)
+        try:
+            with os.scandir(folder) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            path = f"{relative}/{entry.name}" if relative else entry.name
+            try:
+                isDir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if self.matches(path, isDir):
+                continue
+            if isDir:
+                yield from self.walk(entry.path)
+            elif entry.is_file():
+                yield entry
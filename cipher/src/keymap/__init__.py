@@ -0,0 +1,100 @@
+from __future__ import annotations
+import json
+import os
+
+from PyQt6.Qsci import QsciCommand
+from PyQt6.QtCore import QFileSystemWatcher, QObject, pyqtSignal
+from PyQt6.QtGui import QKeySequence
+
+__all__ = ("Keymap",)
+
+
+def combinedKey(sequence: str) -> int:
+    """The key of a Scintilla command from a shortcut like `Ctrl+Shift+K`. 0 if empty"""
+    keySequence = QKeySequence.fromString(sequence)
+    if keySequence.isEmpty():
+        return 0
+    key = keySequence[0]
+    for i in range(1, keySequence.count()):
+        key |= keySequence[i]
+    return key.toCombined()
+
+
+class Keymap(QObject):
+    """The shortcuts of `shortcuts.json`, parsed once for every window and editor
+
+    The file is read and its key sequences parsed only when it changes. The
+    editors apply the compiled table of :attr:`editorKeys` when they get the
+    focus and their :attr:`version` is behind, so a change of the file doesn't
+    touch every opened tab.
+
+    Parameters
+    ----------
+    path: `str`
+        The path of `shortcuts.json`
+    parent: `Optional[QObject]`
+        The parent of the keymap
+
+    Attributes
+    ----------
+    watcher: :class:`QFileSystemWatcher`
+        Watches `shortcuts.json`
+    changed: :class:`pyqtSignal`
+        Emitted once the changed file was parsed again
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, path: str, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._path = path
+        self._version = 0
+        self._shortcuts: dict[str, str] = {}
+        self._sequences: dict[str, QKeySequence] = {}
+        self._editorKeys: dict[QsciCommand.Command, int] | None = None
+        self.watcher = QFileSystemWatcher([path], self)
+        self.watcher.fileChanged.connect(self.reload)
+        self.reload()
+
+    @property
+    def version(self) -> int:
+        """Incremented every time the file is parsed"""
+        return self._version
+
+    @property
+    def shortcuts(self) -> dict[str, str]:
+        """The shortcut of every action and command name, as written in the file"""
+        return self._shortcuts
+
+    @property
+    def editorKeys(self) -> dict[QsciCommand.Command, int]:
+        """The key of every Scintilla command. Commands without a shortcut have 0"""
+        if self._editorKeys is None:
+            self._editorKeys = {
+                command: combinedKey(self._shortcuts.get(command.name, ""))
+                for command in QsciCommand.Command
+            }
+        return self._editorKeys
+
+    def sequence(self, name: str) -> QKeySequence:
+        """The key sequence of an action, empty if it has no shortcut"""
+        if (sequence := self._sequences.get(name)) is None:
+            sequence = QKeySequence.fromString(self._shortcuts.get(name, ""))
+            self._sequences[name] = sequence
+        return sequence
+
+    def reload(self) -> None:
+        """Parses the file again and emits :attr:`changed`"""
+        try:
+            with open(self._path) as f:
+                self._shortcuts = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Failed to read {self._path} - {e.__class__.__name__}: {e}")
+            self._shortcuts = {}
+        self._sequences.clear()
+        self._editorKeys = None
+        self._version += 1
+        # Files saved by replacing them aren't watched anymore
+        if os.path.exists(self._path) and self._path not in self.watcher.files():
+            self.watcher.addPath(self._path)
+        self.changed.emit()
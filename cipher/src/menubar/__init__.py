@@ -2,7 +2,6 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from pathlib import Path
 from functools import singledispatchmethod
-import json
 import sys
 import os
 
@@ -33,7 +32,7 @@ class Menubar(QMenuBar):
         self.createEditMenu()
         self.createViewMenu()
 
-        self.window.shortcut.fileChanged.connect(self.updateShortcuts)
+        self.window.keymap.changed.connect(self.updateShortcuts)
         self.updateShortcuts()
 
     @property
@@ -73,6 +72,9 @@ class Menubar(QMenuBar):
             )
         )
 
+        saveAll = fileMenu.addAction("Save All")
+        saveAll.triggered.connect(self._window.tabView.saveAll)
+
         fileMenu.addSeparator()
 
         newFile = fileMenu.addAction("New File")
@@ -89,6 +91,9 @@ class Menubar(QMenuBar):
         openFile = fileMenu.addAction("Open File Path")
         openFile.triggered.connect(self._window.fileManager.openFilePath)
 
+        quickOpen = fileMenu.addAction("Quick Open")
+        quickOpen.triggered.connect(self._window.quickOpen.open)
+
         reopen = fileMenu.addAction("Reopen Closed Tab")
         reopen.triggered.connect(self._window.tabView.reopenTab)
 
@@ -126,6 +131,16 @@ class Menubar(QMenuBar):
         find.triggered.connect(
             lambda: self._window.currentFile.find() if self._window.currentFile else ...
         )
+
+        goToLine = editMenu.addAction("Go to Line")
+        goToLine.triggered.connect(
+            lambda: (
+                self._window.currentFile.goToLine() if self._window.currentFile else ...
+            )
+        )
+
+        goToSymbol = editMenu.addAction("Go to Symbol in Workspace")
+        goToSymbol.triggered.connect(self._window.symbolPicker.open)
         editMenu.addSeparator()
 
         styles = editMenu.addAction("Styles")
@@ -209,10 +224,9 @@ class Menubar(QMenuBar):
 
     def updateShortcuts(self) -> None:
         """Updates the shortcuts when `shortcuts.json` updates"""
-        with open(os.path.join(self.window.localAppData, "shortcuts.json")) as f:
-            shortcuts = json.load(f)
+        keymap = self.window.keymap
         for menu in self._menus:
             for action in menu.actions():
                 if not (name := action.text()):
                     continue
-                action.setShortcut(shortcuts.get(name, ""))
+                action.setShortcut(keymap.sequence(name))
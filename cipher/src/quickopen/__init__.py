@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+from pathlib import Path
+import time
+
+from .index import *
+from .palette import *
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+
+__all__ = ("QuickOpen", "Palette", "PathIndex")
+
+
+class QuickOpen(Palette):
+    """The palette to open a file of the workspace by typing part of its path
+
+    The paths of every tree view root are kept in a :class:`PathIndex` built
+    in the background. Files created, renamed or removed from the tree views
+    update it, and it is rebuilt when the roots change or when the palette
+    opens with an index older than `STALE_TIME`.
+
+    Parameters
+    ----------
+    window: :class:`Window`
+        The window
+
+    Attributes
+    ----------
+    index: :class:`PathIndex`
+        The paths of the workspace files
+    """
+
+    # The seconds after which the index is rebuilt when the palette opens
+    STALE_TIME = 30
+
+    def __init__(self, window: Window) -> None:
+        super().__init__(window, "Search files by name")
+        self.setObjectName("QuickOpen")
+        self.index = PathIndex()
+        self._building = False
+        self._stale = True
+
+        fileManager = window.fileManager
+        fileManager.workspaceChanged.connect(lambda _: self.invalidate())
+        fileManager.fileCreated.connect(lambda path: self.index.add([path]))
+        fileManager.fileRemoved.connect(self.index.remove)
+        fileManager.fileRenamed.connect(self._renamed)
+
+    def invalidate(self) -> None:
+        """Rebuilds the index in the background"""
+        self._stale = True
+        self.build()
+
+    def build(self) -> None:
+        """Rebuilds the index in a :class:`Thread` unless a build is running"""
+        if self._building:
+            return
+        roots = [path for path in self.window.fileManager.getPaths() if path]
+        self._building = True
+        self._stale = False
+        thread = Thread(
+            self, self.index.build, roots, self.window.settings["search-exclude"]
+        )
+        thread.finished.connect(self._built)
+        thread.start()
+
+    def open(self) -> None:
+        roots = [path for path in self.window.fileManager.getPaths() if path]
+        age = time.monotonic() - self.index.builtAt
+        if self._stale or roots != self.index.roots or age > self.STALE_TIME:
+            self.build()
+        super().open()
+
+    def find(
+        self, query: str, limit: int, cancelled: Callable[[], bool]
+    ) -> list[tuple[Path, str]] | None:
+        return self.index.match(query, limit, cancelled)
+
+    def activate(self, path: Path) -> None:
+        self.window.tabView.createTab(path)
+
+    def _built(self, _) -> None:
+        self._building = False
+        if self._stale:
+            return self.build()
+        self.refresh()
+
+    def _renamed(self, path: Path, newPath: Path) -> None:
+        self.index.remove(path)
+        self.index.add([newPath])
@@ -0,0 +1,637 @@
+from __future__ import annotations
+from typing import Callable, Container, Iterable, Iterator
+from bisect import bisect_right
+from array import array
+from pathlib import Path
+import threading
+import time
+import os
+import re
+
+from ..ignore import IgnoreRules
+
+__all__ = (
+    "PathIndex",
+    "lowercase",
+    "subsequence",
+    "scanLines",
+    "checkRows",
+    "charRows",
+    "fuzzyScore",
+)
+
+# The characters whose rows are kept as bits. The others don't narrow a query
+_INDEXED = "abcdefghijklmnopqrstuvwxyz0123456789._-/"
+# The bytes deleted to keep only the newlines and one character
+_OTHERS = {
+    char: bytes(byte for byte in range(256) if byte not in (ord(char), 10))
+    for char in _INDEXED
+}
+_FLAGS = bytes.maketrans(b"\n\x01", b"01")
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def lowercase(text: str) -> str:
+    """Lowercases the text without changing its length so offsets stay the same"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(low if len(low := char.lower()) == 1 else char for char in text)
+
+
+def subsequence(query: str, stop: str) -> str:
+    """A regex matching the characters of the query in order without crossing `stop`
+
+    Every gap only skips the characters that aren't the next one, so the
+    first place each character can go is taken and the regex never backtracks.
+    """
+    parts = [
+        f"{re.escape(char)}[^{stop}{re.escape(next)}]*"
+        for char, next in zip(query, query[1:])
+    ]
+    return "".join(parts) + re.escape(query[-1])
+
+
+def _tiers(query: str) -> tuple[re.Pattern[str], ...]:
+    """The regexes of the tiers of a query, best first. The first two scan the names"""
+    inOrder = subsequence(query, "\n")
+    return (
+        # The query is in the name of the file
+        re.compile(re.escape(query)),
+        # The characters of the query are in the name
+        re.compile(inOrder),
+        # The characters of the query are in the path. Starting at the separator
+        # tries every line once, instead of once per place its first character is
+        re.compile(f"\0[^\n{re.escape(query[0])}]*{inOrder}"),
+    )
+
+
+def scanLines(
+    text: str,
+    starts: array,
+    regex: re.Pattern[str],
+    found: dict[int, int],
+    value: int,
+    skip: Container[int] = (),
+    limit: int = 256,
+    cancelled: Callable[[], bool] = lambda: False,
+    chunkSize: int = 256 * 1024,
+    start: int = 1,
+) -> bool | None:
+    """Finds the lines matching a regex, a chunk of lines at a time
+
+    Parameters
+    ----------
+    text: `str`
+        The lines, each one ended by a newline. Starts with a newline
+    starts: `array`
+        The sorted offsets of the lines in `text`
+    regex: `re.Pattern[str]`
+        A regex that never matches across a newline
+    found: `dict[int, int]`
+        The rows already found. Every new row is added with `value`
+    skip: `Container[int]`
+        The rows to ignore
+    limit: `int`
+        The number of new rows after which the scan stops
+    cancelled: `Callable[[], bool]`
+        Checked before every chunk. The scan stops once it returns `True`
+    chunkSize: `int`
+        The rough number of characters scanned between two checks for cancellation
+    start: `int`
+        The offset of the line the scan starts at
+
+    Returns
+    -------
+    Optional[bool]
+        Whether every matching line was found. `None` if cancelled.
+    """
+    pos, end, count = start, len(text), 0
+    while pos < end:
+        if cancelled():
+            return None
+        stop = text.find("\n", min(pos + chunkSize, end - 1)) + 1 or end
+        while match := regex.search(text, pos, stop):
+            row = bisect_right(starts, match.start()) - 1
+            pos = text.index("\n", match.end()) + 1
+            if row in found or row in skip:
+                continue
+            found[row] = value
+            count += 1
+            if count >= limit:
+                return False
+        pos = stop
+    return True
+
+
+def charRows(text: str) -> dict[str, int]:
+    """The lines holding each indexed character, as the bits of an int per character
+
+    Bit `n` is set when line `n` holds the character. `text` starts with a
+    newline and ends every line with one. Every character is a few passes of
+    bytes methods over the encoded text, instead of a loop over the lines.
+    """
+    data = text.encode()
+    count = data.count(b"\n") - 1
+    rows = {}
+    for char in _INDEXED:
+        byte = char.encode()
+        if count <= 0 or byte not in data:
+            rows[char] = 0
+            continue
+        # Each line becomes a newline, or a 1 if it holds the character
+        kept = data.translate(None, _OTHERS[char]).replace(b"\n" + byte, b"\x01")
+        flags = kept.translate(_FLAGS, byte)[:count]
+        rows[char] = int(flags[::-1], 2)
+    return rows
+
+
+def _setBits(bits: int, first: int = 0) -> Iterator[int]:
+    """The positions of the set bits of an int from `first`, lowest first"""
+    bits >>= first
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for match in _NONZERO.finditer(data):
+        byte, base = data[match.start()], first + match.start() * 8
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+def _isWordStart(text: str, at: int) -> bool:
+    """Whether a character starts a word: after a separator, a lower case letter
+    before an upper case one, or a letter before a digit"""
+    if at == 0 or not (previous := text[at - 1]).isalnum():
+        return True
+    char = text[at]
+    return (previous.islower() and char.isupper()) or (
+        char.isdigit() and previous.isalpha()
+    )
+
+
+def _fits(query: str, lowered: str, pos: int) -> bool:
+    """Whether the characters of the query are in order in the text from `pos`"""
+    for char in query:
+        if (pos := lowered.find(char, pos) + 1) == 0:
+            return False
+    return True
+
+
+def fuzzyScore(query: str, text: str, lowered: str) -> int | None:
+    """Scores how well the characters of a query match a name or a path, in order
+
+    Each character is taken at its first place after the previous one,
+    unless that place neither follows the previous one nor starts a word and
+    a later start of a word still leaves room for the rest of the query.
+    Every character scores a point, four more when it follows the previous
+    one and six more when it starts a word, and every skipped character costs
+    a point, up to three per gap.
+
+    Parameters
+    ----------
+    query: `str`
+        The lowercased characters to look for
+    text: `str`
+        The name or path, whose case marks the start of words
+    lowered: `str`
+        The text lowercased by :func:`lowercase`
+
+    Returns
+    -------
+    Optional[int]
+        The score, higher is better. `None` if the characters aren't all in order.
+    """
+    score, pos, last = 0, 0, -1
+    for index, char in enumerate(query):
+        if (at := lowered.find(char, pos)) < 0:
+            return None
+        word = _isWordStart(text, at)
+        if at != last + 1 and not word:
+            later = lowered.find(char, at + 1)
+            while later >= 0 and not _isWordStart(text, later):
+                later = lowered.find(char, later + 1)
+            if later >= 0 and _fits(query[index + 1 :], lowered, later + 1):
+                at, word = later, True
+        score += 1
+        if at == last + 1:
+            score += 4
+        elif last >= 0:
+            score -= min(at - last - 1, 3)
+        if word:
+            score += 6
+        pos, last = at + 1, at
+    return score
+
+
+def checkRows(
+    text: str,
+    starts: array,
+    regex: re.Pattern[str],
+    found: dict[int, int],
+    value: int,
+    rows: Iterable[int],
+    skip: Container[int] = (),
+    limit: int = 256,
+    cancelled: Callable[[], bool] = lambda: False,
+    chunkSize: int = 4096,
+) -> bool | None:
+    """Finds the lines matching a regex among some lines. Like :func:`scanLines`
+
+    Parameters
+    ----------
+    rows: `Iterable[int]`
+        The sorted rows of the lines to check
+    chunkSize: `int`
+        The number of lines checked between two checks for cancellation
+
+    Returns
+    -------
+    Optional[bool]
+        Whether every matching line was found. `None` if cancelled.
+    """
+    count = 0
+    for checked, row in enumerate(rows):
+        if not checked % chunkSize and cancelled():
+            return None
+        if row in found or row in skip:
+            continue
+        start = starts[row]
+        if regex.search(text, start, text.index("\n", start)):
+            found[row] = value
+            count += 1
+            if count >= limit:
+                return False
+    return True
+
+
+def _lineScore(query: str, start: int, name: bool, original: str, text: str) -> int:
+    """The :func:`fuzzyScore` of the name or the path of the line at `start`"""
+    end = original.index("\n", start)
+    split = original.index("\0", start)
+    start, end = (start, split) if name else (split + 1, end)
+    return fuzzyScore(query, original[start:end], text[start:end]) or 0
+
+
+def _candidates(rows: dict[str, int], query: str) -> int | None:
+    """The bits of the lines holding every indexed character of a query
+
+    `None` if none of its characters are indexed.
+    """
+    indexed = [rows.get(char, 0) for char in set(query) if char in _OTHERS]
+    if not indexed:
+        return None
+    candidates = indexed[0]
+    for bits in indexed[1:]:
+        candidates &= bits
+    return candidates
+
+
+class PathIndex:
+    """The paths of the files under the roots of the tree views. Used by :class:`QuickOpen`
+
+    Every file is a line of a single string holding its lowercased name and
+    path, so a query is matched by the regex engine instead of a loop over
+    the files. The lines are sorted by the length of the name then of the
+    path, so the first matches of a query are its shortest ones and a search
+    stops once it has enough of them. A query is matched in tiers: files
+    whose name holds the query, then whose name holds its characters in
+    order, then whose path does. The first two tiers match a string of the
+    names alone, with the same lines, a fraction of the size of the paths.
+    The matches of a tier are ranked by :func:`fuzzyScore`.
+
+    The lines holding each character are kept as the bits of an int, one set
+    for the names and one for the paths. Anding the sets of the characters of
+    a query gives the only lines that can match it, so when they are few only
+    those lines are matched, and a query none of the lines can match costs
+    nothing. Each tier also keeps the lines it found and where it stopped, so
+    the next query typing more characters only matches those lines and
+    resumes after them, like erasing characters back to an earlier query.
+
+    Files added after a build are appended and removed files are skipped
+    until the next build.
+    """
+
+    # The number of matches kept per tier
+    LIMIT = 256
+    # The number of characters scanned between two checks for cancellation
+    CHUNK_SIZE = 256 * 1024
+    # Checking a line alone costs about as much as scanning this many characters
+    # with the regex of each tier. The lines that can match a tier are checked
+    # alone when that's cheaper
+    LINE_COSTS = (1024, 256, 128)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._building = threading.Lock()
+        self._roots: list[Path] = []
+        self._rules: list[IgnoreRules] = []
+        self._text = "\n"
+        self._original = "\n"
+        self._starts = array("q")
+        self._names = "\n"
+        self._nameStarts = array("q")
+        self._rootIds = array("H")
+        self._nameRows: dict[str, int] = {}
+        self._pathRows: dict[str, int] = {}
+        self._removed: set[int] = set()
+        # What each tier left to check after the last query and after each shorter
+        # one it starts with, see _matchTier
+        self._states: dict[str, list[tuple[list[int], int]]] = {}
+        self._builtAt = 0.0
+
+    def __len__(self) -> int:
+        return len(self._starts) - len(self._removed)
+
+    @property
+    def roots(self) -> list[Path]:
+        return list(self._roots)
+
+    @property
+    def builtAt(self) -> float:
+        """The `time.monotonic` of the last build. `0` if it was never built"""
+        return self._builtAt
+
+    def build(self, roots: Iterable[Path], excludes: Iterable[str] = ()) -> None:
+        """Walks every root and replaces the index. Meant to be run in a :class:`Thread`
+
+        Parameters
+        ----------
+        roots: `Iterable[Path]`
+            The folders to index
+        excludes: `Iterable[str]`
+            Patterns of the paths to skip, on top of the ignore files of each root
+        """
+        if not self._building.acquire(blocking=False):
+            return
+        try:
+            roots, excludes = list(roots), list(excludes)
+            rules = [IgnoreRules(root, excludes) for root in roots]
+            entries = []
+            for id, rule in enumerate(rules):
+                entries.extend(
+                    (entry.name, rule.relativePath(entry.path), id)
+                    for entry in rule.walk()
+                )
+            entries.sort(key=lambda entry: (len(entry[0]), len(entry[1]), entry[1]))
+            lines = [f"{name}\0{relative}" for name, relative, _ in entries]
+            original = "\n" + "\n".join(lines) + "\n" if lines else "\n"
+            starts, pos = array("q"), 1
+            for line in lines:
+                starts.append(pos)
+                pos += len(line) + 1
+            names = "\n" + "".join(f"{name}\n" for name, *_ in entries)
+            nameStarts, pos = array("q"), 1
+            for name, *_ in entries:
+                nameStarts.append(pos)
+                pos += len(name) + 1
+            rootIds = array("H", (id for *_, id in entries))
+            text, names = lowercase(original), lowercase(names)
+            nameRows, pathRows = charRows(names), charRows(text)
+            with self._lock:
+                self._roots, self._rules = roots, rules
+                self._original, self._text = original, text
+                self._starts, self._rootIds = starts, rootIds
+                self._names, self._nameStarts = names, nameStarts
+                self._nameRows, self._pathRows = nameRows, pathRows
+                self._removed = set()
+                self._states = {}
+                self._builtAt = time.monotonic()
+        finally:
+            self._building.release()
+
+    def add(self, paths: Iterable[Path]) -> None:
+        """Adds files, or every file under folders, that aren't in the index yet"""
+        lines, names, rootIds = [], [], []
+        for path in paths:
+            if (found := self._root(path)) is None:
+                continue
+            id, rules = found
+            if rules.isIgnored(path):
+                continue
+            if os.path.isdir(path):
+                files = [entry.path for entry in rules.walk(path)]
+            else:
+                files = [os.fspath(path)]
+            for file in files:
+                relative = rules.relativePath(file)
+                if self._row(id, relative) is None:
+                    names.append(os.path.basename(file))
+                    lines.append(f"{names[-1]}\0{relative}")
+                    rootIds.append(id)
+        if not lines:
+            return
+        added = "\n".join(lines) + "\n"
+        addedNames = lowercase("".join(f"{name}\n" for name in names))
+        nameRows = charRows("\n" + addedNames)
+        pathRows = charRows("\n" + lowercase(added))
+        with self._lock:
+            first = len(self._starts)
+            for char, rows in nameRows.items():
+                self._nameRows[char] = self._nameRows.get(char, 0) | rows << first
+            for char, rows in pathRows.items():
+                self._pathRows[char] = self._pathRows.get(char, 0) | rows << first
+            pos = len(self._original)
+            for line in lines:
+                self._starts.append(pos)
+                pos += len(line) + 1
+            pos = len(self._names)
+            for name in names:
+                self._nameStarts.append(pos)
+                pos += len(name) + 1
+            self._rootIds.extend(rootIds)
+            self._original += added
+            self._text += lowercase(added)
+            self._names += addedNames
+            self._states = {}
+
+    def remove(self, path: Path) -> None:
+        """Removes a file or every file under a folder"""
+        if (found := self._root(path)) is None:
+            return
+        id, rules = found
+        relative = rules.relativePath(path)
+        with self._lock:
+            self._states = {}
+            if (row := self._row(id, relative)) is not None:
+                self._removed.add(row)
+                return
+            original, starts, rootIds = self._original, self._starts, self._rootIds
+            for match in re.finditer(f"\0{re.escape(relative)}/", original):
+                row = bisect_right(starts, match.start()) - 1
+                if rootIds[row] == id:
+                    self._removed.add(row)
+
+    def match(
+        self, query: str, limit: int = 50, cancelled: Callable[[], bool] = lambda: False
+    ) -> list[tuple[Path, str]] | None:
+        """Finds the files best matching a query
+
+        Parameters
+        ----------
+        query: `str`
+            The characters to look for, in order. Case and spaces are ignored
+        limit: `int`
+            The number of files to return
+        cancelled: `Callable[[], bool]`
+            Checked while scanning. The scan stops once it returns `True`
+
+        Returns
+        -------
+        Optional[list[tuple[Path, str]]]
+            The path and the label of the files, best first. `None` if cancelled.
+        """
+        query = lowercase("".join(query.split()).replace(os.sep, "/"))
+        if not query:
+            return []
+        with self._lock:
+            text, starts, removed = self._text, self._starts, set(self._removed)
+            original, rootIds, roots = self._original, self._rootIds, self._roots
+            names, nameStarts = self._names, self._nameStarts
+            nameRows, pathRows = dict(self._nameRows), dict(self._pathRows)
+            typed = dict(self._states)
+        tiers = _tiers(query)
+        # The text, the line offsets and the lines that can match each tier
+        inName = _candidates(nameRows, query)
+        tables = (
+            (names, nameStarts, inName),
+            (names, nameStarts, inName),
+            (text, starts, _candidates(pathRows, query)),
+        )
+        # A query typing more characters can only match what a shorter one could
+        shorter = max(
+            (key for key in typed if query.startswith(key)), key=len, default=""
+        )
+        states = list(typed.get(shorter, [([], 0)] * len(tiers)))
+        found: dict[int, int] = {}
+        for tier, (regex, table) in enumerate(zip(tiers, tables)):
+            if len(found) >= limit:
+                # The worse tiers wouldn't be shown
+                break
+            state = self._matchTier(
+                tier, regex, *table, states[tier], found, removed, cancelled
+            )
+            if state is None:
+                return None
+            states[tier] = state
+        with self._lock:
+            if self._text is text:
+                typed = self._states
+                for key in [key for key in typed if not query.startswith(key)]:
+                    del typed[key]
+                typed[query] = states
+        scores = {
+            row: _lineScore(query, starts[row], found[row] < 2, original, text)
+            for row in found
+        }
+        rows = sorted(found, key=lambda row: (found[row], -scores[row], row))
+
+        results = []
+        for row in rows[:limit]:
+            start = starts[row]
+            relative = original[start : original.index("\n", start)].split("\0")[1]
+            root = roots[rootIds[row]]
+            label = relative if len(roots) == 1 else f"{root.name}/{relative}"
+            results.append((Path(os.path.join(root, relative)), label))
+        return results
+
+    def _matchTier(
+        self,
+        tier: int,
+        regex: re.Pattern[str],
+        lines: str,
+        offsets: array,
+        candidates: int | None,
+        state: tuple[list[int], int],
+        found: dict[int, int],
+        removed: set[int],
+        cancelled: Callable[[], bool],
+    ) -> tuple[list[int], int] | None:
+        """Finds the lines matching a tier, resuming where the last query left it
+
+        Parameters
+        ----------
+        candidates: `Optional[int]`
+            The bits of the rows that can match, see :func:`charRows`. `None` if any can
+        state: `tuple[list[int], int]`
+            The rows before a row `end` that can still match, and `end`. Rows
+            from `end` weren't checked yet. Starts as `([], 0)`
+
+        Returns
+        -------
+        Optional[tuple[list[int], int]]
+            The state left for a query typing more characters. `None` if cancelled.
+        """
+        known, end = state
+        result = checkRows(
+            lines, offsets, regex, found, tier, known, removed, self.LIMIT, cancelled
+        )
+        if result is None:
+            return None
+        if not result:
+            # The known rows after the last match weren't checked
+            last = max(row for row in found if found[row] == tier)
+            known = [row for row in known if row > last or found.get(row, 3) <= tier]
+            return known, end
+        count = sum(1 for row in found if found[row] == tier)
+        stop = end
+        if end < len(offsets):
+            if candidates is not None and (
+                (candidates >> end).bit_count() * self.LINE_COSTS[tier]
+                <= len(lines) - offsets[end]
+            ):
+                rows = _setBits(candidates, end)
+                result = checkRows(
+                    lines,
+                    offsets,
+                    regex,
+                    found,
+                    tier,
+                    rows,
+                    removed,
+                    self.LIMIT - count,
+                    cancelled,
+                )
+            else:
+                result = scanLines(
+                    lines,
+                    offsets,
+                    regex,
+                    found,
+                    tier,
+                    removed,
+                    self.LIMIT - count,
+                    cancelled,
+                    self.CHUNK_SIZE,
+                    offsets[end],
+                )
+            if result is None:
+                return None
+            if result:
+                stop = len(offsets)
+            else:
+                stop = max(row for row in found if found[row] == tier) + 1
+        # Rows matching a better tier match this one too
+        known = [row for row in known if found.get(row, 3) <= tier]
+        known.extend(
+            sorted(row for row in found if end <= row < stop and found[row] <= tier)
+        )
+        return known, stop
+
+    def _root(self, path: Path) -> tuple[int, IgnoreRules] | None:
+        """The id and the rules of the root holding a path"""
+        for id, (root, rules) in enumerate(zip(self._roots, self._rules)):
+            if Path(path).is_relative_to(root):
+                return id, rules
+        return None
+
+    def _row(self, id: int, relative: str) -> int | None:
+        """The row of a file that isn't removed"""
+        line = f"\n{os.path.basename(relative)}\0{relative}\n"
+        original, starts, rootIds = self._original, self._starts, self._rootIds
+        pos = original.find(line)
+        while pos >= 0:
+            row = bisect_right(starts, pos + 1) - 1
+            if rootIds[row] == id and row not in self._removed:
+                return row
+            pos = original.find(line, pos + 1)
+        return None
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable
+
+from PyQt6.QtCore import QEvent, QObject, Qt
+from PyQt6.QtWidgets import (
+    QDialog,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+)
+
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+
+__all__ = ("Palette",)
+
+
+class Palette(QDialog):
+    """A popup that lists the best matches of a query as it is typed
+
+    Every keystroke is matched in a :class:`Thread` by :meth:`find`. Only one
+    match runs at a time: a newer keystroke cancels it and the last query
+    starts once it returns, so only the last results are shown. Subclasses
+    implement :meth:`find` and :meth:`activate`.
+
+    Parameters
+    ----------
+    window: :class:`Window`
+        The window
+    placeholder: `str`
+        The placeholder of the text box
+
+    Attributes
+    ----------
+    textBox: :class:`QLineEdit`
+        The query
+    list: :class:`QListWidget`
+        The best matches
+    """
+
+    # The number of matches shown
+    LIMIT = 50
+
+    def __init__(self, window: Window, placeholder: str = "") -> None:
+        super().__init__(window)
+        self.setWindowFlags(Qt.WindowType.Popup)
+        self._window = window
+        self._generation = 0
+        self._thread: Thread | None = None
+        self._pending: str | None = None
+
+        self.textBox = QLineEdit(self)
+        self.textBox.setObjectName("Textbox")
+        self.textBox.setPlaceholderText(placeholder)
+        self.textBox.textChanged.connect(self.match)
+        self.textBox.installEventFilter(self)
+
+        self.list = QListWidget(self)
+        self.list.setObjectName("List")
+        self.list.setUniformItemSizes(True)
+        self.list.itemActivated.connect(self.openItem)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(4)
+        layout.addWidget(self.textBox)
+        layout.addWidget(self.list)
+        self.setLayout(layout)
+
+        window.closed.connect(self.cancel)
+
+    @property
+    def window(self) -> Window:
+        return self._window
+
+    def find(
+        self, query: str, limit: int, cancelled: Callable[[], bool]
+    ) -> list[tuple[Any, str]] | None:
+        """Finds the best matches of a query. Runs in a :class:`Thread`
+
+        Returns
+        -------
+        Optional[list[tuple[Any, str]]]
+            The data and the label of the matches, best first. `None` if cancelled.
+        """
+        raise NotImplementedError
+
+    def activate(self, data: Any) -> None:
+        """Opens the data of the chosen match"""
+        raise NotImplementedError
+
+    def open(self) -> None:
+        """Shows the palette at the top of the window"""
+        geometry = self.window.geometry()
+        width = min(600, geometry.width() - 20)
+        self.setGeometry(
+            geometry.x() + (geometry.width() - width) // 2,
+            geometry.y() + 60,
+            width,
+            min(400, geometry.height() - 80),
+        )
+        self.textBox.clear()
+        self.list.clear()
+        self.show()
+        self.textBox.setFocus()
+
+    def refresh(self) -> None:
+        """Matches the query again. Used when the matched data changes"""
+        if self.isVisible() and self.textBox.text().strip():
+            self.match(self.textBox.text())
+
+    def match(self, query: str) -> None:
+        """Matches a query in a :class:`Thread`"""
+        self._generation += 1
+        if not query.strip():
+            self._pending = None
+            self.list.clear()
+            return
+        if self._thread is not None:
+            # The running match is cancelled and the last query starts after it
+            self._pending = query
+            return
+        generation = self._generation
+        self._thread = Thread(
+            self, self.find, query, self.LIMIT, lambda: generation != self._generation
+        )
+        self._thread.finished.connect(
+            lambda results: self._matched(generation, results)
+        )
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Cancels the running match"""
+        self._generation += 1
+        self._pending = None
+
+    def openItem(self, item: QListWidgetItem | None = None) -> None:
+        """Activates an item, by default the current one"""
+        if item is None and (item := self.list.currentItem()) is None:
+            return
+        data = item.data(Qt.ItemDataRole.UserRole)
+        self.hide()
+        self.activate(data)
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:
+        if obj is not self.textBox or event.type() != QEvent.Type.KeyPress:
+            return super().eventFilter(obj, event)
+        key = event.key()
+        if key in (Qt.Key.Key_Up, Qt.Key.Key_Down) and self.list.count():
+            step = -1 if key == Qt.Key.Key_Up else 1
+            row = (self.list.currentRow() + step) % self.list.count()
+            self.list.setCurrentRow(row)
+            return True
+        if key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.openItem()
+            return True
+        return super().eventFilter(obj, event)
+
+    def _matched(self, generation: int, results: list[tuple[Any, str]] | None) -> None:
+        # Thread only quits after its finished signal is handled
+        thread, self._thread = self._thread, None
+        thread.quit()
+        thread.wait()
+        thread.deleteLater()
+        if (query := self._pending) is not None:
+            self._pending = None
+            return self.match(query)
+        if generation != self._generation or results is None:
+            return
+        self.list.clear()
+        for data, label in results:
+            item = QListWidgetItem(label, self.list)
+            item.setData(Qt.ItemDataRole.UserRole, data)
+            item.setToolTip(label)
+        if self.list.count():
+            self.list.setCurrentRow(0)
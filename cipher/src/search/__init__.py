@@ -1,6 +1,16 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
-from PyQt6.QtWidgets import QCheckBox, QFrame, QLineEdit, QSizePolicy, QVBoxLayout
+from PyQt6.QtGui import QShowEvent
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QFrame,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSizePolicy,
+    QVBoxLayout,
+)
 from .view import SearchView
 
 if TYPE_CHECKING:
@@ -22,11 +32,38 @@ class Search(QFrame):
         self.textBox = QLineEdit(self)
         self.textBox.setObjectName("TextBox")
 
+        self.replaceBox = QLineEdit(self)
+        self.replaceBox.setObjectName("ReplaceBox")
+        self.replaceBox.setPlaceholderText("Replace")
+
         self.cs = QCheckBox(self)
         self.cs.setObjectName("Case")
         self.cs.setText("Aa")
 
         self.searchView = SearchView(self, window)
+        jobs = self.searchView.jobs
+        jobs.started.connect(self.searchStarted)
+        jobs.finished.connect(self.searchFinished)
+        self.searchView.replaced.connect(self.replaceFinished)
+
+        self.status = QLabel(self)
+        self.status.setObjectName("Status")
+
+        self.cancel = QPushButton(self)
+        self.cancel.setObjectName("Cancel")
+        self.cancel.setText("Cancel")
+        self.cancel.clicked.connect(self.searchView.cancel)
+        self.cancel.hide()
+
+        self.replace = QPushButton(self)
+        self.replace.setObjectName("Replace")
+        self.replace.setText("Replace All")
+        self.replace.setEnabled(False)
+        self.replace.clicked.connect(self.replaceAll)
+        self.replaceBox.returnPressed.connect(self.replaceAll)
+        self.replaceBox.textChanged.connect(
+            lambda text: self.searchView.setReplacement(text or None)
+        )
         self.textBox.returnPressed.connect(
             lambda: self.searchView.search(self.textBox.text(), self.cs.isChecked())
         )
@@ -40,11 +77,54 @@ class Search(QFrame):
         layout.setContentsMargins(0, 10, 0, 0)
         layout.setSpacing(0)
         layout.addWidget(self.textBox)
+        layout.addWidget(self.replaceBox)
         layout.addWidget(self.cs)
+
+        statusLayout = QHBoxLayout()
+        statusLayout.setContentsMargins(0, 0, 4, 0)
+        statusLayout.addWidget(self.status, 1)
+        statusLayout.addWidget(self.cancel)
+        statusLayout.addWidget(self.replace)
+        layout.addLayout(statusLayout)
         layout.addWidget(self.searchView)
 
         self.setLayout(layout)
 
+    def showEvent(self, event: QShowEvent) -> None:
+        # The first search doesn't wait for the worker processes to start
+        self.searchView.prepare()
+        return super().showEvent(event)
+
     def focus(self) -> None:
         self.textBox.selectAll()
         self.textBox.setFocus()
+
+    def searchStarted(self, _: int) -> None:
+        self.status.setText("Searching…")
+        self.cancel.show()
+        self.replace.setEnabled(False)
+
+    def searchFinished(self, _: int, cancelled: bool) -> None:
+        """Shows the result count once the running search ends"""
+        self.cancel.hide()
+        if not self.textBox.text():
+            return self.status.clear()
+        model = self.searchView.model()
+        text = f"{model.matchCount} results in {model.fileCount} files"
+        self.status.setText(f"{text} (Cancelled)" if cancelled else text)
+        self.replace.setEnabled(not self.searchView.isReplacing and bool(model.paths))
+
+    def replaceAll(self) -> None:
+        """Replaces every result with the text of :attr:`replaceBox`"""
+        if not self.replace.isEnabled():
+            return
+        if not self.searchView.replaceAll(self.replaceBox.text()):
+            return self.status.setText("Invalid replacement")
+        self.replace.setEnabled(False)
+        self.status.setText("Replacing…")
+
+    def replaceFinished(self, count: int, files: int, failed: int) -> None:
+        """Shows the replace count. The results are cleared as they are out of date"""
+        self.searchView.search("", self.cs.isChecked())
+        text = f"Replaced {count} results in {files} files"
+        self.status.setText(f"{text} ({failed} failed)" if failed else text)
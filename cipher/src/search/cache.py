@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Hashable
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import os
+
+if TYPE_CHECKING:
+    from .engine import Matches
+
+__all__ = ("ResultCache",)
+
+
+class ResultCache:
+    """The per-file results of the last queries, so a rerun only scans changed files
+
+    Every file is stored with the key it was scanned with: its mtime and size,
+    or the :attr:`Editor.revision` of its buffer. A result is only reused while
+    the key is the same. Files without matches are stored too. The least
+    recently run queries are dropped once the cache holds more than `maxSize`.
+
+    Parameters
+    ----------
+    maxSize: `int`
+        The rough number of bytes the cache can hold
+    """
+
+    MAX_SIZE = 64 * 1024 * 1024
+    # A rough size of a stored file besides its matches
+    ENTRY_SIZE = 200
+
+    def __init__(self, maxSize: int = MAX_SIZE) -> None:
+        self.maxSize = maxSize
+        self._lock = threading.Lock()
+        self._queries: OrderedDict[tuple[str, int], dict[str, tuple]] = OrderedDict()
+        self._sizes: dict[tuple[str, int], int] = {}
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, pattern: str, flags: int, path: str, key: Hashable) -> Matches | None:
+        """The stored matches of a file. `None` if the file changed or wasn't stored"""
+        query = (pattern, flags)
+        with self._lock:
+            if (files := self._queries.get(query)) is None:
+                return None
+            self._queries.move_to_end(query)
+            if (entry := files.get(path)) is None:
+                return None
+            if entry[0] != key:
+                self._pop(query, path)
+                return None
+            return entry[1]
+
+    def put(
+        self, pattern: str, flags: int, path: str, key: Hashable, records: Matches
+    ) -> None:
+        """Stores the matches of a file scanned with `key`"""
+        query = (pattern, flags)
+        size = self.ENTRY_SIZE + records.itemsize * len(records)
+        with self._lock:
+            if self._sizes.get(query, 0) + size > self.maxSize:
+                return
+            if (files := self._queries.get(query)) is None:
+                files = self._queries[query] = {}
+                self._sizes[query] = 0
+            else:
+                self._queries.move_to_end(query)
+            self._pop(query, path)
+            files[path] = (key, records)
+            self._sizes[query] += size
+            self._size += size
+            while self._size > self.maxSize and len(self._queries) > 1:
+                oldest = next(iter(self._queries))
+                self._queries.pop(oldest)
+                self._size -= self._sizes.pop(oldest)
+
+    def invalidate(self, path: str | Path) -> None:
+        """Drops a file from every query"""
+        path = os.fspath(path)
+        with self._lock:
+            for query in self._queries:
+                self._pop(query, path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def _pop(self, query: tuple[str, int], path: str) -> None:
+        if (entry := self._queries[query].pop(path, None)) is not None:
+            size = self.ENTRY_SIZE + entry[1].itemsize * len(entry[1])
+            self._sizes[query] -= size
+            self._size -= size
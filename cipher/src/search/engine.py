@@ -0,0 +1,395 @@
+from __future__ import annotations
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from functools import lru_cache
+from itertools import islice, takewhile
+from typing import Callable, Hashable, Iterable, Iterator
+from pathlib import Path
+import multiprocessing
+import threading
+import time
+import sys
+import mmap
+import os
+import re
+
+from .cache import ResultCache
+from .planner import Scanner, plan
+
+__all__ = ("SearchEngine", "scanFile", "scanFiles")
+
+CHUNK_SIZE = 1024 * 1024
+
+# The match records of a file, flattened into `array("q")`: start, end, line, column.
+# `start` and `end` are utf-8 byte offsets, the positions used by scintilla.
+# `line` and `column` are 0 based, `column` counts characters.
+Matches = array
+MATCH_FIELDS = 4
+
+# A file to scan: its path, its text (`None` to read the file), its mtime
+# (`None` for buffers) and its key in the :class:`ResultCache` (`None` to skip it)
+File = tuple[str, "str | None", "int | None", Hashable]
+
+
+@lru_cache(maxsize=16)
+def _compile(pattern: str, flags: int) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+def _countLines(data: bytes | mmap.mmap, start: int, end: int) -> int:
+    """Counts the newlines between two offsets without copying more than a chunk"""
+    return sum(
+        data[i : min(i + CHUNK_SIZE, end)].count(b"\n")
+        for i in range(start, end, CHUNK_SIZE)
+    )
+
+
+def _scanBytes(data: bytes | mmap.mmap, scanner: Scanner) -> Matches:
+    """Finds the matches in utf-8 bytes. Nothing but the start of a matched line is decoded"""
+    records = array("q")
+    line = pos = column = 0
+    size = len(data)
+    for start, end in scanner.finditer(data):
+        if start < size and data[start] & 0xC0 == 0x80:
+            continue  # An empty match inside a character
+        if newlines := _countLines(data, pos, start):
+            line += newlines
+            pos = data.rfind(b"\n", pos, start) + 1
+            column = 0
+        column += len(data[pos:start].decode("utf-8", "replace"))
+        pos = start
+        records.extend((start, end, line, column))
+    return records
+
+
+def _scanMapped(path: str, scanner: Scanner) -> Matches:
+    """Searches a memory mapped file so it's never copied into memory"""
+    try:
+        with open(path, "rb") as f:
+            if b"\0" in f.read(1024):
+                return array("q")
+            if not os.fstat(f.fileno()).st_size:
+                return array("q")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _scanBytes(data, scanner)
+    except (OSError, ValueError):
+        return array("q")
+
+
+def _scanText(text: str, regex: re.Pattern[str]) -> Matches:
+    """Finds the matches in a str. Used when the pattern can't run on bytes"""
+    records = array("q")
+    line = lineStart = pos = offset = 0
+    for match in regex.finditer(text):
+        start = match.start()
+        if newlines := text.count("\n", pos, start):
+            line += newlines
+            lineStart = text.rfind("\n", pos, start) + 1
+        offset += len(text[pos:start].encode("utf-8", "surrogatepass"))
+        pos = start
+        end = offset + len(match.group().encode("utf-8", "surrogatepass"))
+        records.extend((offset, end, line, start - lineStart))
+    return records
+
+
+def scanFile(path: str, text: str | None, pattern: str, flags: int) -> Matches:
+    """Finds every match of `pattern` in a file
+
+    Files are memory mapped and searched as bytes with the :class:`Scanner`
+    picked by :func:`plan` when the pattern matches the same on bytes.
+    Otherwise the file is decoded and searched as a str.
+
+    Parameters
+    ----------
+    path: `str`
+        The path of the file
+    text: `Optional[str]`
+        The contents of the file. The file is read if `None`
+    pattern: `str`
+        The regex to search for
+    flags: `int`
+        The regex flags
+
+    Returns
+    -------
+    Matches
+        The match records of the file
+    """
+    if (scanner := plan(pattern, flags)) is not None:
+        if text is None:
+            return _scanMapped(path, scanner)
+        return _scanBytes(text.encode("utf-8", "surrogatepass"), scanner)
+    if text is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return array("q")
+    return _scanText(text, _compile(pattern, flags))
+
+
+def scanFiles(
+    files: list[tuple[str, str | None, int | None]], pattern: str, flags: int
+) -> list[tuple[str, int | None, Matches]]:
+    """Scans a batch of files. Runs in the worker processes of :class:`SearchEngine`
+
+    Takes the path, the text (`None` to read the file) and the modification
+    time of every file. Returns the path, the time and the matches of every
+    file that matched. The time is taken before the file is read so a file
+    changed during the scan is never seen as up to date.
+    """
+    found = []
+    for path, text, mtime in files:
+        if records := scanFile(path, text, pattern, flags):
+            found.append((path, mtime, records))
+    return found
+
+
+class SearchEngine:
+    """Spreads the scanning of files over a pool of processes
+
+    The results of every file are kept in a :class:`ResultCache`, so running
+    a query again only scans the files that changed since.
+
+    Parameters
+    ----------
+    workers: `int`
+        The number of worker processes. Uses every core if `0`
+
+    Attributes
+    ----------
+    cache: :class:`ResultCache`
+        The results of the last queries
+    """
+
+    BATCH_SIZE = 32
+    # Files changed this recently can change again without a new mtime
+    RACY_TIME = 2 * 10**9
+
+    def __init__(self, workers: int = 0) -> None:
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.cache = ResultCache()
+
+    @property
+    def workers(self) -> int:
+        return self._workers or os.cpu_count() or 1
+
+    def setWorkers(self, workers: int) -> None:
+        """Sets the number of worker processes. The pool is recreated on the next search"""
+        if workers == self._workers:
+            return
+        self._workers = workers
+        self.shutdown()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def start(self) -> None:
+        """Starts the worker processes ahead of a search. Meant to be run in a :class:`Thread`
+
+        A spawned worker takes hundreds of milliseconds to start and import
+        this module, which would otherwise delay the first results of the
+        first search. Does nothing if the pool is already running.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+        executor = self.executor
+        try:
+            for _ in range(self.workers):
+                executor.submit(scanFiles, [], "", 0)
+        except (RuntimeError, BrokenProcessPool):
+            pass  # Shut down in the meantime
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def terminate(self) -> None:
+        """Kills the worker processes. Used to abort a runaway regex
+
+        Before Python 3.14 the pool has no public way to kill its processes,
+        so they're looked up in its private attributes, when it still has them.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if sys.version_info >= (3, 14):
+            return executor.terminate_workers()
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        if sys.version_info < (3, 12):
+            # The pool fails to break when it still tracks cancelled futures
+            workItems = getattr(executor, "_pending_work_items", {})
+            for id, workItem in list(workItems.items()):
+                workItem.future.cancelled() and workItems.pop(id, None)
+        executor.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+    def search(
+        self,
+        paths: Iterable[Path],
+        pattern: str,
+        flags: int,
+        buffers: dict[Path, str] | None = None,
+        cancelled: Callable[[], bool] = lambda: False,
+        revisions: dict[Path, int] | None = None,
+    ) -> Iterator[tuple[Path, int | None, Matches]]:
+        """Searches the files. Yields the matches of each file in the order of `paths`
+
+        Every file is yielded as `(path, mtime, records)`, see :func:`scanFiles`.
+        Files that didn't change since the query last ran aren't scanned again.
+
+        Parameters
+        ----------
+        paths: `Iterable[Path]`
+            The files to search
+        pattern: `str`
+            The regex to search for
+        flags: `int`
+            The regex flags
+        buffers: `Optional[dict[Path, str]]`
+            The text of opened files. Used instead of reading the file.
+        cancelled: `Callable[[], bool]`
+            Checked between files. The search stops once it returns `True`
+        revisions: `Optional[dict[Path, int]]`
+            The :attr:`Editor.revision` of every buffer. Used to cache their results
+        """
+        files = self._files(
+            takewhile(lambda _: not cancelled(), paths), buffers or {}, revisions or {}
+        )
+        batches = iter(lambda: list(islice(files, self.BATCH_SIZE)), [])
+        yield from self._parallelSearch(batches, pattern, flags, cancelled)
+        yield from self._localSearch(batches, pattern, flags, cancelled)
+
+    def _files(
+        self,
+        paths: Iterable[Path],
+        buffers: dict[Path, str],
+        revisions: dict[Path, int],
+    ) -> Iterator[File]:
+        """Yields every file as a :data:`File`. Skips the missing files"""
+        now = time.time_ns()
+        for path in paths:
+            if (text := buffers.get(path)) is not None:
+                revision = revisions.get(path)
+                yield str(path), text, None, revision
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            mtime = stat.st_mtime_ns
+            key = (mtime, stat.st_size) if now - mtime > self.RACY_TIME else None
+            yield str(path), None, mtime, key
+
+    def _split(
+        self, batch: list[File], pattern: str, flags: int
+    ) -> tuple[dict[str, Matches], list[tuple[str, str | None, int | None]]]:
+        """Splits a batch into the cached matches and the files left to scan"""
+        hits, misses = {}, []
+        for path, text, mtime, key in batch:
+            if key is not None:
+                if (records := self.cache.get(pattern, flags, path, key)) is not None:
+                    hits[path] = records
+                    continue
+            misses.append((path, text, mtime))
+        return hits, misses
+
+    def _merge(
+        self,
+        batch: list[File],
+        hits: dict[str, Matches],
+        found: list[tuple[str, int | None, Matches]],
+        pattern: str,
+        flags: int,
+    ) -> Iterator[tuple[Path, int | None, Matches]]:
+        """Yields the matches of a batch in order and caches the scanned files"""
+        scanned = {path: records for path, _, records in found}
+        for path, _, mtime, key in batch:
+            if (records := hits.get(path)) is None:
+                records = scanned.get(path, array("q"))
+                if key is not None:
+                    self.cache.put(pattern, flags, path, key, records)
+            if records:
+                yield Path(path), mtime, records
+
+    def _localSearch(
+        self,
+        batches: Iterable[list[File]],
+        pattern: str,
+        flags: int,
+        cancelled: Callable[[], bool],
+    ) -> Iterator[tuple[Path, int | None, Matches]]:
+        """Scans the batches in this process, when the pool is broken
+
+        `cancelled` is checked before every file, since a file scanned here
+        holds the GIL and can't be killed with :meth:`terminate`.
+        """
+        for batch in batches:
+            for file in batch:
+                if cancelled():
+                    return
+                hits, misses = self._split([file], pattern, flags)
+                found = scanFiles(misses, pattern, flags)
+                yield from self._merge([file], hits, found, pattern, flags)
+
+    def _parallelSearch(
+        self,
+        batches: Iterator[list[File]],
+        pattern: str,
+        flags: int,
+        cancelled: Callable[[], bool],
+    ) -> Iterator[tuple[Path, int | None, Matches]]:
+        """Scans the batches in the pool, keeping a few batches in flight per worker.
+
+        Only the files that aren't cached are sent to the pool, so a slow regex
+        doesn't hold the GIL of the window and can be killed with :meth:`terminate`.
+        If the pool breaks, the batches in flight are scanned in this process
+        by :meth:`_localSearch`, and so are the batches left by :meth:`search`.
+        """
+        pending: deque[list[Future | None, list, dict, list]] = deque()
+        executor = self.executor
+
+        def submit(batch: list[File]) -> None:
+            hits, misses = self._split(batch, pattern, flags)
+            pending.append([None, batch, hits, misses])
+            if misses:
+                pending[-1][0] = executor.submit(scanFiles, misses, pattern, flags)
+
+        try:
+            for batch in islice(batches, self.workers * 4):
+                submit(batch)
+            while pending:
+                future, batch, hits, _ = pending[0]
+                while future is not None and not wait((future,), 0.05).done:
+                    if cancelled():
+                        return
+                found = future.result() if future is not None else []
+                pending.popleft()
+                yield from self._merge(batch, hits, found, pattern, flags)
+                if not cancelled() and (batch := next(batches, None)):
+                    submit(batch)
+        except BrokenProcessPool:
+            self.shutdown() if executor is self._executor else ...
+            if cancelled():
+                return
+        finally:
+            if executor is self._executor:
+                for future, *_ in pending:
+                    future.cancel() if future else ...
+        inFlight = [batch for _, batch, *_ in pending]
+        yield from self._localSearch(inFlight, pattern, flags, cancelled)
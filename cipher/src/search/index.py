@@ -0,0 +1,429 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from pathlib import Path
+from array import array
+import threading
+import struct
+import json
+import sys
+import os
+import re
+
+from ..ignore import IgnoreRules
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python 3.10
+    import sre_parse
+
+if TYPE_CHECKING:
+    from ..filecache import FileCache
+
+__all__ = ("SearchIndex", "alternatives", "trigrams")
+
+MAGIC = b"CIPHERSI"
+# The version, then the sizes of the metadata, of the trigrams and of the posting ids
+HEADER = struct.Struct("<IQQQ")
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+_AT = sre_parse.AT
+_REPEATS = tuple(
+    getattr(sre_parse, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, name)
+)
+
+
+# Ascii characters that ignorecase also matches with a non ascii character (K, ſ, İ)
+_FOLDED = frozenset("IiKkSs")
+
+
+def _literals(items, runs: list[str], run: str = "", folded: bool = False) -> str:
+    """Collects the runs of characters every match of the parsed pattern must contain
+
+    Returns the run that is still open at the end of `items`
+    """
+    for op, av in items:
+        if op is _LITERAL and av < 128 and not (folded and chr(av) in _FOLDED):
+            run += chr(av)
+        elif op is _SUBPATTERN and not av[1] and not av[2]:
+            run = _literals(av[-1], runs, run, folded)
+        elif op is _AT:
+            continue
+        elif op in _REPEATS and av[0] >= 1:
+            runs.append(run)
+            runs.append(_literals(av[2], runs, "", folded))
+            run = ""
+        else:
+            runs.append(run)
+            run = ""
+    return run
+
+
+def alternatives(pattern: str) -> list[str]:
+    """Splits the pattern on the `|` that aren't in a group or a class"""
+    parts, start, depth, i = [], 0, 0, 0
+    inClass = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 1
+        elif inClass:
+            inClass = char != "]"
+        elif char == "[":
+            inClass = True
+            if pattern.startswith("]", i + 1) or pattern.startswith("^]", i + 1):
+                i += pattern.index("]", i + 1) - i
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and not depth:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def trigrams(text: str, flags: int = 0) -> set[bytes] | None:
+    """Returns the trigrams a file must contain to match the regex `text`.
+
+    Returns `None` if the pattern can't be narrowed down.
+    """
+    try:
+        parsed = sre_parse.parse(text, flags)
+    except Exception:
+        return None
+    flags = parsed.state.flags
+    folded = bool(flags & re.IGNORECASE) and not flags & re.ASCII
+    runs: list[str] = []
+    runs.append(_literals(parsed, runs, "", folded))
+    found = set()
+    for run in runs:
+        run = run.lower().encode("ascii")
+        found.update(run[i : i + 3] for i in range(len(run) - 2))
+    return found or None
+
+
+def _encode(
+    version: int, meta: bytes, grams: bytes, counts: array, ids: array
+) -> bytes:
+    """Lays out an index as its header, its metadata as JSON, then its postings"""
+    if sys.byteorder == "big":
+        counts.byteswap()
+        ids.byteswap()
+    header = HEADER.pack(version, len(meta), len(counts), len(ids))
+    return MAGIC + header + meta + grams + counts.tobytes() + ids.tobytes()
+
+
+def _decode(
+    data: bytes, version: int
+) -> tuple[
+    dict[int, tuple[str, int, int]], set[int], set[int], dict[bytes, set[int]], int
+]:
+    """Parses an index written by :func:`_encode`
+
+    Only JSON and arrays of integers are read, so a crafted file can't run
+    code. Raises `ValueError` if the data isn't an index of this version.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("not a search index")
+    offset = len(MAGIC) + HEADER.size
+    fileVersion, metaSize, gramCount, idCount = HEADER.unpack_from(data, len(MAGIC))
+    if fileVersion != version or len(data) != (
+        offset + metaSize + 3 * gramCount + 4 * (gramCount + idCount)
+    ):
+        raise ValueError("not a search index of this version")
+    meta = json.loads(data[offset : offset + metaSize])
+    offset += metaSize
+    grams = data[offset : offset + 3 * gramCount]
+    offset += 3 * gramCount
+    counts, ids = array("I"), array("I")
+    counts.frombytes(data[offset : offset + 4 * gramCount])
+    ids.frombytes(data[offset + 4 * gramCount :])
+    if sys.byteorder == "big":
+        counts.byteswap()
+        ids.byteswap()
+    if sum(counts) != idCount:
+        raise ValueError("the postings don't match their counts")
+    files = {
+        int(id): (str(path), int(mtime), int(size))
+        for id, path, mtime, size in meta["files"]
+    }
+    postings, start = {}, 0
+    for i, count in enumerate(counts):
+        postings[grams[3 * i : 3 * i + 3]] = set(ids[start : start + count])
+        start += count
+    unindexed = set(map(int, meta["unindexed"]))
+    skipped = set(map(int, meta["skipped"]))
+    return files, unindexed, skipped, postings, int(meta["stale"])
+
+
+class SearchIndex:
+    """A persistent trigram index of a workspace. Stored in `.cipher/search.index`
+
+    Every file is split into lowercased byte trigrams. A query is narrowed down
+    to the files holding every trigram of its literal parts before a file is read.
+    Files are indexed as bytes whatever their encoding, binary files are skipped.
+    The files ignored by the `.gitignore` and `.ignore` files are left out.
+    Changed files only get their new trigrams added, so a stale posting only ever
+    adds false positives. The index is rebuilt once too many postings are stale.
+    A refresh finds the changed files by comparing their mtime and size with
+    :meth:`isCurrent`. Saved files are reindexed at once with :meth:`update`.
+
+    Parameters
+    ----------
+    folder: `Path`
+        The workspace folder
+    cache: `Optional[FileCache]`
+        Filled with the info of every file read while indexing
+    """
+
+    VERSION = 3
+    MAX_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, folder: Path, cache: FileCache | None = None) -> None:
+        self.folder = folder
+        self.cache = cache
+        self.path = Path(os.path.join(folder, ".cipher", "search.index"))
+        self._lock = threading.RLock()
+        self._ready = False
+        self._dirty = False
+        self._refreshing = threading.Lock()
+        self._stale = 0
+        self._nextId = 0
+        self._ids: dict[str, int] = {}
+        self._files: dict[int, tuple[str, int, int]] = {}
+        self._unindexed: set[int] = set()
+        self._skipped: set[int] = set()
+        self._postings: dict[bytes, set[int]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the index has changes that aren't saved"""
+        return self._dirty
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def load(self) -> bool:
+        """Loads the index from disk. A file that doesn't parse is ignored
+
+        Returns
+        -------
+        bool
+            Whether the index was loaded
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            parsed = _decode(data, self.VERSION)
+        except Exception:
+            return False
+        files, unindexed, skipped, postings, stale = parsed
+        with self._lock:
+            self._files = files
+            self._unindexed = unindexed
+            self._skipped = skipped
+            self._postings = postings
+            self._stale = stale
+            self._ids = {file[0]: id for id, file in self._files.items()}
+            self._nextId = max(self._files, default=-1) + 1
+        return True
+
+    def save(self) -> None:
+        """Writes the index to `.cipher/search.index`"""
+        if not self.path.parent.exists():
+            return
+        with self._lock:
+            meta = {
+                "files": [[id, *file] for id, file in self._files.items()],
+                "unindexed": sorted(self._unindexed),
+                "skipped": sorted(self._skipped),
+                "stale": self._stale,
+            }
+            grams = b"".join(self._postings)
+            counts = array("I", map(len, self._postings.values()))
+            ids = array("I")
+            for posting in self._postings.values():
+                ids.extend(posting)
+            self._dirty = False
+        data = _encode(self.VERSION, json.dumps(meta).encode(), grams, counts, ids)
+        temp = f"{self.path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stale = 0
+            self._nextId = 0
+            self._dirty = True
+            self._ids.clear()
+            self._files.clear()
+            self._unindexed.clear()
+            self._skipped.clear()
+            self._postings.clear()
+
+    def build(self) -> None:
+        """Loads the index and brings it up to date. Meant to be run in a :class:`Thread`"""
+        if not self.load():
+            self.clear()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Indexes new and changed files and drops removed ones"""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        finally:
+            self._refreshing.release()
+
+    def _refresh(self) -> None:
+        with self._lock:
+            if self._stale > max(len(self._files) // 4, 1024):
+                self._ready = False
+                self.clear()
+        seen = set()
+        for entry in self._walk():
+            seen.add(entry.path)
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if self.isCurrent(entry.path, stat):
+                continue
+            self._index(entry.path, stat)
+        with self._lock:
+            for path in set(self._ids).difference(seen):
+                self._remove(path)
+        self._ready = True
+        if self._dirty:
+            self.save()
+
+    def update(self, path: Path) -> None:
+        """Reindexes a single file. Used when a file is saved"""
+        if not Path(path).is_relative_to(self.folder) or Path(path) == self.path:
+            return
+        path = str(path)
+        if IgnoreRules(self.folder).isIgnored(path, False):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._remove(path)
+            return
+        self._index(path, stat)
+
+    def isCurrent(self, path: str, stat: os.stat_result) -> bool:
+        """Whether the postings of a file were made from its current content
+
+        Files created or changed since the last refresh, by a checkout, a
+        build or another tool, aren't current until the next refresh. The
+        index file is always current.
+        """
+        if path == str(self.path):
+            return True
+        with self._lock:
+            if (id := self._ids.get(path)) is None:
+                return False
+            _, mtime, size = self._files[id]
+        return mtime == stat.st_mtime_ns and size == stat.st_size
+
+    def candidates(self, text: str, flags: int = 0) -> list[Path] | None:
+        """Returns the files that could match the regex `text`
+
+        Returns
+        -------
+        Optional[list[Path]]
+            The sorted candidate files. `None` if the index isn't ready
+            or the query has no literal part to narrow it down. The candidates
+            of each alternative of `foo|bar` are joined. Only exact for the
+            files that are :meth:`isCurrent`
+        """
+        if not self._ready:
+            return None
+        if grams := trigrams(text, flags):
+            queries = [grams]
+        elif len(parts := alternatives(text)) > 1:
+            try:
+                flags |= sre_parse.parse(text, flags).state.flags & re.IGNORECASE
+            except Exception:
+                return None
+            queries = [trigrams(part, flags) for part in parts]
+            if not all(queries):
+                return None
+        else:
+            return None
+        ids = set()
+        with self._lock:
+            for grams in queries:
+                postings = sorted(
+                    (self._postings.get(gram, ()) for gram in grams), key=len
+                )
+                ids.update(set(postings[0]).intersection(*postings[1:]))
+            ids.update(self._unindexed)
+            paths = [self._files[id][0] for id in ids if id in self._files]
+        return sorted(map(Path, paths))
+
+    def _walk(self):
+        path = str(self.path)
+        for entry in IgnoreRules(self.folder).walk():
+            if entry.path != path:
+                yield entry
+
+    def _index(self, path: str, stat: os.stat_result) -> None:
+        grams, unindexed, skipped = set(), stat.st_size > self.MAX_SIZE, False
+        if not unindexed:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                with self._lock:
+                    self._remove(path)
+                return
+            if self.cache is not None:
+                self.cache.record(path, stat, data)
+            if b"\0" in data[:1024]:
+                skipped = True
+            else:
+                data = data.lower()
+                grams = {data[i : i + 3] for i in range(len(data) - 2)}
+
+        with self._lock:
+            if (id := self._ids.get(path)) is None:
+                id = self._ids[path] = self._nextId
+                self._nextId += 1
+            elif id not in self._unindexed and id not in self._skipped:
+                self._stale += 1
+            self._files[id] = (path, stat.st_mtime_ns, stat.st_size)
+            self._dirty = True
+            self._unindexed.discard(id)
+            self._skipped.discard(id)
+            if unindexed:
+                return self._unindexed.add(id)
+            if skipped:
+                return self._skipped.add(id)
+            postings = self._postings
+            for gram in grams:
+                if (ids := postings.get(gram)) is None:
+                    postings[gram] = {id}
+                else:
+                    ids.add(id)
+
+    def _remove(self, path: str) -> None:
+        if (id := self._ids.pop(path, None)) is None:
+            return
+        self._files.pop(id, None)
+        self._unindexed.discard(id)
+        self._skipped.discard(id)
+        self._stale += 1
+        self._dirty = True
@@ -1,20 +1,68 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, NamedTuple
 from pathlib import Path
+import os
 
-from PyQt6.QtGui import QStandardItem
+if TYPE_CHECKING:
+    from cipher import Editor
 
 __all__ = ("SearchMatch", "SearchFile")
 
 
-class SearchFile(QStandardItem):
-    def __init__(self, file: str):
-        super().__init__(file)
-        self.setEditable(False)
+class SearchFile(NamedTuple):
+    """A file in the search results
 
+    Attributes
+    ----------
+    path: `Path`
+        The path of the file
+    mtime: `Optional[int]`
+        The modification time of the file when it was scanned
+    revision: `Optional[int]`
+        The :attr:`Editor.revision` of the buffer that was scanned instead of the file
+    """
 
-class SearchMatch(QStandardItem):
-    def __init__(self, text: str, path: Path, index: int, cs):
-        super().__init__(text)
-        self.path = path
-        self._index = index
-        self.cs = cs
-        self.setEditable(False)
+    path: Path
+    mtime: int | None
+    revision: int | None
+
+    def isCurrent(self, editor: Editor) -> bool:
+        """Whether the editor still holds the text that was scanned"""
+        if self.revision is not None:
+            return editor.revision == self.revision
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        return mtime == self.mtime and not editor.isModified()
+
+
+class SearchMatch(NamedTuple):
+    """A match in the search results. Made on demand by :meth:`SearchModel.match`
+
+    Attributes
+    ----------
+    file: :class:`SearchFile`
+        The file of the match
+    start: `int`
+        The position of the start of the match
+    end: `int`
+        The position of the end of the match
+    line: `int`
+        The line of the match
+    column: `int`
+        The column of the match
+    text: `str`
+        The matched text
+    """
+
+    file: SearchFile
+    start: int
+    end: int
+    line: int
+    column: int
+    text: str
+
+    @property
+    def path(self) -> Path:
+        return self.file.path
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ..thread import Thread
+from .worker import SearchWorker
+
+if TYPE_CHECKING:
+    from .engine import SearchEngine
+
+__all__ = ("SearchJobs",)
+
+
+class SearchJobs(QObject):
+    """Runs one :class:`SearchWorker` at a time
+
+    Every search gets a new generation id. Starting a search cancels the
+    previous one and any batch it still sends is dropped.
+
+    Parameters
+    ----------
+    parent: `QObject`
+        The parent of the jobs
+    engine: :class:`SearchEngine`
+        The engine the workers scan with
+
+    Attributes
+    ----------
+    started: :class:`pyqtSignal`
+        Emitted with the generation when a search starts
+    found: :class:`pyqtSignal`
+        Emitted with the results of the current search
+    finished: :class:`pyqtSignal`
+        Emitted with the generation and whether it was cancelled when a search ends
+    """
+
+    started = pyqtSignal(int)
+    found = pyqtSignal(list)
+    finished = pyqtSignal(int, bool)
+
+    def __init__(self, parent: QObject, engine: SearchEngine) -> None:
+        super().__init__(parent)
+        self.engine = engine
+        self._generation = 0
+        self._worker: SearchWorker | None = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def isRunning(self) -> bool:
+        return self._worker is not None
+
+    def start(self, *args, **kwargs) -> int:
+        """Cancels the current search and starts a new one
+
+        Takes the arguments of :class:`SearchWorker` after `generation` and `engine`
+
+        Returns
+        -------
+        int
+            The generation of the new search
+        """
+        self.cancel()
+        self._generation += 1
+        worker = SearchWorker(self._generation, self.engine, *args, **kwargs)
+        worker.setParent(self)
+        worker.found.connect(self._found)
+        worker.finished.connect(self._finished)
+        self._worker = worker
+        self.started.emit(self._generation)
+        thread = Thread(self, worker.run)
+        thread.finished.connect(worker.deleteLater)
+        thread.start()
+        return self._generation
+
+    def cancel(self, terminate: bool = False) -> None:
+        """Cancels the current search
+
+        Parameters
+        ----------
+        terminate: `bool`
+            Kill the worker processes too, for a regex that never finishes, by default False
+        """
+        if (worker := self._worker) is None:
+            return
+        self._worker = None
+        # Cancelled first, so the worker doesn't scan its batches in this process
+        worker.cancel()
+        if terminate:
+            self.engine.terminate()
+        self.finished.emit(worker.generation, True)
+
+    def _found(self, generation: int, results: list) -> None:
+        if generation == self._generation and self._worker is not None:
+            self.found.emit(results)
+
+    def _finished(self, generation: int) -> None:
+        if generation != self._generation or self._worker is None:
+            return
+        self._worker = None
+        self.finished.emit(generation, False)
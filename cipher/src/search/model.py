@@ -1,114 +1,249 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
+from collections import OrderedDict, deque
+from array import array
 from pathlib import Path
-import os
+import time
 import re
 
-from PyQt6.QtGui import QStandardItemModel
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, QObject, Qt, QTimer
+from .engine import MATCH_FIELDS, SearchEngine, _compile
 from .item import *
 
 if TYPE_CHECKING:
     from cipher import Window
+    from .engine import Matches
 
 __all__ = ("SearchModel",)
 
 
-class SearchModel(QStandardItemModel):
+class SearchModel(QAbstractItemModel):
+    """The search results. Only ever touched from the GUI thread.
+
+    Every file is a top level row and its matches are its children. The
+    matches of every file are kept in one flat array of ints, so no object
+    is made per match. The text of a match is only read from the file, or
+    the buffer that was searched, when its row is shown, and the text of
+    the last shown rows is cached.
+
+    Results sent by the :class:`SearchWorker` are queued by :meth:`addResults`
+    and inserted in time slices so the window stays responsive.
+    """
+
+    TIME_SLICE = 0.008
+    PREVIEW_LENGTH = 200
+    CACHE_SIZE = 1024
+
     def __init__(self, parent, window: Window):
         super().__init__(parent)
-        self.rootNode = self.invisibleRootItem()
         self._window = window
+        self.engine = SearchEngine()
+        self._currentFolder: Path | None = None
+        self._revisions: dict[Path, int] = {}
+        self._buffers: dict[Path, str | bytes] = {}
+        self.pattern = ""
+        self.flags = 0
+        self.replacement: str | None = None
+        self.paths: list[Path] = []
+        self.fileCount = 0
+        self.matchCount = 0
+        self._files: list[SearchFile] = []
+        self._first = array("q", [0])
+        self._matches = array("q")
+        self._cache: OrderedDict[tuple[int, int], str] = OrderedDict()
+        self._pending: deque[tuple[Path, int | None, Matches]] = deque()
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._appendPending)
 
     @property
     def window(self) -> Window:
         return self._window
 
-    def isBinary(self, path: Path) -> None:
-        with open(path, "rb") as f:
-            return b"\0" in f.read(1024)
+    @property
+    def isAppending(self) -> bool:
+        """Whether there are queued results that aren't in the model yet"""
+        return bool(self._pending)
 
-    def recursiveSearch(
-        self,
-        folder: Path,
-        currentFolder: Path,
-        text: str,
-        cs: re._FlagsType,
-        pattern: list[str],
-        excluded: list[str],
-    ):
-        for dirEntry in os.scandir(folder):
-            if dirEntry.name in excluded:
-                continue
-            path = Path(dirEntry.path)
-            if path.is_file():
-                if pattern and path.suffix not in pattern:
-                    continue
-                editor = self._window.tabView.getTab(path)
-                try:
-                    found = tuple(
-                        (
-                            SearchMatch(match.group(), path, i, cs)
-                            for i, match in enumerate(
-                                re.compile(rf"{text}", cs).finditer(
-                                    path.read_text("utf-8")
-                                    if not editor
-                                    else editor.text()
-                                )
-                            )
-                        )
-                    )
-                    if not found:
-                        continue
-                    file = SearchFile(str(path.relative_to(currentFolder)))
-                    file.appendRows(found)
-                    self.appendRow(file)
-                except Exception:
-                    continue
-            elif path.is_dir():
-                self.recursiveSearch(path, currentFolder, text, cs, pattern, excluded)
-
-    def search(
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, child: QModelIndex | None = None):
+        if child is None:
+            return QObject.parent(self)
+        if not child.isValid() or not child.internalId():
+            return QModelIndex()
+        return self.createIndex(child.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if not parent.isValid():
+            return len(self._files)
+        if parent.internalId():
+            return 0
+        row = parent.row()
+        return self._first[row + 1] - self._first[row]
+
+    def columnCount(self, _: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if not (id := index.internalId()):
+            path = self._files[index.row()].path
+            return str(path.relative_to(self._currentFolder))
+        key = (id - 1, index.row())
+        if (text := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            return text
+        text = self._display(*key)
+        self._cache[key] = text
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return text
+
+    def file(self, index: QModelIndex) -> SearchFile | None:
+        """The file of a row, or the file of the match"""
+        if not index.isValid():
+            return None
+        id = index.internalId()
+        return self._files[id - 1 if id else index.row()]
+
+    def match(self, index: QModelIndex) -> SearchMatch | None:
+        """The match of a row. `None` if the row is a file"""
+        if not index.isValid() or not (id := index.internalId()):
+            return None
+        file = self._files[id - 1]
+        start, end, line, column = self._record(id - 1, index.row())
+        data, offset = self._read(file, start, end)
+        text = data[offset : offset + end - start].decode("utf-8", "replace")
+        return SearchMatch(file, start, end, line, column, text)
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._timer.stop()
+        self._pending.clear()
+        self._cache.clear()
+        self._files.clear()
+        self._first = array("q", [0])
+        self._matches = array("q")
+        self.endResetModel()
+
+    def reset(
         self,
-        currentFolder: Path,
-        text: str,
-        case: bool,
-        pattern: list[str],
-        excluded: list[str],
-    ):
+        currentFolder: Path | None,
+        revisions: dict[Path, int] | None = None,
+        pattern: str = "",
+        flags: int = 0,
+        buffers: dict[Path, str] | None = None,
+    ) -> None:
+        """Clears the model for a new search
+
+        Parameters
+        ----------
+        currentFolder: `Optional[Path]`
+            The workspace folder
+        revisions: `Optional[dict[Path, int]]`
+            The :attr:`Editor.revision` of every buffer that is searched
+        pattern: `str`
+            The regex that is searched
+        flags: `int`
+            The regex flags
+        buffers: `Optional[dict[Path, str]]`
+            The text of every buffer that is searched. Used to show their matches.
+        """
         self.clear()
+        self.paths.clear()
+        self.fileCount = self.matchCount = 0
+        self._currentFolder = currentFolder
+        self._revisions = revisions or {}
+        self._buffers = dict(buffers or {})
+        self.pattern = pattern
+        self.flags = flags
+
+    def setReplacement(self, replacement: str | None) -> None:
+        """Previews the replacement of every match. `None` stops the preview"""
+        self.replacement = replacement
+        self._cache.clear()
+
+    def preview(self, text: str) -> str:
+        """The text a match is replaced with"""
+        try:
+            regex = _compile(self.pattern, self.flags)
+            if match := regex.fullmatch(text):
+                return match.expand(self.replacement)
+            return regex.sub(self.replacement, text)
+        except (re.error, IndexError):
+            return self.replacement
+
+    def addResults(self, results: list[tuple[Path, int | None, Matches]]) -> None:
+        """Queues a batch of results sent by the :class:`SearchWorker`"""
+        self.paths.extend(path for path, *_ in results)
+        self.fileCount += len(results)
+        self.matchCount += sum(len(records) for *_, records in results) // MATCH_FIELDS
+        self._pending.extend(results)
+        if not self._timer.isActive():
+            self._appendPending()
+            self._timer.start() if self.isAppending else ...
+
+    def _appendPending(self) -> None:
+        """Inserts queued files until the time slice runs out"""
+        if not self._pending:
+            return self._timer.stop()
+        end = time.perf_counter() + self.TIME_SLICE
+        first = last = len(self._files)
+        batch = []
+        while self._pending and time.perf_counter() < end:
+            batch.append(self._pending.popleft())
+            last += 1
+        self.beginInsertRows(QModelIndex(), first, last - 1)
+        for path, mtime, records in batch:
+            revision = self._revisions.get(path) if mtime is None else None
+            self._files.append(SearchFile(path, mtime, revision))
+            self._matches.extend(records)
+            self._first.append(len(self._matches) // MATCH_FIELDS)
+        self.endInsertRows()
+
+    def _record(self, file: int, row: int) -> tuple[int, int, int, int]:
+        start = (self._first[file] + row) * MATCH_FIELDS
+        return tuple(self._matches[start : start + MATCH_FIELDS])
+
+    def _read(self, file: SearchFile, start: int, end: int) -> tuple[bytes, int]:
+        """Reads the bytes around a match
+
+        Returns
+        -------
+        tuple[bytes, int]
+            The bytes and the offset of the match in them
+        """
+        begin = max(start - self.PREVIEW_LENGTH, 0)
+        stop = min(end, start + self.PREVIEW_LENGTH) + self.PREVIEW_LENGTH
+        if (buffer := self._buffers.get(file.path)) is not None:
+            if isinstance(buffer, str):
+                buffer = self._buffers[file.path] = buffer.encode("utf-8", "replace")
+            return buffer[begin:stop], start - begin
+        try:
+            with open(file.path, "rb") as f:
+                f.seek(begin)
+                return f.read(stop - begin), start - begin
+        except OSError:
+            return b"", 0
 
-        if not text or not currentFolder:
-            return
-
-        cs = re.IGNORECASE if not case else 0
-
-        for dirEntry in os.scandir(currentFolder):
-            if dirEntry.name in excluded:
-                continue
-            path = Path(dirEntry.path)
-            if path.is_file():
-                if pattern and path.suffix not in pattern:
-                    continue
-                editor = self._window.tabView.getTab(path)
-                try:
-                    found = tuple(
-                        (
-                            SearchMatch(match.group(), path, i)
-                            for i, match in enumerate(
-                                re.compile(rf"{text}", cs).finditer(
-                                    path.read_text("utf-8")
-                                    if not editor
-                                    else editor.text()
-                                )
-                            )
-                        )
-                    )
-                    if not found:
-                        continue
-                    file = SearchFile(str(path.relative_to(currentFolder)))
-                    file.appendRows(found)
-                    self.appendRow(file)
-                except Exception:
-                    continue
-            elif path.is_dir():
-                self.recursiveSearch(path, currentFolder, text, cs, pattern, excluded)
+    def _display(self, file: int, row: int) -> str:
+        """The text shown for a match: its line, or the replacement being previewed"""
+        start, end, *_ = self._record(file, row)
+        data, offset = self._read(self._files[file], start, end)
+        if self.replacement is not None:
+            text = data[offset : offset + end - start].decode("utf-8", "replace")
+            return f"{text} → {self.preview(text)}"
+        lineStart = data.rfind(b"\n", 0, offset) + 1
+        if not lineStart:
+            while lineStart < offset and data[lineStart] & 0xC0 == 0x80:
+                lineStart += 1
+        lineEnd = data.find(b"\n", offset)
+        line = data[lineStart : lineEnd if lineEnd >= 0 else len(data)]
+        return line.decode("utf-8", "replace").strip()
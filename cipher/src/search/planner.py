@@ -0,0 +1,218 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Iterator
+import mmap
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python 3.10
+    import sre_parse
+
+from .index import _FOLDED, _REPEATS
+
+__all__ = (
+    "Scanner",
+    "RegexScanner",
+    "LiteralScanner",
+    "PrefixScanner",
+    "plan",
+)
+
+CHUNK_SIZE = 1024 * 1024
+# The shortest literal prefix worth a prefilter
+MIN_PREFIX = 3
+
+Buffer = bytes | mmap.mmap
+
+
+def _bytesSafe(items, folded: bool) -> bool:
+    """Whether the parsed pattern matches the same text as a str and as utf-8 bytes
+
+    Anything that matches a single character (`.`, `\\w`, `[^a]`) or depends on
+    unicode (`\\b`, case folding of `IiKkSs`) would match differently on bytes.
+    """
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            if av >= 128 or (folded and chr(av) in _FOLDED):
+                return False
+        elif op is sre_parse.IN:
+            for setOp, setAv in av:
+                if setOp is sre_parse.LITERAL:
+                    setAv = (setAv, setAv)
+                elif setOp is not sre_parse.RANGE:
+                    return False
+                low, high = setAv
+                if high >= 128 or (
+                    folded and any(low <= ord(char) <= high for char in _FOLDED)
+                ):
+                    return False
+        elif op is sre_parse.SUBPATTERN:
+            _, addFlags, delFlags, subpattern = av
+            subFolded = (folded or bool(addFlags & re.IGNORECASE)) and not (
+                delFlags & re.IGNORECASE
+            )
+            if not _bytesSafe(subpattern, subFolded):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_bytesSafe(branch, folded) for branch in av[1]):
+                return False
+        elif op in _REPEATS:
+            if not _bytesSafe(av[2], folded):
+                return False
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if not _bytesSafe(av[1], folded):
+                return False
+        elif op is sre_parse.AT:
+            if av in (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY):
+                return False
+        elif op is not sre_parse.GROUPREF:
+            return False
+    return True
+
+
+def _literal(items) -> bytes | None:
+    """The text of a parsed pattern made only of literals"""
+    if items and all(op is sre_parse.LITERAL for op, _ in items):
+        return bytes(av for _, av in items)
+    return None
+
+
+def _prefix(items) -> bytes:
+    """The literal text every match of the parsed pattern starts with"""
+    prefix = bytearray()
+    for op, av in items:
+        if op is not sre_parse.LITERAL:
+            break
+        prefix.append(av)
+    return bytes(prefix)
+
+
+def _chunks(data: Buffer, overlap: int) -> Iterator[tuple[int, bytes]]:
+    """Yields lowercased chunks of the data, each overlapping the next one"""
+    for offset in range(0, len(data), CHUNK_SIZE):
+        yield offset, data[offset : offset + CHUNK_SIZE + overlap].lower()
+
+
+class Scanner:
+    """Finds the matches of a query in utf-8 bytes
+
+    Parameters
+    ----------
+    regex: `re.Pattern[bytes]`
+        The compiled query. Used to check the candidates of the fast paths.
+    """
+
+    def __init__(self, regex: re.Pattern[bytes]) -> None:
+        self.regex = regex
+
+    def finditer(self, data: Buffer) -> Iterator[tuple[int, int]]:
+        """Yields the `(start, end)` of every match, like `re.finditer` would"""
+        raise NotImplementedError
+
+
+class RegexScanner(Scanner):
+    """Runs the regex over the data"""
+
+    def finditer(self, data: Buffer) -> Iterator[tuple[int, int]]:
+        return (match.span() for match in self.regex.finditer(data))
+
+
+class LiteralScanner(Scanner):
+    """Looks for a plain string with `bytes.find`. Folded queries scan lowercased chunks
+
+    Parameters
+    ----------
+    regex: `re.Pattern[bytes]`
+        The compiled query
+    literal: `bytes`
+        The string to look for
+    folded: `bool`
+        Whether the search ignores the case
+    """
+
+    def __init__(self, regex: re.Pattern[bytes], literal: bytes, folded: bool) -> None:
+        super().__init__(regex)
+        self.literal = literal.lower() if folded else literal
+        self.folded = folded
+
+    def finditer(self, data: Buffer) -> Iterator[tuple[int, int]]:
+        literal, length = self.literal, len(self.literal)
+        if not self.folded:
+            pos = data.find(literal)
+            while pos >= 0:
+                yield pos, pos + length
+                pos = data.find(literal, pos + length)
+            return
+        start = 0
+        for offset, chunk in _chunks(data, length - 1):
+            pos = chunk.find(literal, max(start - offset, 0))
+            while 0 <= pos < CHUNK_SIZE:
+                start = offset + pos + length
+                yield start - length, start
+                pos = chunk.find(literal, pos + length)
+
+
+class PrefixScanner(Scanner):
+    """Finds the fixed prefix of a folded query in lowercased chunks and
+    only runs the regex where the prefix is found.
+
+    Parameters
+    ----------
+    regex: `re.Pattern[bytes]`
+        The compiled query
+    prefix: `bytes`
+        The literal text every match starts with
+    """
+
+    def __init__(self, regex: re.Pattern[bytes], prefix: bytes) -> None:
+        super().__init__(regex)
+        self.prefix = prefix.lower()
+
+    def finditer(self, data: Buffer) -> Iterator[tuple[int, int]]:
+        prefix, match = self.prefix, self.regex.match
+        start = 0
+        for offset, chunk in _chunks(data, len(prefix) - 1):
+            pos = chunk.find(prefix, max(start - offset, 0))
+            while 0 <= pos < CHUNK_SIZE:
+                if found := match(data, offset + pos):
+                    yield found.span()
+                    start = found.end()
+                    pos = chunk.find(prefix, max(start - offset, pos + 1))
+                else:
+                    pos = chunk.find(prefix, pos + 1)
+
+
+@lru_cache(maxsize=16)
+def plan(pattern: str, flags: int) -> Scanner | None:
+    """Picks the fastest way to run the query on bytes
+
+    * Plain strings are looked for with `bytes.find`
+    * Folded queries with a fixed prefix only run the regex where the prefix is
+    * Anything else runs the regex
+
+    Returns
+    -------
+    Optional[Scanner]
+        `None` if the query would match differently on bytes
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    folded = bool(parsed.state.flags & re.IGNORECASE)
+    if not pattern.isascii() or not _bytesSafe(parsed, folded):
+        return None
+    try:
+        regex = re.compile(pattern.encode("ascii"), flags)
+    except re.error:
+        return None
+    if parsed.state.flags & ~(re.IGNORECASE | re.UNICODE):
+        return RegexScanner(regex)
+
+    if (literal := _literal(parsed)) is not None:
+        return LiteralScanner(regex, literal, folded)
+
+    if folded and len(_prefix(parsed)) >= MIN_PREFIX:
+        return PrefixScanner(regex, _prefix(parsed))
+    return RegexScanner(regex)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterable
+from pathlib import Path
+import re
+
+from .engine import _compile
+from ..tabview.saver import writeAtomic
+
+if TYPE_CHECKING:
+    from cipher import Editor
+    from .index import SearchIndex
+
+__all__ = ("writeAtomic", "replaceInEditor", "replaceInFile", "replaceInFiles")
+
+
+def replaceInEditor(editor: Editor, pattern: str, flags: int, replacement: str) -> int:
+    """Replaces the matches in an opened editor as a single undo action
+
+    Returns
+    -------
+    int
+        The number of replaced matches
+    """
+    text = editor.text()
+    edits, pos, offset = [], 0, 0
+    for match in _compile(pattern, flags).finditer(text):
+        start = match.start()
+        offset += len(text[pos:start].encode("utf-8", "surrogatepass"))
+        pos = start
+        end = offset + len(match.group().encode("utf-8", "surrogatepass"))
+        edits.append((offset, end, match.expand(replacement).encode("utf-8")))
+    if not edits:
+        return 0
+    editor.beginUndoAction()
+    for start, end, new in reversed(edits):
+        editor.SendScintilla(editor.SCI_SETTARGETRANGE, start, end)
+        editor.SendScintilla(editor.SCI_REPLACETARGET, len(new), new)
+    editor.endUndoAction()
+    return len(edits)
+
+
+def replaceInFile(path: Path, pattern: str, flags: int, replacement: str) -> int:
+    """Replaces the matches in a file and writes it with :func:`writeAtomic`
+
+    Returns
+    -------
+    int
+        The number of replaced matches
+    """
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    text, count = _compile(pattern, flags).subn(replacement, text)
+    if count:
+        writeAtomic(path, text.encode("utf-8"))
+    return count
+
+
+def replaceInFiles(
+    paths: Iterable[Path],
+    pattern: str,
+    flags: int,
+    replacement: str,
+    index: SearchIndex | None = None,
+) -> tuple[int, int, list[Path]]:
+    """Replaces the matches in every file. Meant to be run in a :class:`Thread`
+
+    Parameters
+    ----------
+    paths: `Iterable[Path]`
+        The files to rewrite
+    pattern: `str`
+        The regex to replace
+    flags: `int`
+        The regex flags
+    replacement: `str`
+        The replacement. Can refer to groups like `re.sub`
+    index: `Optional[SearchIndex]`
+        Updated with every rewritten file
+
+    Returns
+    -------
+    tuple[int, int, list[Path]]
+        The number of replaced matches, of rewritten files and the files that failed
+    """
+    count, files, failed = 0, 0, []
+    for path in paths:
+        try:
+            replaced = replaceInFile(path, pattern, flags, replacement)
+        except (OSError, UnicodeDecodeError, re.error):
+            failed.append(path)
+            continue
+        if replaced:
+            count += replaced
+            files += 1
+            if index is not None:
+                index.update(path)
+    return count, files, failed
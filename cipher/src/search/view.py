@@ -1,25 +1,51 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
+from pathlib import Path
 import re
 
-from PyQt6.QtCore import QModelIndex, Qt
-from PyQt6.QtWidgets import QSizePolicy, QTreeView
+from PyQt6.QtCore import QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QSizePolicy, QTreeView
 
+from ..tabview import Editor, LargeFile
 from ..thread import Thread
+from .index import SearchIndex
+from .job import SearchJobs
 from .model import SearchModel
 from .item import SearchMatch
+from .replace import replaceInEditor, replaceInFiles
 
 if TYPE_CHECKING:
     from PyQt6.QtWidgets import QWidget
-    from cipher import Window
+    from cipher import Window, Tab
 
 __all__ = ("SearchView",)
 
 
 class SearchView(QTreeView):
+    """The results of the workspace search
+
+    The :class:`SearchIndex` is refreshed `REFRESH_DELAY` milliseconds after
+    files are created, renamed or removed in the tree, and when the
+    application is activated again, since files are mostly changed by other
+    programs while it's in the background. Saved and replaced files are
+    reindexed at once.
+
+    Attributes
+    ----------
+    replaced: :class:`pyqtSignal`
+        Emitted with the number of replaced matches, of changed files and
+        of files that couldn't be written once a replace ends
+    """
+
+    REFRESH_DELAY = 1000
+
+    replaced = pyqtSignal(int, int, int)
+
     def __init__(self, parent: QWidget, window: Window, *args, **kwargs) -> None:
         super().__init__(parent, *args, **kwargs)
         self._window = window
+        self._index: SearchIndex | None = None
+        self._replacing = False
         self.setObjectName("SearchView")
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.setSelectionMode(QTreeView.SelectionMode.SingleSelection)
@@ -27,34 +53,206 @@ class SearchView(QTreeView):
         self.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
         self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
         self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
 
         self.__searchModel = SearchModel(self, window)
         self.setModel(self.__searchModel)
+        self.jobs = SearchJobs(self, self.__searchModel.engine)
+        self.jobs.found.connect(self.__searchModel.addResults)
 
         self.clicked.connect(self.view)
+        self.__searchModel.rowsInserted.connect(self._expandFile)
+        window.fileManager.workspaceChanged.connect(self.setWorkspace)
+        window.fileManager.fileSaved.connect(self.updateIndex)
+        window.tabView.tabClosed.connect(self.forgetResults)
+        window.closed.connect(self.saveIndex)
+        window.closed.connect(self.jobs.cancel)
+        window.closed.connect(self.__searchModel.engine.shutdown)
+
+        self._refreshTimer = QTimer(self)
+        self._refreshTimer.setSingleShot(True)
+        self._refreshTimer.setInterval(self.REFRESH_DELAY)
+        self._refreshTimer.timeout.connect(self.refreshIndex)
+        fileManager = window.fileManager
+        fileManager.fileCreated.connect(self.scheduleRefresh)
+        fileManager.fileRenamed.connect(self.scheduleRefresh)
+        fileManager.fileRemoved.connect(self.scheduleRefresh)
+        QApplication.instance().applicationStateChanged.connect(
+            lambda state: (
+                self.scheduleRefresh()
+                if state == Qt.ApplicationState.ApplicationActive
+                else ...
+            )
+        )
+
+    def prepare(self) -> None:
+        """Starts the search processes in the background. Called when the panel opens"""
+        engine = self.__searchModel.engine
+        engine.setWorkers(self._window.settings["search-workers"])
+        Thread(self, engine.start).start()
+
+    @property
+    def searchIndex(self) -> SearchIndex | None:
+        """The trigram index of the current workspace"""
+        return self._index
+
+    def setWorkspace(self, folder: Path | None) -> None:
+        """Builds the :class:`SearchIndex` of the new workspace in the background"""
+        self.jobs.cancel()
+        self.__searchModel.engine.cache.clear()
+        if self._index is not None and self._index.dirty:
+            Thread(self, self._index.save).start()
+        self.__searchModel.clear()
+        self._index = SearchIndex(folder, self._window.fileCache) if folder else None
+        if self._index is not None:
+            Thread(self, self._index.build).start()
+
+    def saveIndex(self) -> None:
+        if self._index is not None and self._index.dirty:
+            self._index.save()
+
+    def forgetResults(self, tab: Tab) -> None:
+        """Drops the cached results of a file. The results of a closed buffer are never reused"""
+        self.__searchModel.engine.cache.invalidate(tab.path)
+
+    def updateIndex(self, tab: Tab) -> None:
+        self.forgetResults(tab)
+        if self._index is not None:
+            Thread(self, self._index.update, tab.path).start()
+
+    def _expandFile(self, parent: QModelIndex, first: int, last: int) -> None:
+        """Expands the files as soon as they're added to the results"""
+        if not parent.isValid():
+            for row in range(first, last + 1):
+                self.expand(self.__searchModel.index(row, 0))
 
     def view(self, index: QModelIndex):
-        item = self.__searchModel.itemFromIndex(index)
-        if isinstance(item, SearchMatch):
-            if not (editor := self._window.tabView.getTab(item.path)):
-                editor = self._window.tabView.createTab(item.path)
-            for i, match in enumerate(
-                re.compile(rf"{item.text()}", item.cs).finditer(editor.text())
-            ):
-                if i == item._index:
-                    start = editor.lineIndexFromPosition(match.start())
-                    end = editor.lineIndexFromPosition(match.end())
-                    return editor.setSelection(*start, *end)
+        if match := self.__searchModel.match(index):
+            tabView = self._window.tabView
+            if editor := tabView.getTab(match.path):
+                tabView.setCurrentWidget(editor)
+            else:
+                editor = tabView.createTab(match.path)
+            if isinstance(editor, LargeFile):
+                editor.showLine(match.line, match.text)
+            elif isinstance(editor, Editor):
+                editor.whenLoaded(lambda: self.select(editor, match))
+            return
         if self.isExpanded(index):
             return self.collapse(index)
         return self.expand(index)
 
+    def select(self, editor: Editor, match: SearchMatch) -> None:
+        """Selects the match in the editor
+
+        The stored positions are used as long as the editor holds the text that
+        was scanned. Otherwise the match is looked for from the line it was on.
+        """
+        if match.file.isCurrent(editor):
+            return editor.SendScintilla(editor.SCI_SETSEL, match.start, match.end)
+        if not editor.findFirst(
+            match.text, False, True, False, False, True, match.line, 0, True
+        ):
+            editor.setCursorPosition(match.line, match.column)
+
     def search(self, text: str, case: bool = False):
-        currentFolder = self._window.currentFolder
-        pattern = self._window.settings["search-pattern"]
-        exclude = self._window.settings["search-exclude"]
+        window = self._window
+        model = self.__searchModel
+        tabs = [
+            tab
+            for tab in window.tabView.tabList
+            if isinstance(tab, Editor) and not tab.isLoading
+        ]
+        buffers = {tab.path: tab.text() for tab in tabs} if text else {}
+        revisions = {tab.path: tab.revision for tab in tabs}
+        model.reset(
+            window.currentFolder,
+            revisions,
+            rf"{text}",
+            re.IGNORECASE if not case else 0,
+            buffers,
+        )
+        if not text:
+            return self.jobs.cancel()
+        model.engine.setWorkers(window.settings["search-workers"])
+        self.jobs.start(
+            window.currentFolder,
+            text,
+            case,
+            window.settings["search-pattern"],
+            window.settings["search-exclude"],
+            self._index,
+            buffers,
+            revisions,
+            window.fileCache,
+        )
+
+    def cancel(self) -> None:
+        """Cancels the running search and kills a runaway regex"""
+        self.jobs.cancel(terminate=True)
+
+    @property
+    def isReplacing(self) -> bool:
+        return self._replacing
+
+    def setReplacement(self, replacement: str | None) -> None:
+        """Previews the replacement next to every match. `None` stops the preview"""
+        self.__searchModel.setReplacement(replacement)
+        self.viewport().update()
+
+    def replaceAll(self, replacement: str) -> bool:
+        """Replaces every match of the current results
+
+        Opened editors are changed in place as a single undo action and are
+        left unsaved. The other files are rewritten in a :class:`Thread`
+        through a temporary file renamed over each file.
+
+        Returns
+        -------
+        bool
+            Whether the replace started
+        """
+        model = self.__searchModel
+        if self._replacing or self.jobs.isRunning or not model.paths:
+            return False
+        pattern, flags = model.pattern, model.flags
+        try:
+            re.compile(pattern, flags).sub(replacement, "")
+        except re.error:
+            return False
+
+        count, files, paths = 0, 0, []
+        tabView = self._window.tabView
+        for path in model.paths:
+            editor = tabView.getTab(path)
+            if editor is None or isinstance(editor, LargeFile):
+                paths.append(path)
+            elif isinstance(editor, Editor):
+                if editor.isLoading:
+                    paths.append(path)
+                elif replaced := replaceInEditor(editor, pattern, flags, replacement):
+                    count += replaced
+                    files += 1
+
+        self._replacing = True
         thread = Thread(
-            self, self.__searchModel.search, currentFolder, text, case, pattern, exclude
+            self, replaceInFiles, paths, pattern, flags, replacement, self._index
         )
-        thread.finished.connect(self.expandAll)
+        thread.finished.connect(lambda result: self._replaced(count, files, result))
         thread.start()
+        return True
+
+    def _replaced(
+        self, count: int, files: int, result: tuple[int, int, list[Path]] | None
+    ) -> None:
+        self._replacing = False
+        replaced, changed, failed = result or (0, 0, [])
+        self.replaced.emit(count + replaced, files + changed, len(failed))
+
+    def scheduleRefresh(self, *_) -> None:
+        """Refreshes the index once no file changed for `REFRESH_DELAY` milliseconds"""
+        self._refreshTimer.start()
+
+    def refreshIndex(self) -> None:
+        if self._index is not None and self._index.ready:
+            Thread(self, self._index.refresh).start()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterator
+from pathlib import Path
+import threading
+import time
+import re
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ..ignore import IgnoreRules
+
+if TYPE_CHECKING:
+    from ..filecache import FileCache
+    from .engine import SearchEngine
+    from .index import SearchIndex
+
+__all__ = ("SearchWorker",)
+
+
+class SearchWorker(QObject):
+    """Walks the workspace and scans the files in a :class:`Thread`
+
+    The results are sent to the GUI thread in batches through :attr:`found`.
+    The worker never touches the :class:`SearchModel`.
+
+    Parameters
+    ----------
+    generation: `int`
+        The id of the search. Sent with every signal so stale results can be dropped
+    engine: :class:`SearchEngine`
+        The engine that scans the files
+    currentFolder: `Path`
+        The workspace folder
+    text: `str`
+        The regex to search for
+    case: `bool`
+        Whether the search is case sensitive
+    pattern: `list[str]`
+        The patterns of the files to search. Every file is searched if empty
+    excluded: `list[str]`
+        The patterns of the files and folders to skip
+    index: `Optional[SearchIndex]`
+        The trigram index of the workspace
+    buffers: `dict[Path, str]`
+        A snapshot of the text of every opened :class:`Editor`
+    revisions: `dict[Path, int]`
+        The :attr:`Editor.revision` of every snapshot
+    cache: `Optional[FileCache]`
+        Used to skip the files known to be binary without opening them
+
+    Attributes
+    ----------
+    found: :class:`pyqtSignal`
+        Emitted with the generation and a list of `(path, mtime, records)` of the files that matched
+    finished: :class:`pyqtSignal`
+        Emitted with the generation once every file is scanned or the search is cancelled
+    """
+
+    BATCH_INTERVAL = 0.02
+
+    found = pyqtSignal(int, list)
+    finished = pyqtSignal(int)
+
+    def __init__(
+        self,
+        generation: int,
+        engine: SearchEngine,
+        currentFolder: Path,
+        text: str,
+        case: bool,
+        pattern: list[str],
+        excluded: list[str],
+        index: SearchIndex | None,
+        buffers: dict[Path, str],
+        revisions: dict[Path, int],
+        cache: FileCache | None = None,
+    ) -> None:
+        super().__init__()
+        self.generation = generation
+        self._cancelled = threading.Event()
+        self.engine = engine
+        self.currentFolder = currentFolder
+        self.text = text
+        self.flags = re.IGNORECASE if not case else 0
+        self.pattern = pattern
+        self.excluded = excluded
+        self.index = index
+        self.buffers = buffers
+        self.revisions = revisions
+        self.cache = cache
+        self.rules: IgnoreRules | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stops the search. The worker stops at the next file it checks"""
+        self._cancelled.set()
+
+    def recursiveSearch(self, folder: Path) -> Iterator[Path]:
+        """Walks the folder and yields every file that should be searched
+
+        Ignored folders are pruned by :class:`IgnoreRules` and never opened.
+        Binary files already in the :class:`FileCache`, and unchanged since, are
+        skipped.
+        """
+        cache = self.cache
+        for entry in self.rules.walk(folder):
+            if self.cancelled:
+                return
+            if cache is not None:
+                try:
+                    info = cache.peek(entry.path, entry.stat())
+                except OSError:
+                    continue
+                if info is not None and info.isBinary:
+                    continue
+            yield Path(entry.path)
+
+    def indexedSearch(self) -> list[Path] | None:
+        """Narrows the files to search using the :class:`SearchIndex`
+
+        Only the candidates of the index and the opened files are searched,
+        nothing is walked or stat'ed. Saved files are indexed as they are
+        saved, and the :class:`SearchView` refreshes the index for the files
+        changed outside the editor.
+
+        Returns
+        -------
+        Optional[list[Path]]
+            The files to search. `None` if the index can't narrow down the query.
+        """
+        if (candidates := self.index.candidates(self.text, self.flags)) is None:
+            return None
+        currentFolder = self.currentFolder
+        paths = set(candidates)
+        paths.update(
+            path for path in self.buffers if path.is_relative_to(currentFolder)
+        )
+        return [path for path in sorted(paths) if not self.rules.isIgnored(path, False)]
+
+    def run(self) -> None:
+        try:
+            self.search()
+        finally:
+            self.finished.emit(self.generation)
+
+    def search(self) -> None:
+        if not self.text or not self.currentFolder:
+            return
+        try:
+            re.compile(rf"{self.text}", self.flags)
+        except re.error:
+            return
+
+        self.rules = IgnoreRules(self.currentFolder, self.excluded, self.pattern)
+        paths = self.indexedSearch() if self.index is not None else None
+        if paths is None:
+            paths = self.recursiveSearch(self.currentFolder)
+
+        batch, last = [], 0.0
+        results = self.engine.search(
+            paths,
+            rf"{self.text}",
+            self.flags,
+            self.buffers,
+            self._cancelled.is_set,
+            self.revisions,
+        )
+        for result in results:
+            if self.cancelled:
+                return results.close()
+            batch.append(result)
+            if (now := time.perf_counter()) - last >= self.BATCH_INTERVAL:
+                self.found.emit(self.generation, batch)
+                batch, last = [], now
+        if batch and not self.cancelled:
+            self.found.emit(self.generation, batch)
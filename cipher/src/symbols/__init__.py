@@ -0,0 +1,112 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+from pathlib import Path
+import os
+
+from .index import *
+from .scanner import *
+from ..quickopen import Palette
+from ..tabview import Editor
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+    from cipher import Tab
+
+__all__ = ("SymbolPicker", "SymbolIndex", "Symbol")
+
+
+class SymbolPicker(Palette):
+    """The "Go to Symbol in Workspace" palette
+
+    The definitions of the workspace are kept in a :class:`SymbolIndex`
+    built in the background when the workspace changes. A saved file is
+    scanned again right away and the other changed files when the palette
+    opens. The index is saved when the window closes.
+
+    Parameters
+    ----------
+    window: :class:`Window`
+        The window
+    """
+
+    def __init__(self, window: Window) -> None:
+        super().__init__(window, "Search symbols by name")
+        self.setObjectName("SymbolPicker")
+        self._index: SymbolIndex | None = None
+
+        window.fileManager.workspaceChanged.connect(self.setWorkspace)
+        window.fileManager.fileSaved.connect(self.updateIndex)
+        window.closed.connect(self.saveIndex)
+
+    @property
+    def symbolIndex(self) -> SymbolIndex | None:
+        """The symbol index of the current workspace"""
+        return self._index
+
+    def setWorkspace(self, folder: Path | None) -> None:
+        """Builds the :class:`SymbolIndex` of the new workspace in the background"""
+        if self._index is not None and self._index.dirty:
+            Thread(self, self._index.save).start()
+        self._index = None
+        if folder is None:
+            return
+        languages = {
+            suffix: info["language"]
+            for suffix, info in self.window.theme.languages.items()
+        }
+        self._index = SymbolIndex(folder, languages, self.window.fileCache)
+        thread = Thread(self, self._index.build)
+        thread.finished.connect(lambda _: self.refresh())
+        thread.start()
+
+    def saveIndex(self) -> None:
+        if self._index is not None and self._index.dirty:
+            self._index.save()
+
+    def updateIndex(self, tab: Tab) -> None:
+        if self._index is not None:
+            thread = Thread(self, self._index.update, tab.path)
+            thread.finished.connect(lambda _: self.refresh())
+            thread.start()
+
+    def open(self) -> None:
+        if self._index is not None and self._index.ready:
+            thread = Thread(self, self._index.refresh)
+            thread.finished.connect(lambda _: self.refresh())
+            thread.start()
+        super().open()
+
+    def find(
+        self, query: str, limit: int, cancelled: Callable[[], bool]
+    ) -> list[tuple[tuple[Path, Symbol], str]] | None:
+        if (index := self._index) is None or not index.ready:
+            return []
+        if (found := index.find(query, limit, cancelled)) is None:
+            return None
+        results = []
+        for path, symbol in found:
+            relative = os.path.relpath(path, index.folder)
+            where = f"{relative}:{symbol.line + 1}"
+            if symbol.container:
+                where = f"{symbol.container}  {where}"
+            label = f"{symbol.name}  ({symbol.kind})  {where}"
+            results.append(((Path(path), symbol), label))
+        return results
+
+    def activate(self, data: tuple[Path, Symbol]) -> None:
+        """Opens the file of a symbol and selects its name"""
+        path, symbol = data
+        tabView = self.window.tabView
+        if editor := tabView.getTab(path):
+            tabView.setCurrentWidget(editor)
+        else:
+            editor = tabView.createTab(path)
+        if isinstance(editor, Editor):
+            editor.whenLoaded(lambda: self._select(editor, symbol))
+
+    def _select(self, editor: Editor, symbol: Symbol) -> None:
+        if not editor.findFirst(
+            symbol.name, False, True, True, False, True, symbol.line, 0, True
+        ):
+            editor.setCursorPosition(symbol.line, 0)
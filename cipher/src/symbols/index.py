@@ -0,0 +1,291 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+from array import array
+from pathlib import Path
+import threading
+import json
+import re
+import os
+
+from ..filecache import HEAD_SIZE, detect
+from ..ignore import IgnoreRules
+from ..quickopen.index import lowercase, scanLines, subsequence
+from .scanner import SCANNERS, Symbol
+
+if TYPE_CHECKING:
+    from ..filecache import FileCache
+
+__all__ = ("SymbolIndex",)
+
+
+def _tiers(query: str) -> tuple[re.Pattern[str], ...]:
+    """The regexes of the tiers of a query, best first"""
+    inName = subsequence(query, "\0\n")
+    return (
+        # The name starts with the query
+        re.compile(f"(?<=\n){re.escape(query)}[^\0\n]*\0"),
+        # The name holds the query
+        re.compile(f"{re.escape(query)}[^\0\n]*\0"),
+        # The name holds the characters of the query in order
+        re.compile(f"{inName}[^\0\n]*\0"),
+        # The qualified name holds them
+        re.compile(subsequence(query, "\n")),
+    )
+
+
+class SymbolIndex:
+    """A persistent index of the definitions of a workspace. Stored as JSON in `.cipher/symbols.index`
+
+    The files of the languages with a scanner are scanned for their classes,
+    functions and top level names: Python with `ast`, the others with a regex
+    over their lines. A file is only scanned again once its mtime or size
+    changes. The files ignored by the `.gitignore` and `.ignore` files are
+    left out.
+
+    The names are matched like the paths of a :class:`PathIndex`: every symbol
+    is a line of a single lowercased string, sorted by the length of its
+    name, so a query never reads a file.
+
+    Parameters
+    ----------
+    folder: `Path`
+        The workspace folder
+    languages: `dict[str, str]`
+        The language of every file suffix, like in `lexer.json`
+    cache: `Optional[FileCache]`
+        Filled with the info of every file read while indexing
+    """
+
+    VERSION = 2
+    MAX_SIZE = 4 * 1024 * 1024
+    # The number of matches kept per tier
+    LIMIT = 256
+
+    def __init__(
+        self, folder: Path, languages: dict[str, str], cache: FileCache | None = None
+    ) -> None:
+        self.folder = folder
+        self.cache = cache
+        self.path = Path(os.path.join(folder, ".cipher", "symbols.index"))
+        self._languages = {
+            suffix: language
+            for suffix, language in languages.items()
+            if language in SCANNERS
+        }
+        self._lock = threading.RLock()
+        self._refreshing = threading.Lock()
+        self._ready = False
+        self._dirty = False
+        self._files: dict[str, tuple[int, int]] = {}
+        self._symbols: dict[str, list[Symbol]] = {}
+        self._table: tuple[str, array, list[tuple[str, Symbol]]] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the index has changes that aren't saved"""
+        return self._dirty
+
+    def __len__(self) -> int:
+        return sum(map(len, self._symbols.values()))
+
+    def load(self) -> bool:
+        """Loads the index from disk. A file that doesn't parse is ignored
+
+        Returns
+        -------
+        bool
+            Whether the index was loaded
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != self.VERSION:
+                return False
+            files = {
+                str(path): (int(mtime), int(size))
+                for path, (mtime, size) in data["files"].items()
+            }
+            symbols = {
+                str(path): [
+                    Symbol(str(name), str(kind), int(line), str(container))
+                    for name, kind, line, container in found
+                ]
+                for path, found in data["symbols"].items()
+            }
+        except Exception:
+            return False
+        with self._lock:
+            self._files = files
+            self._symbols = symbols
+            self._table = None
+        return True
+
+    def save(self) -> None:
+        """Writes the index to `.cipher/symbols.index`"""
+        if not self.path.parent.exists():
+            return
+        with self._lock:
+            data = json.dumps(
+                {
+                    "version": self.VERSION,
+                    "files": self._files,
+                    "symbols": self._symbols,
+                }
+            )
+            self._dirty = False
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirty = True
+            self._files.clear()
+            self._symbols.clear()
+            self._table = None
+
+    def build(self) -> None:
+        """Loads the index and brings it up to date. Meant to be run in a :class:`Thread`"""
+        if not self.load():
+            self.clear()
+        self._ready = True
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Scans new and changed files and drops removed ones"""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            seen = set()
+            for entry in IgnoreRules(self.folder).walk():
+                if os.path.splitext(entry.name)[1] not in self._languages:
+                    continue
+                seen.add(entry.path)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self._files.get(entry.path) != (stat.st_mtime_ns, stat.st_size):
+                    self._index(entry.path, stat)
+            with self._lock:
+                for path in set(self._files).difference(seen):
+                    self._remove(path)
+            if self._dirty:
+                self.save()
+        finally:
+            self._refreshing.release()
+
+    def update(self, path: Path) -> None:
+        """Scans a single file again. Used when a file is saved"""
+        if not Path(path).is_relative_to(self.folder):
+            return
+        path = str(path)
+        if os.path.splitext(path)[1] not in self._languages:
+            return
+        if IgnoreRules(self.folder).isIgnored(path, False):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._remove(path)
+            return
+        self._index(path, stat)
+
+    def find(
+        self, query: str, limit: int = 50, cancelled: Callable[[], bool] = lambda: False
+    ) -> list[tuple[str, Symbol]] | None:
+        """Finds the symbols best matching a query
+
+        Parameters
+        ----------
+        query: `str`
+            The characters to look for, in order. Case and spaces are ignored
+        limit: `int`
+            The number of symbols to return
+        cancelled: `Callable[[], bool]`
+            Checked while scanning. The scan stops once it returns `True`
+
+        Returns
+        -------
+        Optional[list[tuple[str, Symbol]]]
+            The path of the file and the symbol, best first. `None` if cancelled.
+        """
+        query = lowercase("".join(query.split()))
+        if not query:
+            return []
+        text, starts, rows = self._getTable()
+        found: dict[int, int] = {}
+        for tier, regex in enumerate(_tiers(query)):
+            if len(found) >= limit:
+                break
+            result = scanLines(
+                text, starts, regex, found, tier, (), self.LIMIT, cancelled
+            )
+            if result is None:
+                return None
+        order = sorted(found, key=lambda row: (found[row], row))
+        return [rows[row] for row in order[:limit]]
+
+    def _getTable(self) -> tuple[str, array, list[tuple[str, Symbol]]]:
+        """The lines matched by :meth:`find`. Built again after the symbols change"""
+        with self._lock:
+            if self._table is not None:
+                return self._table
+            rows = [
+                (path, symbol)
+                for path, symbols in self._symbols.items()
+                for symbol in symbols
+            ]
+        rows.sort(key=lambda row: (len(row[1].name), row[1].name))
+        lines = [
+            f"{symbol.name}\0{symbol.container}.{symbol.name}" for _, symbol in rows
+        ]
+        text = lowercase("\n" + "\n".join(lines) + "\n")
+        starts, pos = array("q"), 1
+        for line in lines:
+            starts.append(pos)
+            pos += len(line) + 1
+        table = (text, starts, rows)
+        with self._lock:
+            self._table = table
+        return table
+
+    def _index(self, path: str, stat: os.stat_result) -> None:
+        symbols = []
+        if stat.st_size <= self.MAX_SIZE:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                with self._lock:
+                    self._remove(path)
+                return
+            if self.cache is not None:
+                self.cache.record(path, stat, data)
+            isBinary, encoding = detect(data[:HEAD_SIZE])
+            if not isBinary:
+                language = self._languages[os.path.splitext(path)[1]]
+                try:
+                    symbols = SCANNERS[language](data.decode(encoding, "replace"))
+                except RecursionError:
+                    pass
+        with self._lock:
+            self._files[path] = (stat.st_mtime_ns, stat.st_size)
+            if symbols or self._symbols.pop(path, None) is not None:
+                self._table = None
+            if symbols:
+                self._symbols[path] = symbols
+            self._dirty = True
+
+    def _remove(self, path: str) -> None:
+        if self._files.pop(path, None) is None:
+            return
+        if self._symbols.pop(path, None) is not None:
+            self._table = None
+        self._dirty = True
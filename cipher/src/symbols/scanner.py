@@ -0,0 +1,267 @@
+from __future__ import annotations
+from typing import Callable, NamedTuple
+import ast
+import re
+
+__all__ = (
+    "Symbol",
+    "SCANNERS",
+    "scanPython",
+    "scanJavaScript",
+    "scanCpp",
+    "scanJson",
+)
+
+
+class Symbol(NamedTuple):
+    """A definition found in a file
+
+    Attributes
+    ----------
+    name: `str`
+        The name of the definition
+    kind: `str`
+        `class`, `function`, `method`, `variable`, `struct`, `namespace`, `macro`, ...
+    line: `int`
+        The line of the definition, starting at 0
+    container: `str`
+        The qualified name of the class, namespace or object holding it. Empty at the top level
+    """
+
+    name: str
+    kind: str
+    line: int
+    container: str
+
+
+def _join(container: str, name: str, separator: str = ".") -> str:
+    return f"{container}{separator}{name}" if container else name
+
+
+def scanPython(text: str) -> list[Symbol]:
+    """Finds the classes, functions, methods and top level variables with `ast`
+
+    Files that don't parse are scanned line by line for `class` and `def`.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return _scanIndented(text)
+    symbols = []
+
+    def visit(body: list[ast.stmt], container: str, inClass: bool) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                symbols.append(Symbol(node.name, "class", node.lineno - 1, container))
+                visit(node.body, _join(container, node.name), True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if inClass else "function"
+                symbols.append(Symbol(node.name, kind, node.lineno - 1, container))
+            elif container:
+                continue
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                if isinstance(node, ast.Assign):
+                    targets = node.targets
+                else:
+                    targets = [node.target]
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name):
+                            symbols.append(
+                                Symbol(name.id, "variable", name.lineno - 1, "")
+                            )
+            elif isinstance(node, (ast.If, ast.Try, ast.With)):
+                # Definitions behind `if TYPE_CHECKING:`, `try: import ...`
+                children = [*node.body, *getattr(node, "orelse", [])]
+                for handler in getattr(node, "handlers", []):
+                    children.extend(handler.body)
+                children.extend(getattr(node, "finalbody", []))
+                visit(children, container, inClass)
+
+    visit(tree.body, "", False)
+    return symbols
+
+
+_PYTHON = re.compile(r"^([ \t]*)(?:async[ \t]+)?(class|def)[ \t]+(\w+)", re.MULTILINE)
+
+
+def _scanIndented(text: str) -> list[Symbol]:
+    # Every scope is the indentation and the qualified name of a class, or
+    # `None` for a function whose nested definitions are skipped
+    symbols, scopes, line, last = [], [], 0, 0
+    for match in _PYTHON.finditer(text):
+        line += text.count("\n", last, match.start())
+        last = match.start()
+        indent, keyword, name = match.groups()
+        while scopes and len(scopes[-1][0]) >= len(indent):
+            scopes.pop()
+        if scopes and scopes[-1][1] is None:
+            scopes.append((indent, None))
+            continue
+        container = scopes[-1][1] if scopes else ""
+        if keyword == "class":
+            symbols.append(Symbol(name, "class", line, container))
+            scopes.append((indent, _join(container, name)))
+        else:
+            kind = "method" if scopes else "function"
+            symbols.append(Symbol(name, kind, line, container))
+            scopes.append((indent, None))
+    return symbols
+
+
+_JAVASCRIPT = re.compile(
+    r"""
+    ^(?P<indent>[ \t]*)(?:
+        (?:export[ \t]+(?:default[ \t]+)?)?(?:async[ \t]+)?
+        function\b[ \t]*\*?[ \t]*(?P<function>[\w$]+)
+      | (?:export[ \t]+(?:default[ \t]+)?)?class[ \t]+(?P<class>[\w$]+)
+      | (?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<variable>[\w$]+)[ \t]*=
+      | (?:static[ \t]+)?(?:async[ \t]+)?(?:[gs]et[ \t]+)?\*?
+        (?!(?:if|for|while|switch|catch|return|function|else|with)\b)
+        (?P<method>[\w$\#]+)[ \t]*\([^()\n]*\)[ \t]*\{
+      | (?P<close>\})
+    )
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+
+
+def scanJavaScript(text: str) -> list[Symbol]:
+    """Finds the classes and their methods, the top level functions and variables
+
+    Relies on the indentation: a class ends at the `}` indented like it.
+    """
+    symbols, classes, line, last = [], [], 0, 0
+    for match in _JAVASCRIPT.finditer(text):
+        line += text.count("\n", last, match.start())
+        last = match.start()
+        indent = len(match["indent"])
+        if match["close"]:
+            if classes and classes[-1][0] == indent:
+                classes.pop()
+            continue
+        container = classes[-1][1] if classes else ""
+        if name := match["class"]:
+            symbols.append(Symbol(name, "class", line, container))
+            classes.append([indent, _join(container, name), None])
+        elif name := match["method"]:
+            if not classes or indent <= classes[-1][0]:
+                continue
+            # The indentation of the first method is the one of every member
+            if classes[-1][2] is None:
+                classes[-1][2] = indent
+            if indent == classes[-1][2]:
+                symbols.append(Symbol(name, "method", line, container))
+        elif indent:
+            continue
+        elif name := match["function"]:
+            symbols.append(Symbol(name, "function", line, ""))
+        elif name := match["variable"]:
+            symbols.append(Symbol(name, "variable", line, ""))
+    return symbols
+
+
+# The parameters can span lines, but are capped so an unclosed `(` on every
+# line doesn't scan ahead to the next `;` each time
+_CPP = re.compile(
+    r"""
+    ^(?P<indent>[ \t]*)(?:
+        \#[ \t]*define[ \t]+(?P<macro>\w+)
+      | (?:template[ \t]*<[^\n]*>[ \t]*)?(?:typedef[ \t]+)?
+        (?P<keyword>class|struct|union|enum(?:[ \t]+(?:class|struct))?|namespace)
+        (?:[ \t]+\w+(?:\([^()\n]*\))?)*?
+        [ \t]+(?P<type>\w+)[ \t]*(?:final[ \t]*)?(?::[^;{\n]*)?(?P<typeBrace>\{|$)
+      | (?!(?:if|for|while|switch|return|else|do|case|delete|new|throw|using)\b)
+        (?:[\w:<>,]+[ \t*&]+)*
+        (?P<function>(?:\w+::)*~?\w+|operator[^\s(]*)
+        [ \t]*\([^;{}]{0,512}\)[^;{}\n]*(?P<functionBrace>\{|$)
+      | (?P<close>\}[ \t]*;?)[ \t]*(?://[^\n]*)?$
+    )
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+_BRACE = re.compile(r"\s*\{")
+_MEMBERS = {"class", "struct", "union"}
+
+
+def scanCpp(text: str) -> list[Symbol]:
+    """Finds the namespaces, types, macros and function definitions
+
+    Relies on the indentation: a scope ends at the `}` indented like it.
+    Declarations ending with `;` are skipped, so only definitions are found.
+    """
+    symbols, scopes, line, last = [], [], 0, 0
+
+    def opens(brace: str, end: int) -> bool | None:
+        """Whether a scope stays open after its line. `None` if it has no body"""
+        if not brace:
+            return True if _BRACE.match(text, end) else None
+        stop = text.find("\n", end)
+        rest = text[end : stop if stop >= 0 else len(text)]
+        return rest.count("{") >= rest.count("}")
+
+    for match in _CPP.finditer(text):
+        line += text.count("\n", last, match.start())
+        last = match.start()
+        indent = len(match["indent"])
+        if match["close"]:
+            while scopes and scopes[-1][0] >= indent:
+                if scopes.pop()[0] == indent:
+                    break
+            continue
+        inFunction = bool(scopes) and scopes[-1][2] == "function"
+        container = next((scope[1] for scope in reversed(scopes) if scope[1]), "")
+        if name := match["macro"]:
+            symbols.append(Symbol(name, "macro", line, ""))
+        elif inFunction:
+            continue
+        elif name := match["type"]:
+            kind = match["keyword"].split()[0]
+            symbols.append(Symbol(name, kind, line, container))
+            if opens(match["typeBrace"], match.end()):
+                scopes.append((indent, _join(container, name, "::"), kind))
+        elif name := match["function"]:
+            if (isOpen := opens(match["functionBrace"], match.end())) is None:
+                continue
+            *owner, name = name.split("::")
+            isMember = bool(owner) or (bool(scopes) and scopes[-1][2] in _MEMBERS)
+            owner = _join(container, "::".join(owner), "::") if owner else container
+            kind = "method" if isMember else "function"
+            symbols.append(Symbol(name, kind, line, owner))
+            if isOpen:
+                scopes.append((indent, "", "function"))
+    return symbols
+
+
+_JSON = re.compile(r'"((?:[^"\\\n]|\\.)*)"[ \t\r]*(:)?|[{}\[\]\n]')
+
+
+def scanJson(text: str, depth: int = 2) -> list[Symbol]:
+    """Finds the keys of the objects nested at most `depth` levels deep"""
+    symbols, path, key, line = [], [], "", 0
+    for match in _JSON.finditer(text):
+        token = match[0]
+        if token == "\n":
+            line += 1
+        elif token in "{[":
+            path.append(key)
+            key = ""
+        elif token in "}]":
+            if path:
+                path.pop()
+            key = ""
+        elif match[2]:
+            key = match[1]
+            if 0 < len(path) <= depth:
+                container = ".".join(filter(None, path))
+                symbols.append(Symbol(key, "key", line, container))
+    return symbols
+
+
+# The scanner of every language of `lexer.json`
+SCANNERS: dict[str, Callable[[str], list[Symbol]]] = {
+    "Python": scanPython,
+    "JavaScript": scanJavaScript,
+    "C++": scanCpp,
+    "JSON": scanJson,
+}
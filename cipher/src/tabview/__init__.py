@@ -10,14 +10,27 @@ from PyQt6.QtGui import QDragEnterEvent, QDropEvent
 from PyQt6.QtWidgets import QTabWidget
 
 from .tab import Tab
-from .editor import Editor
+from .editor import Editor, ThreadedLexer
+from .largefile import LargeFile, LineIndex
+from .saver import Saver, writeAtomic
 from .image import Image, GIF
 from .settings import Settings
 
 if TYPE_CHECKING:
     from ..window import Window
 
-__all__ = ("TabView", "Tab", "Editor", "Image", "GIF")
+__all__ = (
+    "TabView",
+    "Tab",
+    "Editor",
+    "ThreadedLexer",
+    "LargeFile",
+    "LineIndex",
+    "Saver",
+    "writeAtomic",
+    "Image",
+    "GIF",
+)
 
 
 class TabView(QTabWidget):
@@ -32,8 +45,15 @@ class TabView(QTabWidget):
     ----------
     tabOpened: :class:`pyqtSignal`
         A signal emitted when a new tab is opened
+    saver: :class:`Saver`
+        Writes the saved editors in the background
+
+    Editors are opened right away and their files are read in the background,
+    at most `LOADERS` at a time. The current tab is read first.
     """
 
+    LOADERS = 4
+
     tabOpened = pyqtSignal(Tab)
     widgetChanged = pyqtSignal(object)
     tabClosed = pyqtSignal(Tab)
@@ -43,6 +63,10 @@ class TabView(QTabWidget):
         self._window = window
         self.__tabList: list[Tab] = []
         self.__closedTabs: deque[Tab] = deque()
+        self._pending: deque[Editor] = deque()
+        # The editors whose file is being read
+        self._loading: set[Editor] = set()
+        self.saver = Saver(window)
         self._tabCls: dict[str, Tab] = {
             ".gif": GIF,
             ".jpg": Image,
@@ -112,7 +136,7 @@ class TabView(QTabWidget):
         a0.accept()
 
     def dropEvent(self, a0: QDropEvent) -> None:
-        """Overrides the `dropEvent` add tab
+        """Overrides the `dropEvent` to add a tab for every dropped file
 
         Parameters
         ----------
@@ -122,9 +146,7 @@ class TabView(QTabWidget):
         urls = a0.mimeData().urls()
         if not urls:
             return
-        path = urls[0]
-        if path.isLocalFile():
-            self.createTab(Path(path.toLocalFile()))
+        self.openFiles([Path(url.toLocalFile()) for url in urls if url.isLocalFile()])
         return super().dropEvent(a0)
 
     def addTab(self, *args: Tuple[Any], **kwargs: dict[str, Any]) -> int:
@@ -152,6 +174,9 @@ class TabView(QTabWidget):
         """
         tab = self.__tabList.pop(index)
         tab._watcher.removePath(str(tab.path))
+        # Not read until it's reopened
+        if tab in self._pending:
+            self._pending.remove(tab)
         self.__closedTabs.append(tab)
         if len(self.__closedTabs) > 10:
             self.__closedTabs.popleft().deleteLater()
@@ -168,6 +193,8 @@ class TabView(QTabWidget):
             The editor to close
         """
         widget._watcher.removePath(str(widget.path))
+        if widget in self._pending:
+            self._pending.remove(widget)
         self.__closedTabs.append(widget)
         self.__tabList.remove(widget)
         if len(self.__closedTabs) > 10:
@@ -220,6 +247,21 @@ class TabView(QTabWidget):
         if currentWidget:
             self.setCurrentWidget(currentWidget)
 
+    def openFiles(self, paths: list[Path]) -> None:
+        """Opens several files. The last one becomes the current tab
+
+        Parameters
+        ----------
+        paths : List[Path]
+            The paths of the files
+        """
+        for path in paths:
+            self.createTab(path)
+
+    def saveAll(self) -> None:
+        """Saves every editor with unsaved changes in the background"""
+        self.saver.saveAll(self.__tabList)
+
     def reopenTab(self) -> None:
         """Reopens the last closed tab. The tab will be skipped if it was reopened manually."""
         while self.__closedTabs:
@@ -237,6 +279,10 @@ class TabView(QTabWidget):
         tab._watcher.addPath(str(tab.path))
         self.addTab(tab, tab.path.name)
         self.setCurrentWidget(tab)
+        # Closed before its file was read
+        if isinstance(tab, Editor) and tab.isLoading and tab not in self._loading:
+            self._pending.append(tab)
+            self._loadNext()
 
     def changeTab(self) -> None:
         """Changes the tab. Used by :class:`Menubar` when Ctrl+Tab is pressed."""
@@ -258,8 +304,8 @@ class TabView(QTabWidget):
         for _ in range(len(self.__tabList)):
             self.removeTab(0)
 
-    def isBinary(self, path: Path) -> None:
-        """Checks if the file is a binary file
+    def isBinary(self, path: Path) -> bool:
+        """Checks if the file is a binary file. Uses the :class:`FileCache` of the window
 
         Parameters
         ----------
@@ -271,8 +317,7 @@ class TabView(QTabWidget):
         bool
             Whether the file is binary.
         """
-        with open(path, "rb") as f:
-            return b"\0" in f.read(1024)
+        return self._window.fileCache.isBinary(path)
 
     def getTab(self, path: Path) -> Tab | None:
         """Gets the :class:`Editor` if opened
@@ -294,17 +339,67 @@ class TabView(QTabWidget):
         return None
 
     def createTab(self, path: Path) -> Tab | None:
+        """Opens a file in a new tab, or selects its tab if it's already opened
+
+        Text files larger than the `large-file-size` setting, in MB, are opened
+        in a read-only :class:`LargeFile` view. `0` opens every file in an
+        :class:`Editor`.
+
+        Parameters
+        ----------
+        path : `Path`
+            The path of the file
+
+        Returns
+        -------
+        Optional[Tab]
+            The new tab. `None` if the file can't be opened or is already opened
+        """
         path = path.absolute()
-        if not path.exists() or not path.is_file():
+        try:
+            info = self._window.fileCache.info(path, path.stat())
+        except OSError:
+            return
+        if info is None:
             return
         if tab := self.getTab(path):
             return self.setCurrentWidget(tab)
         if cls := self._tabCls.get(path.suffix):
             tab = cls(self.window, path)
         else:
-            if self.isBinary(path):
+            if info.isBinary:
                 return
-            tab = Editor(window=self._window, path=path)
+            largeFileSize = self._window.settings["large-file-size"] * 1024**2
+            if largeFileSize and info.size > largeFileSize:
+                tab = LargeFile(self._window, path)
+            else:
+                tab = Editor(window=self._window, path=path, lazy=True)
+                tab.progress.connect(
+                    lambda percent: self.setTabText(tab, f"{tab.path.name} {percent}%")
+                )
+                tab.loaded.connect(lambda ok: self._loaded(tab, ok))
+                self._pending.append(tab)
         self.addTab(tab, path.name)
         self.setCurrentWidget(tab)
+        self._loadNext()
         return tab
+
+    def _loadNext(self) -> None:
+        """Starts reading the files of the pending editors, the current one first"""
+        while self._pending and len(self._loading) < self.LOADERS:
+            editor = self.currentWidget()
+            if editor not in self._pending:
+                editor = self._pending[0]
+            self._pending.remove(editor)
+            self._loading.add(editor)
+            editor.load()
+
+    def _loaded(self, editor: Editor, ok: bool) -> None:
+        self._loading.discard(editor)
+        if editor in self.__tabList:
+            self.setTabText(editor, editor.path.name)
+            if not ok:
+                self.removeTab(editor)
+                self.__closedTabs.remove(editor)
+                editor.deleteLater()
+        self._loadNext()
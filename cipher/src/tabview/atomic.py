@@ -0,0 +1,76 @@
+from __future__ import annotations
+from pathlib import Path
+import contextlib
+import tempfile
+import stat as st
+import os
+
+__all__ = ("writeAtomic",)
+
+
+def _copyMetadata(source: str, target: str) -> None:
+    """Copies the owner, the mode and the extended attributes, which hold the ACLs"""
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return
+    if hasattr(os, "chown"):
+        with contextlib.suppress(OSError):
+            os.chown(target, stat.st_uid, stat.st_gid)
+    # After the owner, whose change can clear the setuid bits
+    with contextlib.suppress(OSError):
+        os.chmod(target, st.S_IMODE(stat.st_mode))
+    if hasattr(os, "listxattr"):
+        with contextlib.suppress(OSError):
+            for name in os.listxattr(source):
+                with contextlib.suppress(OSError):
+                    os.setxattr(target, name, os.getxattr(source, name))
+
+
+def writeAtomic(path: str | Path, data: bytes) -> None:
+    """Writes a file through a temporary file in the same folder renamed over it
+
+    The temporary file is flushed to the disk before the rename, so the file
+    is either left untouched or fully written, never half written, even if
+    the application or the system crashes.
+
+    Symlinks are resolved, so the file they point to is written and the link
+    stays. The owner, the mode and the ACLs of the file are kept. A file with
+    several hard links is written in place instead, since a rename would
+    detach it from the other links.
+    """
+    path = os.path.realpath(path)
+    try:
+        links = os.stat(path).st_nlink
+    except OSError:
+        links = 1
+    if links > 1:
+        with open(path, "r+b") as f:
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        return
+    folder = os.path.dirname(path)
+    fd, temp = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=folder
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _copyMetadata(path, temp)
+        os.replace(temp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp)
+        raise
+    # Makes the rename itself durable. Folders can't be opened on Windows
+    if os.name != "nt":
+        with contextlib.suppress(OSError):
+            fd = os.open(folder, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
@@ -1,46 +1,117 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 from importlib import import_module
 from pathlib import Path
-import json
 import os
 
-from PyQt6.QtCore import pyqtSignal, Qt
-from PyQt6.Qsci import QsciAPIs, QsciLexer, QsciLexerCustom, QsciScintilla
-from PyQt6.QtGui import QDropEvent, QKeyEvent, QKeySequence, QContextMenuEvent
+from PyQt6.QtCore import QTimer, pyqtSignal, Qt
+from PyQt6.Qsci import QsciAbstractAPIs, QsciLexer, QsciLexerCustom, QsciScintilla
+from PyQt6.QtGui import QDropEvent, QKeyEvent, QContextMenuEvent
+from PyQt6.QtWidgets import QInputDialog
 
+from .diff import *
 from .find import Find
+from .journal import *
+from .lexer import *
 from ..tab import Tab
+from ...thread import Thread
 
 if TYPE_CHECKING:
     from cipher import Window
 
-__all__ = ("Editor",)
+__all__ = ("Editor", "ThreadedLexer")
+
+# The bytes read at once by :func:`readFile` and inserted at once by :meth:`Editor.load`
+CHUNK_SIZE = 1024 * 1024
+# Milliseconds to wait for more changes of the file before reloading it
+RELOAD_DELAY = 100
+
+
+def readFile(path: Path, progress: Callable[[int], None]) -> bytes:
+    """Reads a file in chunks and checks it's UTF-8. Meant to be run in a :class:`Thread`
+
+    Parameters
+    ----------
+    path: `Path`
+        The path of the file
+    progress: `Callable[[int], None]`
+        Called with the percentage read whenever it changes
+
+    Returns
+    -------
+    bytes
+        The content of the file
+
+    Raises
+    ------
+    UnicodeDecodeError
+        The file isn't UTF-8
+    """
+    size = max(1, os.path.getsize(path))
+    chunks, read, percent = [], 0, 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            chunks.append(chunk)
+            read += len(chunk)
+            if (value := min(100, read * 100 // size)) != percent:
+                percent = value
+                progress(percent)
+    data = b"".join(chunks)
+    data.decode("utf-8")
+    return data
 
 
 class Editor(Tab, QsciScintilla):
     """The text editor
 
+    The unsaved changes are logged by a :class:`Journal` and restored when the
+    file is opened again, even after a crash.
+
     Parameters
     ----------
     window: `Window`
         The window object
     path: `Path`
         The path of the file being edited
+    lazy: `bool`
+        Whether the file is read later by :meth:`load` instead of right away.
+        The editor is read-only until it's loaded
 
     Attributes
     ----------
     path: `Path`
         The path of the file being edited
+    revision: `int`
+        Incremented every time the text changes
+    journal: :class:`Journal`
+        The log of the unsaved changes
+    loaded: :class:`pyqtSignal`
+        Emitted once the file read by :meth:`load` is in the editor, with
+        whether it could be read
+    progress: :class:`pyqtSignal`
+        Emitted with the percentage of the file loaded by :meth:`load`. Half
+        of it is reading the file, the other half is inserting the text
     """
 
     saved = pyqtSignal()
+    loaded = pyqtSignal(bool)
+    progress = pyqtSignal(int)
 
-    def __init__(self, window: Window, path: Path) -> None:
+    def __init__(self, window: Window, path: Path, lazy: bool = False) -> None:
         Tab.__init__(self, window, path)
         QsciScintilla.__init__(self)
         self.setObjectName("Editor")
-        self._watcher.fileChanged.connect(self.updateText)
+        self._revision = 0
+        self._loading = lazy
+        self._reloadPending = False
+        self._reloading = False
+        self.textChanged.connect(self._textChanged)
+        # A file is often changed by several writes, so wait for the last one
+        self._reloadTimer = QTimer(self)
+        self._reloadTimer.setSingleShot(True)
+        self._reloadTimer.setInterval(RELOAD_DELAY)
+        self._reloadTimer.timeout.connect(self.updateText)
+        self._watcher.fileChanged.connect(self._reloadTimer.start)
         self.saved.connect(lambda: window.fileManager.fileSaved.emit(self))
         self.createStandardContextMenu()
         self.setUtf8(True)
@@ -68,33 +139,100 @@ class Editor(Tab, QsciScintilla):
         self.SendScintilla(self.SCI_SETADDITIONALSELECTIONTYPING, 1)
         self.SendScintilla(self.SCI_SETMULTIPASTE, 1)
 
-        styles = self.getEditorStyles()
-        localAppData = os.path.join(window.localAppData, "include")
-        lexer = None
-        if info := styles.get(path.suffix):
-            language, folder = info.get("language"), info.get("lexer")
-            if Path(os.path.join(localAppData, "lexer", language, folder)).exists():
-                lexer = self.loadLexer(language, folder)
-
-        if not lexer:
-            lexer = self.loadLexer("Default", "Default")
-
-        self.setLexer(lexer)
+        self.setLexer(self.createLexer())
+        window.theme.changed.connect(self.updateLexer)
 
         self.setMarginType(0, QsciScintilla.MarginType.NumberMargin)
         self.setMarginWidth(0, 30)
 
         self.commands = self.standardCommands()
-        self.setShortcutKeys()
-        self._window.shortcut.fileChanged.connect(self.setShortcutKeys)
-        self.setText(path.read_text("utf-8"))
+        self._keymapVersion = 0
+        self._window.keymap.changed.connect(self._keymapChanged)
+        self.journal = Journal(self, os.path.join(window.localAppData, "journal"))
+        window.completions.track(self)
+        if lazy:
+            self.setReadOnly(True)
+        else:
+            self.setText(path.read_text("utf-8"))
+            self.setModified(False)
+            self.journal.attach()
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def isLoading(self) -> bool:
+        """Whether the file isn't in the editor yet"""
+        return self._loading
+
+    def load(self) -> None:
+        """Reads the file of a lazy editor in the background
+
+        Once the whole file is read, its text is inserted a chunk per event
+        loop iteration, so even large files don't freeze the window. Then
+        :attr:`loaded` is emitted.
+        """
+        thread = Thread(
+            self, readFile, self.path, lambda percent: self.progress.emit(percent // 2)
+        )
+        thread.finished.connect(self._loaded)
+        thread.start()
+
+    def whenLoaded(self, callback: Callable[[], None]) -> None:
+        """Calls `callback` once the file is in the editor. Right away if it already is"""
+        if not self._loading:
+            return callback()
+
+        def loaded(ok: bool) -> None:
+            self.loaded.disconnect(loaded)
+            if ok:
+                callback()
+
+        self.loaded.connect(loaded)
+
+    def _loaded(self, data: bytes | None) -> None:
+        if data is None:
+            self.window.log(f"Failed to open {self.path}", flush=True)
+            return self.loaded.emit(False)
+        # The modification notifications make every append as slow as the text is long
+        mask = self.SendScintilla(self.SCI_GETMODEVENTMASK)
+        self.SendScintilla(self.SCI_SETMODEVENTMASK, 0)
+        self.SendScintilla(self.SCI_SETUNDOCOLLECTION, 0)
+        self._insert(memoryview(data), 0, mask)
+
+    def _insert(self, data: memoryview, offset: int, mask: int) -> None:
+        """Appends a chunk of the loaded file, then waits for the next iteration"""
+        chunk = data[offset : offset + CHUNK_SIZE].tobytes()
+        offset += len(chunk)
+        self.setReadOnly(False)
+        self.SendScintilla(self.SCI_APPENDTEXT, len(chunk), chunk)
+        self.setReadOnly(True)
+        if offset < len(data):
+            self.progress.emit(50 + offset * 50 // len(data))
+            return QTimer.singleShot(0, lambda: self._insert(data, offset, mask))
+        self.SendScintilla(self.SCI_SETMODEVENTMASK, mask)
+        self.SendScintilla(self.SCI_SETUNDOCOLLECTION, 1)
+        self.SendScintilla(self.SCI_EMPTYUNDOBUFFER)
+        self.setModified(False)
+        self.setReadOnly(False)
+        self._revision += 1
+        self._loading = False
+        self.journal.attach()
+        self.loaded.emit(True)
+        if self._reloadPending:
+            self._reloadPending = False
+            self.updateText()
+
+    def _textChanged(self) -> None:
+        self._revision += 1
 
     @property
     def lexer(self) -> QsciLexer:
         return super().lexer()
 
     @property
-    def api(self) -> QsciAPIs | None:
+    def api(self) -> QsciAbstractAPIs | None:
         return self.lexer.apis()
 
     def contextMenuEvent(self, a0: QContextMenuEvent) -> None:
@@ -102,7 +240,7 @@ class Editor(Tab, QsciScintilla):
         return a0.accept()
 
     def dropEvent(self, e: QDropEvent) -> None:
-        """Overrides the :meth:`dropEvent` to open a tab if a file was dropped
+        """Overrides the :meth:`dropEvent` to open a tab for every dropped file
 
         Parameters
         ----------
@@ -110,8 +248,8 @@ class Editor(Tab, QsciScintilla):
             The drop event
         """
         urls = e.mimeData().urls()
-        if urls and (path := urls[0]).isLocalFile():
-            return self._window.tabView.createTab(Path(path.toLocalFile()))
+        if paths := [Path(url.toLocalFile()) for url in urls if url.isLocalFile()]:
+            return self._window.tabView.openFiles(paths)
 
         return super().dropEvent(e)
 
@@ -157,40 +295,80 @@ class Editor(Tab, QsciScintilla):
         return super().keyPressEvent(e)
 
     def focusInEvent(self, _) -> None:
+        self.setShortcutKeys()
         QsciScintilla.focusInEvent(self, _)
         return super().focusInEvent(_)
 
     def updateText(self) -> None:
-        """Updates the text. Triggered when :attr:`watcher` detects a change."""
+        """Updates the text. Triggered when :attr:`watcher` detects a change.
+
+        The file is read and diffed with the text in the background, then
+        only the changed lines are replaced, as one undoable action. The
+        undo history, the scroll position and the selections are kept.
+        """
+        if self._loading or self._reloading:
+            self._reloadPending = True
+            return
         if not self.path.exists():
             return
-        cursor = self.getCursorPosition()
-        self.setReadOnly(True)
-        self.SendScintilla(self.SCI_SETTEXT, self.path.read_bytes())
-        self.setReadOnly(False)
-        self.setCursorPosition(*cursor)
+        # Files replaced by a save aren't watched anymore
+        if str(self.path) not in self._watcher.files():
+            self._watcher.addPath(str(self.path))
+        self._reloading = True
+        revision, length = self._revision, self.length()
+        text = self.bytes(0, length).data()[:length]
+        thread = Thread(self, diffFile, self.path, text)
+        thread.finished.connect(lambda hunks: self._reloaded(hunks, revision))
+        thread.start()
+
+    def _reloaded(self, hunks: list[Hunk] | None, revision: int) -> None:
+        self._reloading = False
+        if hunks is not None and revision != self._revision:
+            # The text changed while diffing, so the offsets are stale
+            self._reloadPending = True
+        elif hunks:
+            readOnly = self.isReadOnly()
+            self.setReadOnly(False)
+            self.beginUndoAction()
+            for start, end, text in reversed(hunks):
+                self.SendScintilla(self.SCI_SETTARGETRANGE, start, end)
+                self.SendScintilla(self.SCI_REPLACETARGET, len(text), text)
+            self.endUndoAction()
+            self.setReadOnly(readOnly)
+            self.setModified(False)
+        elif hunks is not None:
+            self.setModified(False)
+        if self._reloadPending:
+            self._reloadPending = False
+            self.updateText()
 
     def setShortcutKeys(self) -> None:
-        with open(os.path.join(self._window.localAppData, "shortcuts.json")) as f:
-            shortcuts = json.load(f)
+        """Applies the keys of the :class:`Keymap` if they changed since the last time"""
+        keymap = self._window.keymap
+        if self._keymapVersion == keymap.version:
+            return
+        self._keymapVersion = keymap.version
+        keys = keymap.editorKeys
         for command in self.commands.commands():
-            command = command.command()
-            name, key = command.name, 0
-            if sequence := shortcuts.get(name):
-                keySequence = QKeySequence.fromString(sequence)
-                key = keySequence[0]
-                for i in range(1, keySequence.count()):
-                    key |= keySequence[i]
-                key = key.toCombined()
-            self.commands.find(command).setKey(key)
+            if (key := keys.get(command.command(), 0)) != command.key():
+                command.setKey(key)
+
+    def _keymapChanged(self) -> None:
+        # The other editors apply the keys once they get the focus
+        if self.hasFocus():
+            self.setShortcutKeys()
 
     def saveFile(self) -> None:
-        super().saveFile()
-        self.saved.emit()
+        """Saves the file in the background. :attr:`saved` is emitted once it's written"""
+        if self._loading:
+            return
+        self._window.tabView.saver.save(self)
 
     def saveAs(self) -> None:
-        super().saveAs()
-        self.saved.emit()
+        if self._loading or not (path := self.savePath()):
+            return
+        self.setPath(path)
+        self._window.tabView.saver.save(self)
 
     def copy(self) -> None:
         """Copies the selected text. If no text is selected, the line will copied"""
@@ -214,6 +392,20 @@ class Editor(Tab, QsciScintilla):
         """Starts the editor search"""
         Find(self).exec()
 
+    def goToLine(self) -> None:
+        """Asks for a line and moves the cursor to it"""
+        line, ok = QInputDialog.getInt(
+            self,
+            "Go to Line",
+            f"Line (1 - {self.lines()})",
+            self.getCursorPosition()[0] + 1,
+            1,
+            self.lines(),
+        )
+        if ok:
+            self.setCursorPosition(line - 1, 0)
+            self.SendScintilla(self.SCI_VERTICALCENTRECARET)
+
     def createStandardContextMenu(self) -> None:
         self.menu = super().createStandardContextMenu()
         return self.menu
@@ -302,10 +494,23 @@ class Editor(Tab, QsciScintilla):
             )
 
     def setLexer(self, lexer: QsciLexer) -> None:
-        QsciAPIs(lexer)
+        self._window.completions.createAPIs(lexer)
         return super().setLexer(lexer)
 
+    def createLexer(self) -> QsciLexer:
+        """Creates the lexer of the file suffix, or the default one"""
+        lexer = None
+        if info := self._window.theme.lexerFor(self.path.suffix):
+            lexer = self.loadLexer(*info)
+        return lexer or self.loadLexer("Default", "Default")
+
+    def updateLexer(self) -> None:
+        """Replaces the lexer after the theme files changed"""
+        old = self.lexer
+        self.setLexer(self.createLexer())
+        if old is not None and old is not self.lexer:
+            old.deleteLater()
+
     def getEditorStyles(self) -> dict[str, dict[str | list[str]]]:
         """Returns the editor styles"""
-        with open(os.path.join(self._window.localAppData, "styles", "lexer.json")) as f:
-            return json.load(f)
+        return self._window.theme.languages
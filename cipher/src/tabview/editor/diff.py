@@ -0,0 +1,108 @@
+from __future__ import annotations
+from itertools import accumulate
+from pathlib import Path
+from typing import NamedTuple
+
+__all__ = ("Hunk", "diffFile", "diffLines")
+
+# Past this many inserted and deleted lines, the differing lines are replaced as one hunk
+MAX_EDITS = 1000
+
+
+class Hunk(NamedTuple):
+    """A change from the old text to the new one
+
+    Attributes
+    ----------
+    start: `int`
+        The offset in the old text where the change starts
+    end: `int`
+        The offset in the old text where the change ends
+    text: `bytes`
+        The text replacing the old one between `start` and `end`
+    """
+
+    start: int
+    end: int
+    text: bytes
+
+
+def diffLines(old: bytes, new: bytes) -> list[Hunk]:
+    """The line-level changes turning `old` into `new`, in order. Meant to be run in a :class:`Thread`
+
+    The lines both texts start and end with are skipped, then the rest is
+    diffed with Myers' algorithm, which is fast when few lines changed. When
+    more than :data:`MAX_EDITS` lines differ, all the lines between the first
+    and the last change are replaced at once instead.
+    """
+    a, b = old.splitlines(True), new.splitlines(True)
+    prefix, size = 0, min(len(a), len(b))
+    while prefix < size and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < size - prefix and a[-suffix - 1] == b[-suffix - 1]:
+        suffix += 1
+    start = sum(map(len, a[:prefix]))
+    a, b = a[prefix : len(a) - suffix], b[prefix : len(b) - suffix]
+    if not a and not b:
+        return []
+
+    offsets = list(accumulate(map(len, a), initial=start))
+    if (changes := _myers(a, b)) is None:
+        return [Hunk(offsets[0], offsets[-1], b"".join(b))]
+    return [
+        Hunk(offsets[i1], offsets[i2], b"".join(b[j1:j2]))
+        for i1, i2, j1, j2 in changes
+    ]
+
+
+def diffFile(path: Path, text: bytes) -> list[Hunk]:
+    """The changes turning `text` into the content of a file. Meant to be run in a :class:`Thread`"""
+    return diffLines(text, path.read_bytes())
+
+
+def _myers(a: list[bytes], b: list[bytes]) -> list[tuple[int, int, int, int]] | None:
+    """The ranges `a[i1:i2]` replaced by `b[j1:j2]`, or `None` past :data:`MAX_EDITS`"""
+    n, m = len(a), len(b)
+    offset = MAX_EDITS + 1
+    # The furthest x reached on every diagonal k = x - y
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(min(MAX_EDITS, n + m) + 1):
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x, y = x + 1, y + 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _changes(trace, n, m)
+    return None
+
+
+def _changes(
+    trace: list[list[int]], x: int, y: int
+) -> list[tuple[int, int, int, int]]:
+    """Walks back the edits found by :func:`_myers` and groups the adjacent ones"""
+    changes: list[list[int]] = []
+    for d in range(len(trace) - 1, 0, -1):
+        # `trace[d]` holds the diagonals -d - 1 to d + 1 before step d
+        v, k = trace[d], x - y
+        if k == -d or (k != d and v[k + d] < v[k + d + 2]):
+            # Came down from diagonal k + 1: `b[prevY]` was inserted
+            prevX = v[k + d + 2]
+            prevY, endX, endY = prevX - k - 1, prevX, prevX - k
+        else:
+            # Came right from diagonal k - 1: `a[prevX]` was deleted
+            prevX = v[k + d]
+            prevY, endX, endY = prevX - k + 1, prevX + 1, prevX - k + 1
+        if changes and changes[-1][0] == endX and changes[-1][2] == endY:
+            changes[-1][0], changes[-1][2] = prevX, prevY
+        else:
+            changes.append([prevX, endX, prevY, endY])
+        x, y = prevX, prevY
+    return [tuple(change) for change in reversed(changes)]
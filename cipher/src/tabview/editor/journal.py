@@ -0,0 +1,326 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterator
+from hashlib import sha1
+import contextlib
+import struct
+import os
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from ...thread import Thread
+
+if TYPE_CHECKING:
+    from . import Editor
+
+__all__ = ("Journal", "Change", "compactJournal", "readJournal")
+
+MAGIC = b"CIPHERJ1"
+# The mtime in nanoseconds and the size of the saved file, then the length of its path
+HEADER = struct.Struct("<qqI")
+# The kind, the position and the length of a change. Insertions are followed by text
+RECORD = struct.Struct("<cQQ")
+INSERT, DELETE = b"I", b"D"
+
+# The kind, the position, the length and the inserted text of a change
+Change = tuple[bytes, int, int, bytes]
+
+
+def readJournal(data: bytes) -> tuple[int, int, list[Change]] | None:
+    """Parses a journal. A record cut short by a crash ends it
+
+    Returns
+    -------
+    Optional[tuple[int, int, list[Change]]]
+        The mtime and the size of the saved file and the changes made since
+        it was saved. `None` if the data isn't a journal
+    """
+    if not data.startswith(MAGIC) or len(data) < len(MAGIC) + HEADER.size:
+        return None
+    mtime, size, length = HEADER.unpack_from(data, len(MAGIC))
+    return mtime, size, list(_records(data, len(MAGIC) + HEADER.size + length))
+
+
+def compactJournal(data: bytes) -> bytes:
+    """Merges the changes of a journal that touch. Meant to be run in a :class:`Thread`"""
+    if (journal := readJournal(data)) is None:
+        return data
+    changes = []
+    for change in journal[2]:
+        _merge(changes, *change)
+    _, _, length = HEADER.unpack_from(data, len(MAGIC))
+    header = data[: len(MAGIC) + HEADER.size + length]
+    return header + b"".join(_encode(*change) for change in changes)
+
+
+def _records(data: bytes, offset: int) -> Iterator[Change]:
+    while offset + RECORD.size <= len(data):
+        kind, position, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        text = b""
+        if kind == INSERT:
+            if offset + length > len(data):
+                return
+            text = data[offset : offset + length]
+            offset += length
+        elif kind != DELETE:
+            return
+        yield kind, position, length, text
+
+
+def _encode(kind: bytes, position: int, length: int, text: bytes) -> bytes:
+    return RECORD.pack(kind, position, length) + text
+
+
+def _merge(
+    changes: list[Change], kind: bytes, position: int, length: int, text: bytes
+) -> None:
+    """Appends a change, merged into the last one when they touch"""
+    if changes:
+        lastKind, lastPosition, lastLength, lastText = changes[-1]
+        if kind == INSERT and lastKind == INSERT:
+            if position == lastPosition + lastLength:
+                text = lastText + text
+                changes[-1] = (INSERT, lastPosition, len(text), text)
+                return
+        elif kind == DELETE and lastKind == INSERT:
+            start = position - lastPosition
+            if 0 <= start and start + length <= lastLength:
+                text = lastText[:start] + lastText[start + length :]
+                changes.pop()
+                if text:
+                    changes.append((INSERT, lastPosition, len(text), text))
+                return
+        # Deleting forward, or backward like backspace does
+        elif kind == DELETE and lastKind == DELETE and (
+            position == lastPosition or position + length == lastPosition
+        ):
+            changes[-1] = (DELETE, position, lastLength + length, b"")
+            return
+    changes.append((kind, position, length, text))
+
+
+class Journal(QObject):
+    """Logs the unsaved changes of an editor, so they survive a crash or an exit
+
+    Every insertion and deletion is appended to a file of the `journal` folder
+    of the local app data, named after the hash of the path of the file. The
+    changes are buffered, merged when they touch like the characters of a
+    typed word, and written at most once per `FLUSH_INTERVAL`. So a keystroke
+    never touches the disk and a write is only as long as what changed. Every
+    time the file grew by `COMPACT_SIZE`, its changes are merged in a
+    :class:`Thread`.
+
+    The journal starts from the saved file and is dropped whenever the text
+    matches it again. When the file is opened and wasn't changed since, the
+    changes of its journal are replayed.
+
+    A save writes the text copied at :meth:`mark`. Once it's written,
+    :meth:`rebase` starts the journal from the new file with the changes made
+    while it was written.
+
+    Parameters
+    ----------
+    editor: :class:`Editor`
+        The editor
+    folder: `str`
+        The folder of the journals
+    """
+
+    FLUSH_INTERVAL = 1000
+    COMPACT_SIZE = 256 * 1024
+
+    def __init__(self, editor: Editor, folder: str) -> None:
+        super().__init__(editor)
+        self._editor = editor
+        self._folder = folder
+        self._file = ""
+        self._base: tuple[int, int] | None = None
+        self._changes: list[Change] = []
+        # The changes made since the text being saved was copied
+        self._since: list[Change] | None = None
+        self._written = 0
+        self._compacted = 0
+        self._compacting = False
+        self._replaying = False
+        # Incremented every time the journal is dropped
+        self._generation = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+        QApplication.instance().aboutToQuit.connect(self.flush)
+        editor.window.closed.connect(self.flush)
+
+    def attach(self) -> bool:
+        """Replays the journal of the file if it's still valid, then starts logging
+
+        Meant to be called once the saved file is in the editor.
+
+        Returns
+        -------
+        bool
+            Whether unsaved changes were restored
+        """
+        editor = self._editor
+        restored = False
+        self._file = self._path()
+        with contextlib.suppress(OSError):
+            with open(self._file, "rb") as f:
+                data = f.read()
+            journal = readJournal(data)
+            if journal is not None and journal[:2] == self._stat():
+                restored = self._replay(journal[2])
+        if restored:
+            self._base, self._written = journal[:2], len(data)
+            self._compacted = self._written
+        else:
+            self.reset()
+        editor.SCN_MODIFIED.connect(self._modified)
+        editor.modificationChanged.connect(lambda modified: modified or self.reset())
+        return restored
+
+    def flush(self) -> None:
+        """Appends the buffered changes to the file"""
+        self._timer.stop()
+        if not self._changes:
+            return
+        data = b"".join(_encode(*change) for change in self._changes)
+        self._changes.clear()
+        try:
+            if not self._written:
+                os.makedirs(self._folder, exist_ok=True)
+                mtime, size = self._base or (0, -1)
+                name = os.fsencode(self._editor.path)
+                data = MAGIC + HEADER.pack(mtime, size, len(name)) + name + data
+            with open(self._file, "ab" if self._written else "wb") as f:
+                f.write(data)
+        except OSError as e:
+            message = f"Failed to write the journal of {self._editor.path}: {e}"
+            return self._editor.window.log(message)
+        self._written += len(data)
+        if not self._compacting and self._written - self._compacted > self.COMPACT_SIZE:
+            self.compact()
+
+    def compact(self) -> None:
+        """Merges the changes of the file in the background"""
+        try:
+            with open(self._file, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        self._compacting = True
+        generation, written = self._generation, self._written
+        thread = Thread(self, compactJournal, data)
+        thread.finished.connect(lambda data: self._merged(data, generation, written))
+        thread.start()
+
+    def mark(self) -> None:
+        """Starts keeping the changes made from now on. Called when the text to save is copied"""
+        self._since = []
+
+    def unmark(self) -> None:
+        """Stops keeping the changes, when the save failed"""
+        self._since = None
+
+    def rebase(self) -> None:
+        """Starts the journal from the file saved with the text copied at :meth:`mark`
+
+        The changes made while the file was written are logged again on top
+        of it, so the journal never replays them onto the wrong text.
+        """
+        if (since := self._since) is None:
+            return
+        self._since = None
+        self.reset()
+        for change in since:
+            _merge(self._changes, *change)
+        if self._changes:
+            self._timer.start()
+
+    def reset(self) -> None:
+        """Drops the journal, now that the text is the saved file"""
+        self._timer.stop()
+        self._changes.clear()
+        self._generation += 1
+        if self._written:
+            with contextlib.suppress(OSError):
+                os.remove(self._file)
+        # The path changes when the file is saved as another one
+        self._file = self._path()
+        self._base = self._stat()
+        if os.path.exists(self._file):
+            with contextlib.suppress(OSError):
+                os.remove(self._file)
+        self._written = self._compacted = 0
+
+    def _path(self) -> str:
+        name = sha1(os.fsencode(self._editor.path)).hexdigest()
+        return os.path.join(self._folder, f"{name}.journal")
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self._editor.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _replay(self, changes: list[Change]) -> bool:
+        editor = self._editor
+        length = editor.length()
+        for kind, position, size, _ in changes:
+            if kind == INSERT and position <= length:
+                length += size
+            elif kind == DELETE and position + size <= length:
+                length -= size
+            else:
+                editor.window.log(f"Discarded the journal of {editor.path}")
+                return False
+        self._replaying = True
+        editor.beginUndoAction()
+        for kind, position, size, text in changes:
+            if kind == INSERT:
+                editor.SendScintilla(editor.SCI_SETTARGETRANGE, position, position)
+                editor.SendScintilla(editor.SCI_REPLACETARGET, size, text)
+            else:
+                editor.SendScintilla(editor.SCI_DELETERANGE, position, size)
+        editor.endUndoAction()
+        self._replaying = False
+        return bool(changes)
+
+    def _modified(
+        self, position: int, flags: int, text: bytes | None, length: int, *_
+    ) -> None:
+        editor = self._editor
+        if self._replaying:
+            return
+        if flags & editor.SC_MOD_INSERTTEXT:
+            if text is None or len(text) != length:
+                text = editor.bytes(position, position + length).data()[:length]
+            change = (INSERT, position, length, text)
+        elif flags & editor.SC_MOD_DELETETEXT:
+            change = (DELETE, position, length, b"")
+        else:
+            return
+        _merge(self._changes, *change)
+        if self._since is not None:
+            self._since.append(change)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _merged(self, data: bytes | None, generation: int, written: int) -> None:
+        self._compacting = False
+        # The journal was dropped while merging
+        if data is None or generation != self._generation:
+            return
+        temp = f"{self._file}.tmp"
+        try:
+            with open(self._file, "rb") as f:
+                f.seek(written)
+                data += f.read()
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, self._file)
+        except OSError:
+            return
+        self._written = self._compacted = len(data)
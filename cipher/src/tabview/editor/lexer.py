@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Callable, Sequence
+
+from PyQt6.Qsci import QsciLexerCustom, QsciScintilla
+from PyQt6.QtCore import QTimer
+
+from ...thread import Thread
+
+__all__ = ("ThreadedLexer",)
+
+Tokenizer = Callable[[bytes, int], tuple[Sequence[int], Sequence[int]]]
+
+
+def _tokenize(
+    tokenize: Tokenizer, text: bytes, state: int
+) -> tuple[bytes, list[int]] | str:
+    """Runs a tokenizer and turns its runs into a style per byte. Meant to be run in a :class:`Thread`
+
+    Returns the error instead when the tokenizer fails, since :class:`Thread`
+    doesn't report exceptions.
+    """
+    try:
+        runs, states = tokenize(text, state)
+        styles = bytearray(len(text))
+        for i in range(0, len(runs), 3):
+            position, length, style = runs[i : i + 3]
+            styles[position : position + length] = bytes((style,)) * length
+        return bytes(styles), list(states)
+    except Exception as e:
+        return f"{e.__class__.__name__}: {e}"
+
+
+class ThreadedLexer(QsciLexerCustom):
+    """A lexer whose tokenizer runs in a :class:`Thread`, so it can't freeze the editor
+
+    When Scintilla asks for styles, the lines from the first one not styled
+    yet, at least `CHUNK_SIZE` bytes of them, are copied and handed to
+    :meth:`tokenize` in a :class:`Thread`. Its style runs are then applied
+    `BATCH_SIZE` bytes per event loop iteration. Results of a text that was
+    edited since it was copied are dropped, and the styles are asked again.
+
+    Subclasses implement :meth:`tokenize` instead of :meth:`styleText`.
+
+    Parameters
+    ----------
+    editor: :class:`QsciScintilla`
+        The editor of the lexer
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    BATCH_SIZE = 64 * 1024
+
+    def __init__(self, editor: QsciScintilla) -> None:
+        super().__init__(editor)
+        # Incremented every time the text changes
+        self._revision = 0
+        self._thread: Thread | None = None
+        self._job: tuple[int, int, int, int] | None = None
+        self._result: tuple[bytes, list[int], int] | None = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._apply)
+        editor.textChanged.connect(self._textChanged)
+
+    def tokenize(self, text: bytes, state: int) -> tuple[Sequence[int], Sequence[int]]:
+        """Styles whole lines of text. Runs in a :class:`Thread`
+
+        Must only use its arguments, never the editor or the lexer, which
+        belong to the GUI thread.
+
+        Parameters
+        ----------
+        text: `bytes`
+            The UTF-8 text of whole lines
+        state: `int`
+            The state at the end of the line before the text, set by a
+            previous call. 0 at the start of the document
+
+        Returns
+        -------
+        tuple[Sequence[int], Sequence[int]]
+            The style runs, as flat triples of position in `text`, length and
+            style. A run overrides the runs before it and the bytes out of any
+            run get the style 0. Then the state at the end of every line of
+            `text`, or nothing if the lexer doesn't need states
+        """
+        raise NotImplementedError
+
+    def styleText(self, start: int, end: int) -> None:
+        if self._job is not None:
+            return
+        editor = self.editor()
+        send = editor.SendScintilla
+        line = send(editor.SCI_LINEFROMPOSITION, start)
+        start = send(editor.SCI_POSITIONFROMLINE, line)
+        state = send(editor.SCI_GETLINESTATE, line - 1) if line else 0
+        length = send(editor.SCI_GETLENGTH)
+        last = send(editor.SCI_LINEFROMPOSITION, max(end, start + self.CHUNK_SIZE))
+        stop = send(editor.SCI_POSITIONFROMLINE, last + 1)
+        if stop <= start:
+            stop = length
+        if stop <= start:
+            return
+        self._job = (start, stop - start, line, self._revision)
+        text = editor.bytes(start, stop).data()[: stop - start]
+        # The editor outlives the lexer when the theme changes
+        self._thread = Thread(editor, _tokenize, self.tokenize, text, state)
+        self._thread.finished.connect(self._tokenized)
+        self._thread.start()
+
+    def _textChanged(self) -> None:
+        self._revision += 1
+
+    def _tokenized(self, result: tuple[bytes, list[int]] | str) -> None:
+        # Thread only quits after its finished signal is handled
+        thread, self._thread = self._thread, None
+        thread.quit()
+        thread.wait()
+        thread.deleteLater()
+        if not isinstance(result, tuple):
+            _, length, line, _ = self._job
+            editor = self.editor()
+            editor.window.log(
+                f"The {self.language()} lexer failed to style {length} bytes from "
+                f"line {line + 1} of {editor.path} - {result}",
+                flush=True,
+            )
+            # Styled anyway, or the same lines would be asked again and again
+            result = (bytes(length), [])
+        self._result = (*result, 0)
+        self._apply()
+
+    def _apply(self) -> None:
+        """Applies a batch of styles, then waits for the next iteration"""
+        editor = self.editor()
+        start, _, line, revision = self._job
+        styles, states, offset = self._result
+        if revision != self._revision:
+            self._job = self._result = None
+            # Asks for the styles of the edited text
+            return editor.viewport().update()
+        if offset < len(styles):
+            batch = styles[offset : offset + self.BATCH_SIZE]
+            self.startStyling(start + offset)
+            editor.SendScintilla(editor.SCI_SETSTYLINGEX, len(batch), batch)
+            self._result = (styles, states, offset + len(batch))
+            return self._timer.start(0)
+        for state in states:
+            editor.SendScintilla(editor.SCI_SETLINESTATE, line, state)
+            line += 1
+        self._job = self._result = None
+        # Asks for the styles of the lines still shown unstyled
+        editor.viewport().update()
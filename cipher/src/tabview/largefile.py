@@ -0,0 +1,444 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+from importlib import import_module
+from bisect import bisect_left
+from array import array
+from pathlib import Path
+import mmap
+import re
+
+from PyQt6.Qsci import QsciScintilla
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QInputDialog
+
+from .editor.find import Find
+from .tab import Tab
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+
+__all__ = ("LargeFile", "LineIndex")
+
+
+class LineIndex:
+    """A sparse index of the lines of a file
+
+    The newlines are counted in chunks of `STEP` bytes and only the number of
+    newlines before every chunk is kept, so the index of a 2 GB file takes
+    16 KB. A line is found from the chunk it's in, reading at most one chunk.
+
+    Parameters
+    ----------
+    path: `Path`
+        The path of the file
+    """
+
+    STEP = 1024 * 1024
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # The number of newlines before every chunk
+        self._counts = array("q", [0])
+        self._total: int | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self._total is not None
+
+    @property
+    def lineCount(self) -> int | None:
+        """The number of lines of the file. `None` until the index is built"""
+        return None if self._total is None else self._total + 1
+
+    def build(self, cancelled: Callable[[], bool] = lambda: False) -> bool:
+        """Counts the lines of the file. Meant to be run in a :class:`Thread`
+
+        The file is read in chunks instead of mapped, so the memory stays bounded.
+
+        Returns
+        -------
+        bool
+            Whether the index was built
+        """
+        count = 0
+        try:
+            with open(self.path, "rb") as f:
+                while chunk := f.read(self.STEP):
+                    if cancelled():
+                        return False
+                    count += chunk.count(b"\n")
+                    if len(chunk) == self.STEP:
+                        self._counts.append(count)
+        except OSError:
+            return False
+        self._total = count
+        return True
+
+    def lineAt(self, data: mmap.mmap, offset: int) -> int | None:
+        """The line holding a byte of the file
+
+        Returns `None` if the byte is past the part of the file indexed so
+        far, so at most one chunk is ever counted.
+        """
+        chunk = offset // self.STEP
+        if chunk >= len(self._counts) and self._total is None:
+            return None
+        chunk = min(chunk, len(self._counts) - 1)
+        line, pos = self._counts[chunk], chunk * self.STEP
+        return line + data[pos:offset].count(b"\n")
+
+    def estimate(self, offset: int) -> int:
+        """The line probably holding a byte, from the lines of the part indexed so far"""
+        counts = self._counts
+        indexed = (len(counts) - 1) * self.STEP
+        if not indexed:
+            return 0
+        return counts[-1] + (offset - indexed) * counts[-1] // indexed
+
+    def lineStart(self, data: mmap.mmap, line: int) -> int | None:
+        """The offset of the first byte of a line
+
+        Returns `None` if the line is past the end of the file or past the
+        part of the file indexed so far.
+        """
+        if line <= 0:
+            return 0
+        counts = self._counts
+        size = len(counts)
+        # The last chunk starting before the newline ending the previous line
+        chunk = bisect_left(counts, line, 0, size) - 1
+        if chunk == size - 1 and (self._total is None or line > self._total):
+            return None
+        pos = chunk * self.STEP
+        text = data[pos : pos + self.STEP]
+        remaining = line - counts[chunk]
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high) // 2
+            if text.count(b"\n", 0, middle + 1) < remaining:
+                low = middle + 1
+            else:
+                high = middle
+        return pos + low + 1
+
+
+class LargeFile(Tab, QsciScintilla):
+    """A read-only view of a file too large for the :class:`Editor`
+
+    The file is memory mapped and only a window of about `WINDOW_SIZE` bytes
+    around the visible lines is copied into the view. The window moves once
+    the view scrolls near one of its ends. The lines of the file are counted
+    by a :class:`LineIndex` built in the background and the text isn't lexed.
+    Until it's built, the lines past the indexed part are numbered with an
+    estimate marked by a `~`, and numbered again once :attr:`indexed` fires.
+
+    Parameters
+    ----------
+    window: `Window`
+        The window object
+    path: `Path`
+        The path of the file
+
+    Attributes
+    ----------
+    indexed: :class:`pyqtSignal`
+        Emitted once the lines of the file are counted
+    """
+
+    indexed = pyqtSignal()
+
+    WINDOW_SIZE = 4 * 1024 * 1024
+    # The number of lines from an end of the window that moves it
+    EDGE = 256
+    # The bytes searched at once when searching backwards
+    SEARCH_CHUNK = 1024 * 1024
+
+    def __init__(self, window: Window, path: Path) -> None:
+        Tab.__init__(self, window, path)
+        QsciScintilla.__init__(self)
+        self.setObjectName("LargeFile")
+        self._data: mmap.mmap | None = None
+        self._index = LineIndex(path)
+        self._start = self._end = self._firstLine = 0
+        # Whether `_firstLine` is an estimate, until the index is built
+        self._approximate = False
+        self._moving = False
+        self._watcher.fileChanged.connect(self.reload)
+        window.tabView.tabClosed.connect(self._tabClosed)
+        window.tabView.tabOpened.connect(self._tabOpened)
+        self.zoomOut(2)
+        self.setCaretLineVisible(True)
+        self.setCaretWidth(2)
+        self.setEolMode(QsciScintilla.EolMode.EolUnix)
+        self.SendScintilla(self.SCI_SETUNDOCOLLECTION, 0)
+
+        try:
+            self.setLexer(import_module("lexer.Default.Default.run").run(self))
+        except Exception as e:
+            window.log(
+                f"Failed to load lexer Default - {e.__class__.__name__}: {e}",
+                flush=True,
+            )
+        self.SendScintilla(self.SCI_SETMARGINTYPEN, 0, self.SC_MARGIN_RTEXT)
+        self.verticalScrollBar().valueChanged.connect(self._scrolled)
+        self.reload()
+
+    @property
+    def lineIndex(self) -> LineIndex:
+        return self._index
+
+    @property
+    def firstLine(self) -> int:
+        """The line of the file shown on the first line of the view"""
+        return self._firstLine
+
+    def reload(self) -> None:
+        """Maps the file again and counts its lines. Keeps the visible lines"""
+        top = self._start + self._position(self.firstVisibleLine())
+        self._release()
+        self._setText(b"")
+        self._start = self._end = self._firstLine = 0
+        self._approximate = False
+        info = self._window.fileCache.info(self.path)
+        self.setUtf8(info is None or info.encoding != "latin-1")
+        try:
+            with open(self.path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files can't be mapped
+            return
+
+        index = self._index = LineIndex(self.path)
+        thread = Thread(self, index.build, lambda: index is not self._index)
+        thread.finished.connect(lambda _: self._indexed(index))
+        thread.start()
+        top = min(top, len(self._data))
+        self._show(top, top)
+
+    def showLine(self, line: int, text: str = "") -> bool:
+        """Moves the cursor to a line of the file
+
+        Parameters
+        ----------
+        line: `int`
+            The line, starting at 0
+        text: `str`
+            Selected if found from the start of the line
+
+        Returns
+        -------
+        bool
+            `False` if the line isn't indexed yet or is past the end of the file
+        """
+        if self._data is None:
+            return False
+        if (start := self._index.lineStart(self._data, line)) is None:
+            return False
+        if not self._start <= start < self._end:
+            self._show(start)
+        local = self._line(start - self._start)
+        if not text or not self.findFirst(
+            text, False, True, False, False, True, local, 0, True
+        ):
+            self.setCursorPosition(local, 0)
+        self.SendScintilla(self.SCI_VERTICALCENTRECARET)
+        return True
+
+    def goToLine(self) -> None:
+        """Asks for a line of the file and moves the cursor to it"""
+        count = self._index.lineCount
+        line, ok = QInputDialog.getInt(
+            self,
+            "Go to Line",
+            f"Line (1 - {count})" if count else "Line",
+            self._firstLine + self.getCursorPosition()[0] + 1,
+            1,
+            count or 2**31 - 1,
+        )
+        if ok and not self.showLine(line - 1):
+            self.window.log(f"Line {line} of {self.path.name} isn't indexed yet")
+
+    def search(self, string: str, cs: bool = False, forward: bool = True) -> None:
+        """Searches the whole file for a string, wrapping around
+
+        Parameters
+        ----------
+        string : `str`
+            The string to search for
+        cs : `bool`
+            Case sensitive, by default False
+        forward : `bool`
+            Check ahead for behind the cursor, by default True
+        """
+        if not string or self._data is None:
+            return
+        regex = re.compile(re.escape(string.encode()), 0 if cs else re.IGNORECASE)
+        if forward:
+            pos = self.SendScintilla(self.SCI_GETSELECTIONEND)
+            wrap = 0
+        else:
+            pos = self.SendScintilla(self.SCI_GETSELECTIONSTART)
+            wrap = len(self._data)
+        found = self._search(regex, self._start + pos, forward)
+        if found is None and (found := self._search(regex, wrap, forward)) is None:
+            return
+        start, end = found
+        if not (self._start <= start and end <= self._end):
+            self._show(start)
+        self.SendScintilla(self.SCI_SETSEL, start - self._start, end - self._start)
+        self.SendScintilla(self.SCI_VERTICALCENTRECARET)
+
+    def find(self) -> None:
+        """Starts the search"""
+        Find(self).exec()
+
+    def focusInEvent(self, _) -> None:
+        QsciScintilla.focusInEvent(self, _)
+        return super().focusInEvent(_)
+
+    def text(self) -> str:
+        """The text of the lines loaded in the view"""
+        return QsciScintilla.text(self)
+
+    def copy(self) -> None:
+        """Copies the selected text. If no text is selected, the line will copied"""
+        if not self.hasSelectedText():
+            return self.SendScintilla(self.SCI_LINECOPY)
+        return QsciScintilla.copy(self)
+
+    def cut(self) -> None:
+        """The view is read-only"""
+
+    def paste(self) -> None:
+        """The view is read-only"""
+
+    def saveFile(self) -> None:
+        """The view is read-only"""
+
+    def saveAs(self) -> None:
+        """The view is read-only"""
+
+    def _search(
+        self, regex: re.Pattern[bytes], pos: int, forward: bool
+    ) -> tuple[int, int] | None:
+        data = self._data
+        if forward:
+            match = regex.search(data, pos)
+            return match.span() if match else None
+        # Chunks overlap so matches across two chunks are found
+        overlap = len(regex.pattern)
+        while pos > 0:
+            start = max(0, pos - self.SEARCH_CHUNK)
+            last = None
+            for last in regex.finditer(data, start, pos):
+                pass
+            if last is not None:
+                return last.span()
+            if start == 0:
+                break
+            pos = start + overlap
+        return None
+
+    def _show(self, offset: int, top: int | None = None) -> None:
+        """Loads the window centered on a byte of the file
+
+        Keeps the view on the byte at `top`, by default the first visible byte.
+        """
+        data = self._data
+        pos = max(0, offset - self.WINDOW_SIZE // 2)
+        start = data.rfind(b"\n", 0, pos) + 1 if pos else 0
+        if start == self._start and self._end:
+            return
+        size = len(data)
+        end = min(size, start + self.WINDOW_SIZE)
+        if end < size:
+            # Very long lines are cut at twice the window size
+            limit = min(size, start + 2 * self.WINDOW_SIZE)
+            newline = data.find(b"\n", end, limit)
+            end = newline + 1 if newline >= 0 else limit
+        approximate = self._approximate
+        if abs(start - self._start) <= 2 * self.WINDOW_SIZE and self._end:
+            if start < self._start:
+                firstLine = self._firstLine - data[start : self._start].count(b"\n")
+            else:
+                firstLine = self._firstLine + data[self._start : start].count(b"\n")
+        else:
+            firstLine = self._index.lineAt(data, start)
+            if approximate := firstLine is None:
+                firstLine = self._index.estimate(start)
+
+        if top is None:
+            top = self._start + self._position(self.firstVisibleLine())
+        anchor = self._start + self.SendScintilla(self.SCI_GETANCHOR)
+        caret = self._start + self.SendScintilla(self.SCI_GETCURRENTPOS)
+        self._moving = True
+        self._setText(data[start:end])
+        self._start, self._end, self._firstLine = start, end, firstLine
+        self._approximate = approximate
+        if start <= top <= end:
+            self.setFirstVisibleLine(self._line(top - start))
+        if start <= anchor <= end and start <= caret <= end:
+            self.SendScintilla(self.SCI_SETSEL, anchor - start, caret - start)
+        self._moving = False
+        self._numberLines()
+
+    def _setText(self, text: bytes) -> None:
+        self.setReadOnly(False)
+        self.SendScintilla(self.SCI_CLEARALL)
+        self.SendScintilla(self.SCI_APPENDTEXT, len(text), text)
+        self.setReadOnly(True)
+        self.setModified(False)
+
+    def _scrolled(self, _: int) -> None:
+        if self._moving or self._data is None:
+            return
+        first = self.firstVisibleLine()
+        last = first + self.SendScintilla(self.SCI_LINESONSCREEN)
+        if (first < self.EDGE and self._start > 0) or (
+            last > self.lines() - self.EDGE and self._end < len(self._data)
+        ):
+            self._show(self._start + self._position(first))
+        else:
+            self._numberLines()
+
+    def _numberLines(self) -> None:
+        """Writes the line numbers of the file next to the visible lines"""
+        count = self._index.lineCount or self._firstLine + self.lines()
+        self.setMarginWidth(0, "0" * (len(str(count)) + 1))
+        first = self.firstVisibleLine()
+        last = min(self.lines(), first + self.SendScintilla(self.SCI_LINESONSCREEN) + 1)
+        prefix = "~" if self._approximate else ""
+        for line in range(first, last):
+            number = f"{prefix}{self._firstLine + line + 1}".encode()
+            self.SendScintilla(self.SCI_MARGINSETTEXT, line, number)
+            self.SendScintilla(self.SCI_MARGINSETSTYLE, line, self.STYLE_LINENUMBER)
+
+    def _indexed(self, index: LineIndex) -> None:
+        if index is self._index and index.complete:
+            if self._approximate and self._data is not None:
+                self._firstLine = index.lineAt(self._data, self._start)
+                self._approximate = False
+            self._numberLines()
+            self.indexed.emit()
+
+    def _position(self, line: int) -> int:
+        return self.SendScintilla(self.SCI_POSITIONFROMLINE, line)
+
+    def _line(self, position: int) -> int:
+        return self.SendScintilla(self.SCI_LINEFROMPOSITION, position)
+
+    def _release(self) -> None:
+        # Cancels the build of the index
+        self._index = LineIndex(self.path)
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def _tabClosed(self, tab: Tab) -> None:
+        if tab is self:
+            self._release()
+
+    def _tabOpened(self, tab: Tab) -> None:
+        if tab is self and self._data is None:
+            self.reload()
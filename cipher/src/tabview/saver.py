@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterable
+from collections import deque
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .atomic import writeAtomic
+from .editor import Editor
+from ..thread import Thread
+
+if TYPE_CHECKING:
+    from ..window import Window
+
+__all__ = ("Saver", "writeAtomic")
+
+
+def _write(path: Path, data: bytes) -> bool:
+    writeAtomic(path, data)
+    return True
+
+
+class Saver(QObject):
+    """Saves editors in the background
+
+    The text of an editor is copied when its save starts, then written by
+    :func:`writeAtomic` in a :class:`Thread`. At most `WRITERS` files are
+    written at a time. Saving an editor that is already being saved writes it
+    once more after the current write, with its latest text, however many
+    times it was asked.
+
+    Parameters
+    ----------
+    window: :class:`Window`
+        The window
+
+    Attributes
+    ----------
+    saved: :class:`pyqtSignal`
+        Emitted with the editor and whether it could be written once its save ends
+    """
+
+    WRITERS = 4
+
+    saved = pyqtSignal(Editor, bool)
+
+    def __init__(self, window: Window) -> None:
+        super().__init__(window)
+        self._window = window
+        self._pending: deque[Editor] = deque()
+        self._writing: set[Editor] = set()
+        self._again: set[Editor] = set()
+
+    def isSaving(self, editor: Editor) -> bool:
+        """Whether the editor is being written or waits to be"""
+        return editor in self._writing or editor in self._pending
+
+    def save(self, editor: Editor) -> None:
+        """Saves an editor in the background"""
+        if editor in self._writing:
+            self._again.add(editor)
+        elif editor not in self._pending:
+            self._pending.append(editor)
+            self._writeNext()
+
+    def saveAll(self, tabs: Iterable[object]) -> None:
+        """Saves every loaded editor with unsaved changes"""
+        for tab in tabs:
+            if isinstance(tab, Editor) and not tab.isLoading and tab.isModified():
+                self.save(tab)
+
+    def _writeNext(self) -> None:
+        while self._pending and len(self._writing) < self.WRITERS:
+            editor = self._pending.popleft()
+            self._writing.add(editor)
+            path, revision, length = editor.path, editor.revision, editor.length()
+            data = editor.bytes(0, length).data()[:length]
+            editor.journal.mark()
+            # The watcher would see the write as a change of the file
+            editor.unwatch()
+            thread = Thread(self, _write, path, data)
+            thread.finished.connect(
+                lambda ok, args=(editor, path, revision): self._written(*args, bool(ok))
+            )
+            thread.start()
+
+    def _written(self, editor: Editor, path: Path, revision: int, ok: bool) -> None:
+        self._writing.discard(editor)
+        editor.watch()
+        self._window.fileCache.invalidate(path)
+        if not ok:
+            self._window.log(f"Failed to save {path}", flush=True)
+        elif editor.revision == revision and editor.path == path:
+            editor.setModified(False)
+        # The file holds the text copied when the save started
+        if ok and editor.path == path:
+            editor.journal.rebase()
+        else:
+            editor.journal.unmark()
+        if ok:
+            editor.saved.emit()
+        self.saved.emit(editor, ok)
+        if editor in self._again:
+            self._again.discard(editor)
+            self._pending.append(editor)
+        self._writeNext()
@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QMenu,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
@@ -46,6 +47,18 @@ class CheckBoxOption(BaseOption):
         self.layout.addWidget(checkBox)
 
 
+class IntOption(Option):
+    updated = pyqtSignal(str, int)
+
+    def __init__(self, parent: QWidget, name: str, value: int) -> None:
+        super().__init__(parent, name)
+        spinBox = QSpinBox(self)
+        spinBox.setRange(0, 1024)
+        spinBox.setValue(value)
+        spinBox.valueChanged.connect(lambda value: self.updated.emit(name, value))
+        self.layout.addWidget(spinBox)
+
+
 class ListWidget(QListWidget):
     itemAdded = pyqtSignal(QListWidgetItem)
     itemUpdated = pyqtSignal(str, str)
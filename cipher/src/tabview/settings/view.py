@@ -2,7 +2,7 @@ from pathlib import Path
 import json
 
 from PyQt6.QtWidgets import QFrame, QVBoxLayout
-from .option import ListOption, CheckBoxOption
+from .option import ListOption, CheckBoxOption, IntOption
 
 
 class SettingsView(QFrame):
@@ -20,6 +20,10 @@ class SettingsView(QFrame):
                 option = CheckBoxOption(self, name, setting)
                 option.updated.connect(self._changeBool)
                 layout.addWidget(option)
+            elif isinstance(setting, int):
+                option = IntOption(self, name, setting)
+                option.updated.connect(self._changeInt)
+                layout.addWidget(option)
             elif isinstance(setting, list):
                 option = ListOption(self, name, setting)
                 option.added.connect(self._addToList)
@@ -40,6 +44,19 @@ class SettingsView(QFrame):
         self._settings[name] = value
         self._saveSettings()
 
+    def _changeInt(self, name: str, value: int) -> None:
+        """Changes the value of an integer setting
+
+        Parameters
+        ----------
+        name : str
+            Name of the settings
+        value : int
+            The integer value to set
+        """
+        self._settings[name] = value
+        self._saveSettings()
+
     def _addToList(self, name: str, value: str) -> None:
         """Adds a value to the specified list
 
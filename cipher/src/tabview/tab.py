@@ -5,6 +5,8 @@ from pathlib import Path
 from PyQt6.QtCore import QFileSystemWatcher
 from PyQt6.QtWidgets import QFileDialog
 
+from .atomic import writeAtomic
+
 if TYPE_CHECKING:
     from ..window import Window
 
@@ -17,6 +19,7 @@ class Tab:
         self.path = path
         self._watcher = QFileSystemWatcher()
         self._watcher.addPath(str(path))
+        self._watcher.fileChanged.connect(window.fileCache.invalidate)
 
     @property
     def window(self) -> Window:
@@ -25,29 +28,47 @@ class Tab:
     def focusInEvent(self, _) -> None:
         self.window.fileManager.setSelectedIndex(self)
 
-    def saveFile(self) -> None:
-        """Saves the editor"""
+    def watch(self) -> None:
+        """Watches the file for changes again"""
+        if str(self.path) not in self._watcher.files():
+            self._watcher.addPath(str(self.path))
+
+    def unwatch(self) -> None:
+        """Stops watching the file, so writing it isn't seen as a change"""
         self._watcher.removePath(str(self.path))
-        self.path.write_text(self.text(), encoding="utf-8")
-        self._watcher.addPath(str(self.path))
 
-    def saveAs(self) -> None:
-        """Saves the editor as a new file"""
+    def saveFile(self) -> None:
+        """Saves the tab with :func:`writeAtomic`, so a failed save never truncates the file"""
+        self.unwatch()
+        try:
+            writeAtomic(self.path, self.text().encode("utf-8"))
+        except OSError:
+            self._window.log(f"Failed to save {self.path}", flush=True)
+        self._window.fileCache.invalidate(self.path)
+        self.watch()
+
+    def savePath(self) -> Path | None:
+        """Asks for the path to save the file as. `None` if cancelled"""
         file, _ = QFileDialog.getSaveFileName(
             self,
             "Save as",
             str(self._window.currentFolder) if self._window.currentFolder else "C:/",
             "All Files (*);;Python files (*.py);;JSON files (*.json)",
         )
-        if not file:
+        return Path(file) if file else None
+
+    def setPath(self, path: Path) -> None:
+        """Changes the path of the file, to save it as a new file"""
+        self.unwatch()
+        self.path = path
+        self._window.tabView.setTabText(self, path.name)
+
+    def saveAs(self) -> None:
+        """Saves the editor as a new file"""
+        if not (path := self.savePath()):
             return
-        self._watcher.removePath(str(self.path))
-        self.path = Path(file)
-        self.path.write_text(self.text(), "utf-8")
-        self._watcher.addPath(str(self.path))
-        self._window.tabView.setTabText(
-            self._window.tabView.currentIndex(), self.path.name
-        )
+        self.setPath(path)
+        self.saveFile()
 
     def text(self) -> str:
         raise NotImplemented
@@ -63,3 +84,6 @@ class Tab:
 
     def find(self) -> None:
         raise NotImplemented
+
+    def goToLine(self) -> None:
+        raise NotImplemented
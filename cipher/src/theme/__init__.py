@@ -0,0 +1,128 @@
+from __future__ import annotations
+from pathlib import Path
+import json
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QFont
+
+__all__ = ("Theme",)
+
+# Milliseconds to wait for more changes before :attr:`Theme.changed` is emitted
+DEBOUNCE = 100
+
+
+class Theme(QObject):
+    """The lexer and theme files, shared by every window of the application
+
+    `styles/lexer.json` and the `syntax.json` of the lexers are parsed once
+    and watched by a single watcher. The colors and fonts built from them are
+    shared by every lexer, so opening many tabs doesn't parse or allocate
+    them again. When any of the files changes, the cache is dropped and
+    :attr:`changed` is emitted once for all of them, so every editor is
+    re-themed in the same batch.
+
+    Parameters
+    ----------
+    localAppData: `str`
+        The folder holding `styles` and `include`
+    parent: `Optional[QObject]`
+        The parent of the theme
+
+    Attributes
+    ----------
+    changed: :class:`pyqtSignal`
+        Emitted once the changed files were parsed again
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, localAppData: str, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._localAppData = localAppData
+        self._lexers = os.path.join(localAppData, "styles", "lexer.json")
+        self._languages: dict[str, dict[str, str]] | None = None
+        self._syntaxes: dict[str, dict[str, str]] = {}
+        self._colors: dict[str, dict[str, QColor]] = {}
+        self._colorCache: dict[str, QColor] = {}
+        self._fontCache: dict[str, QFont] = {}
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._fileChanged)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE)
+        self._timer.timeout.connect(self.changed.emit)
+        self._watch(self._lexers)
+
+    @property
+    def languages(self) -> dict[str, dict[str, str]]:
+        """The language and lexer folder of every file suffix, from `lexer.json`"""
+        if self._languages is None:
+            self._languages = self._read(self._lexers)
+        return self._languages
+
+    def lexerFor(self, suffix: str) -> tuple[str, str] | None:
+        """The language and lexer folder of a file suffix
+
+        Returns `None` if the suffix has no lexer or its folder doesn't exist.
+        """
+        if not (info := self.languages.get(suffix)):
+            return None
+        language, folder = info.get("language"), info.get("lexer")
+        if not language or not folder:
+            return None
+        path = os.path.join(self._localAppData, "include", "lexer", language, folder)
+        return (language, folder) if os.path.isdir(path) else None
+
+    def syntax(self, path: str | Path) -> dict[str, str]:
+        """The parsed `syntax.json` of a lexer. Watched from the first call"""
+        path = os.fspath(path)
+        if (syntax := self._syntaxes.get(path)) is None:
+            syntax = self._syntaxes[path] = self._read(path)
+            self._watch(path)
+        return syntax
+
+    def colors(self, path: str | Path) -> dict[str, QColor]:
+        """The colors of a `syntax.json`, by name. Shared by every lexer using it"""
+        path = os.fspath(path)
+        if (colors := self._colors.get(path)) is None:
+            colors = self._colors[path] = {
+                name: self.color(value)
+                for name, value in self.syntax(path).items()
+                if QColor.isValidColorName(value)
+            }
+        return colors
+
+    def color(self, name: str) -> QColor:
+        """A shared color. Don't modify it"""
+        if (color := self._colorCache.get(name)) is None:
+            color = self._colorCache[name] = QColor(name)
+        return color
+
+    def font(self, family: str) -> QFont:
+        """A shared font. Don't modify it"""
+        if (font := self._fontCache.get(family)) is None:
+            font = self._fontCache[family] = QFont(family)
+        return font
+
+    def _read(self, path: str) -> dict:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Failed to read {path} - {e.__class__.__name__}: {e}")
+            return {}
+
+    def _watch(self, path: str) -> None:
+        if os.path.exists(path) and path not in self._watcher.files():
+            self._watcher.addPath(path)
+
+    def _fileChanged(self, path: str) -> None:
+        if path == self._lexers:
+            self._languages = None
+        self._syntaxes.pop(path, None)
+        self._colors.pop(path, None)
+        # Files saved by replacing them aren't watched anymore
+        self._watch(path)
+        self._timer.start()
@@ -9,13 +9,19 @@ from PyQt6.QtGui import QCloseEvent, QIcon, QClipboard
 from PyQt6.QtWidgets import QMainWindow, QSystemTrayIcon
 
 from .body import *
+from ..completion import *
 from ..extensionlist import *
+from ..filecache import *
 from ..filemanager import *
+from ..keymap import *
 from ..menubar import *
 from ..search import *
+from ..quickopen import *
+from ..symbols import *
 from ..sidebar import *
 from ..splitter import *
 from ..tabview import *
+from ..theme import *
 from ..outputview import *
 from ..logs import *
 
@@ -33,6 +39,8 @@ class Window(QMainWindow):
     ----------
     body: :class:`Body`
         The body of the editor
+    fileCache: :class:`FileCache`
+        The metadata of the workspace files
     tabView: :class:`TabWidget`
         Holds all the tabs
     fileManager: :class:`FileManager`
@@ -41,10 +49,20 @@ class Window(QMainWindow):
         The list view of all extensions
     search: :class:`GlobalSearch`
         The tree view of found phrases. Note: uses regex
+    quickOpen: :class:`QuickOpen`
+        The palette to open a workspace file by typing part of its path
+    symbolPicker: :class:`SymbolPicker`
+        The palette to go to a class or function of the workspace
+    completions: :class:`Completions`
+        The words of the editors and the workspace, offered by autocompletion
     sidebar: :class:`Sidebar`
         The sidebar to select which view you want.
     menubar: :class:`Menubar`
         The menubar of the window
+    keymap: :class:`Keymap`
+        The parsed shortcuts, shared by every window
+    theme: :class:`Theme`
+        The lexer and theme files, shared by every window
     notification: :class:`Notification`
         Sends a windows notification. Meant to be used by :class:`Extension`
     """
@@ -62,12 +80,19 @@ class Window(QMainWindow):
             "hiddenPaths": [],
             "search-pattern": [],
             "search-exclude": [],
+            "search-workers": 0,
+            "large-file-size": 64,
         }
 
+        self.fileCache = FileCache()
         self.tabView = TabView(self)
         self.fileManager = FileManager(self)
+        self.fileManager.workspaceChanged.connect(lambda _: self.fileCache.clear())
+        self.completions = Completions(self)
         self.extensionList = ExtensionList(self)
         self.search = Search(self)
+        self.quickOpen = QuickOpen(self)
+        self.symbolPicker = SymbolPicker(self)
         self.logs = Logs(self)
         self.outputView = OutputView(self)
         self.sidebar = Sidebar(self)
@@ -120,10 +145,18 @@ class Window(QMainWindow):
     def shortcut(self):
         return self.application._shortcut
 
+    @property
+    def keymap(self) -> Keymap:
+        return self.application._keymap
+
     @property
     def styles(self):
         return self.application._styles
 
+    @property
+    def theme(self) -> Theme:
+        return self.application._theme
+
     @property
     def loop(self):
         return self.application.loop